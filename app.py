@@ -2,7 +2,15 @@ import streamlit as st
 import os
 import sys
 import json
-from simulation.runner import run_dc_sweep
+import time
+import uuid
+from concurrent.futures import CancelledError, TimeoutError as FutureTimeout
+from simulation.async_runner import get_latest_runner
+from simulation.limits import SimulationError
+from simulation.reuse import ScalingReuse
+from simulation.history import HistoryStore
+from simulation.speculative import get_speculative_executor
+from simulation.instrument import configure_instrument, memory_sink
 from plotting.charts import create_plots
 import config_utils
 
@@ -13,6 +21,65 @@ st.set_page_config(
     layout="wide"
 )
 
+# Simulation results kept per session for repeated runs of the same parameters
+MAX_CACHED_RESULTS = 32
+
+def params_key(params: dict) -> tuple:
+    """Hashable form of a current_params dict."""
+    return tuple(sorted(params.items()))
+
+def run_latest(debounce=None, **sweep_args):
+    """
+    Runs a sweep as the latest request of this session and waits for it.
+    A newer request (from the next rerun) cancels this one, killing its
+    ngspice process; the wait then raises CancelledError. Waiting in short
+    slices with a status update lets Streamlit interrupt the script as soon
+    as a widget changes.
+    """
+    future = get_latest_runner().submit(st.session_state.channel, debounce=debounce, **sweep_args)
+    status = st.empty()
+    start = time.monotonic()
+    try:
+        while True:
+            try:
+                return future.result(timeout=0.1)
+            except FutureTimeout:
+                status.caption(f"simulating... {time.monotonic() - start:.1f} s")
+    finally:
+        status.empty()
+
+def render_diagnostics(instrument):
+    """Diagnostics panel: pipeline counters, stage timings and the latest operations."""
+    sink = memory_sink(instrument)
+    if sink is None:
+        return
+    snap = instrument.snapshot()
+    with st.expander("diagnostics"):
+        counters = snap['counters']
+        cols = st.columns(5)
+        cols[0].metric("ngspice runs", counters.get('runs', 0))
+        cols[1].metric("failures", counters.get('failures', 0))
+        cols[2].metric("cache hits", counters.get('cache_hits', 0))
+        cols[3].metric("points solved", counters.get('points', 0))
+        cols[4].metric("peak ngspice rss", f"{snap['peak_rss_bytes'] / 2**20:.1f} MiB")
+        if snap['timers']:
+            st.dataframe([
+                {'stage': stage, 'count': t['count'], 'mean ms': 1e3 * t['total'] / t['count'], 'max ms': 1e3 * t['max']}
+                for stage, t in sorted(snap['timers'].items())
+            ], hide_index=True)
+        events = list(sink.events)[-20:][::-1]
+        if events:
+            st.dataframe([
+                {
+                    'op': e['op'],
+                    'ok': e['ok'],
+                    'total ms': 1e3 * e['stages'].get('total', 0.0),
+                    **{f"{k} ms": 1e3 * v for k, v in e['stages'].items() if k != 'total'},
+                    **e['counts'],
+                }
+                for e in events
+            ], hide_index=True)
+
 # st.title("gm/Id Methodology Visualization")
 
 # st.markdown("""
@@ -22,8 +89,12 @@ st.set_page_config(
 with st.sidebar:
     st.header("device parameters")
     
-    # Load configuration
-    config, error_msg = config_utils.load_process_config()
+    # Load configuration (re-read only when the files change)
+    config, error_msg = config_utils.load_process_config_cached()
+    # Metrics sinks ('metrics_log', 'metrics_prometheus', 'diagnostics'); off by default
+    instrument = configure_instrument(config)
+    # Pre-simulates neighbouring points while idle ('speculate'); off by default
+    speculator = get_speculative_executor(config)
     
     if error_msg:
         st.error(error_msg)
@@ -96,9 +167,21 @@ with st.sidebar:
     if 'data' not in st.session_state:
         st.session_state.data = None
     if 'history' not in st.session_state:
-        st.session_state.history = []
+        # Compact float32 records, bounded per session and across sessions
+        st.session_state.history = HistoryStore.from_config(config)
     if 'last_params' not in st.session_state:
         st.session_state.last_params = {}
+    if 'channel' not in st.session_state:
+        # Identifies this session's requests on the shared async runner
+        st.session_state.channel = uuid.uuid4().hex
+    if 'config' not in st.session_state or st.session_state.config is not config:
+        # First run, or the config files changed (a new object is loaded):
+        # results memoized or scaled under the old settings are stale
+        st.session_state.config = config
+        st.session_state.results = {}
+        st.session_state.pop('figs_key', None)
+        # Derives results that differ only in m (or W within tolerance) by scaling
+        st.session_state.reuse = ScalingReuse.from_config(config)
 
     run_on_change = st.checkbox("autorun", value=False)
     
@@ -132,49 +215,70 @@ with st.sidebar:
         should_run = True
 
     if should_run:
+        if speculator is not None:
+            # Real requests get the CPU
+            speculator.cancel()
         with st.spinner("running simulation with ngspice..."):
             try:
                 # Store current data in history before updating
+                # (deduplicated by params, so re-runs do not grow it)
                 if st.session_state.data is not None:
-                    # Append current data AND params to history
-                    # We store as a dict to keep them together
-                    result_entry = {
-                        'data': st.session_state.data.copy(),
-                        'params': st.session_state.last_params.copy()
-                    }
-                    st.session_state.history.append(result_entry)
-                    
-                    # Trim history to configured depth
-                    if len(st.session_state.history) > history_depth:
-                        st.session_state.history = st.session_state.history[-history_depth:]
+                    st.session_state.history.add(st.session_state.data, st.session_state.last_params)
 
-                # Run Simulation
+                # Run Simulation (or reuse / scale a previous one)
                 # inputs are in microns, runner expects meters
-                df = run_dc_sweep(
-                    device_name=device_name,
-                    width=width * 1e-6, 
-                    length=length * 1e-6,
-                    vds=vds,
-                    vgs_max=vgs_max,
-                    vbs=vbs_val,
-                    ng=int(ng),
-                    m=int(m),
-                    sim_config=config # Pass the full config object
-                )
+                key = params_key(current_params)
+                df = st.session_state.results.get(key)
+                if df is None:
+                    # Autorun edits are debounced and superseded by newer ones;
+                    # an explicit run starts immediately
+                    debounce = 0.0 if run_btn else None
+                    df = st.session_state.reuse.run_dc_sweep(
+                        device_name=device_name,
+                        width=width * 1e-6, 
+                        length=length * 1e-6,
+                        vds=vds,
+                        vgs_max=vgs_max,
+                        vbs=vbs_val,
+                        ng=int(ng),
+                        m=int(m),
+                        sim_config=config, # Pass the full config object
+                        runner=lambda **kwargs: run_latest(debounce=debounce, **kwargs)
+                    )
+                    if df is not None and not df.empty:
+                        st.session_state.results[key] = df
+                        if len(st.session_state.results) > MAX_CACHED_RESULTS:
+                            st.session_state.results.pop(next(iter(st.session_state.results)))
                 
                 if df is not None and not df.empty:
                     st.session_state.data = df
                     st.session_state.last_params = current_params.copy()
+                    if speculator is not None:
+                        speculator.speculate(
+                            st.session_state.channel,
+                            current_params,
+                            bounds={'width': (eff_min_w, eff_max_w), 'length': (min_l, max_l)}
+                        )
+                    if 'derived' in df.attrs:
+                        st.caption(f"derived by scaling a previous result (x{df.attrs['derived']['scale']:.3g}), ngspice skipped")
                 else:
                     st.error("simulation returned no data. check ngspice output.")
                     
+            except CancelledError:
+                # Superseded by a newer parameter change; its run shows the result
+                pass
+            except SimulationError as e:
+                st.error(f"simulation failed: {e}")
             except Exception as e:
                 st.error(f"an error occurred: {str(e)}")
 
 # Always generate plots
 # If data is None, create_plots will return empty figures
 # Prepare history list based on toggle
-history_to_plot = st.session_state.history if show_history else []
+# The current result is not repeated as its own previous trace
+history_to_plot = []
+if show_history:
+    history_to_plot = st.session_state.history.records(history_depth, exclude=st.session_state.last_params)
 
 # Bundle current data with its params
 current_result = None
@@ -184,10 +288,20 @@ if st.session_state.data is not None:
         'params': st.session_state.last_params
     }
 
-figs = create_plots(
-    current=current_result,
-    history=history_to_plot
+# Figures are rebuilt only when the plotted results change; plain reruns
+# (e.g. toggling autorun) reuse the previous ones
+figs_key = (
+    params_key(st.session_state.last_params),
+    id(st.session_state.data),
+    tuple(id(record) for record in history_to_plot)
 )
+if st.session_state.get('figs_key') != figs_key:
+    st.session_state.figs = create_plots(
+        current=current_result,
+        history=history_to_plot
+    )
+    st.session_state.figs_key = figs_key
+figs = st.session_state.figs
 
 # Layout plots using 2x2 grid
 col1, col2 = st.columns(2)
@@ -198,4 +312,6 @@ with col1:
 
 with col2:
     st.plotly_chart(figs[1], use_container_width=True) # gm/gds vs gm/Id
-    st.plotly_chart(figs[3], use_container_width=True) # Id vs Vgs
\ No newline at end of file
+    st.plotly_chart(figs[3], use_container_width=True) # Id vs Vgs
+
+render_diagnostics(instrument)
\ No newline at end of file
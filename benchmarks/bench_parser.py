@@ -0,0 +1,115 @@
+"""
+Micro-benchmark: vectorized parse_ngspice_data vs the original per-row
+DataFrame.apply implementation, and the binary rawfile parser.
+
+Usage:
+    python benchmarks/bench_parser.py --rows 100000 --repeat 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from simulation.parser import parse_ngspice_data, parse_ngspice_raw
+
+
+def legacy_parse_ngspice_data(file_path: str, device_name: str) -> pd.DataFrame:
+    """Original row-wise implementation, kept here as the reference."""
+    df_raw = pd.read_csv(file_path, sep=r'\s+', header=None)
+    if df_raw.empty:
+        return pd.DataFrame()
+
+    data = pd.DataFrame()
+    data['vgs'] = df_raw.iloc[:, 0]
+    data['id'] = df_raw.iloc[:, 1].abs()
+    data['id'] = data['id'].apply(lambda x: max(x, 1e-15))
+    data['gm'] = df_raw.iloc[:, 3]
+    data['gds'] = df_raw.iloc[:, 5]
+    data['cgg'] = df_raw.iloc[:, 7]
+    data['gm_id'] = data.apply(lambda row: row['gm'] / row['id'] if abs(row['id']) > 1e-18 else 0, axis=1)
+    data['gm_gds'] = data.apply(lambda row: row['gm'] / row['gds'] if abs(row['gds']) > 1e-18 else 0, axis=1)
+    data['ft'] = data.apply(lambda row: row['gm'] / (2 * np.pi * abs(row['cgg'])) if abs(row['cgg']) > 1e-18 else 0, axis=1)
+    return data
+
+
+def write_wrdata_file(path: str, rows: int, seed: int = 0):
+    """Writes a synthetic wrdata file ([X ids X gm X gds X cgg]) with some zero rows."""
+    rng = np.random.default_rng(seed)
+    vgs = np.linspace(0.0, 1.5, rows)
+    ids = 1e-6 * np.exp(vgs / 0.04) / (1 + np.exp(vgs / 0.04)) * rng.uniform(0.9, 1.1, rows)
+    gm = ids / 0.04
+    gds = ids * 0.05
+    cgg = np.full(rows, 1e-14)
+    # Exercise the masked branches
+    ids[::97] = 0.0
+    gds[::89] = 0.0
+    cgg[::83] = 0.0
+    cols = [vgs, ids, vgs, gm, vgs, gds, vgs, cgg]
+    np.savetxt(path, np.column_stack(cols), fmt='%.6e')
+
+
+def write_raw_file(path: str, txt_path: str):
+    """Writes the sweep in txt_path (wrdata layout) as an ngspice binary rawfile."""
+    data = np.loadtxt(txt_path)[:, [0, 1, 3, 5, 7]]
+    rows = len(data)
+    names = ["v(v-sweep)", "@n.xn1.nbench[ids]", "@n.xn1.nbench[gm]", "@n.xn1.nbench[gds]", "@n.xn1.nbench[cgg]"]
+    header = ["Title: bench", "Plotname: DC transfer characteristic", "Flags: real",
+              f"No. Variables: {len(names)}", f"No. Points: {rows}", "Variables:"]
+    header += [f"\t{i}\t{name}\tcurrent" for i, name in enumerate(names)]
+    with open(path, "wb") as f:
+        f.write(("\n".join(header) + "\nBinary:\n").encode())
+        f.write(np.ascontiguousarray(data, dtype="<f8").tobytes())
+
+
+def best_of(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-legacy", action="store_true", help="only time the vectorized parser")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "output.txt")
+        write_wrdata_file(path, args.rows)
+
+        # Text read cost is shared by both implementations; time it separately
+        t_read = best_of(lambda: pd.read_csv(path, sep=r'\s+', header=None), args.repeat)
+        t_new = best_of(lambda: parse_ngspice_data(path, "bench"), args.repeat)
+        print(f"rows={args.rows}")
+        print(f"  read_csv only : {t_read * 1e3:9.2f} ms")
+        print(f"  vectorized    : {t_new * 1e3:9.2f} ms")
+
+        raw_path = os.path.join(tmp, "output.raw")
+        write_raw_file(raw_path, path)
+        t_raw = best_of(lambda: parse_ngspice_raw(raw_path, "bench"), args.repeat)
+        size_txt, size_raw = os.path.getsize(path), os.path.getsize(raw_path)
+        print(f"  binary raw    : {t_raw * 1e3:9.2f} ms  (size {size_raw / 1e6:.1f} MB vs {size_txt / 1e6:.1f} MB ascii)")
+
+        if not args.skip_legacy:
+            t_old = best_of(lambda: legacy_parse_ngspice_data(path, "bench"), 1)
+            print(f"  legacy apply  : {t_old * 1e3:9.2f} ms  (speedup x{t_old / t_new:.1f})")
+            pd.testing.assert_frame_equal(
+                parse_ngspice_data(path, "bench"),
+                legacy_parse_ngspice_data(path, "bench"),
+                check_dtype=False,
+            )
+            print("  results identical")
+
+
+if __name__ == "__main__":
+    main()
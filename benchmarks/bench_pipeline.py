@@ -0,0 +1,255 @@
+"""
+End-to-end benchmark of the single-sweep pipeline, run against the analytic
+fake ngspice in tests/fake_ngspice.py (no PDK or real ngspice needed).
+
+Each sweep size is broken down into the stages of run_dc_sweep:
+    render  - formatting the netlist template
+    write   - creating the .sim_buffer run directory and writing the netlist
+    spawn   - starting and tearing down an ngspice process (`ngspice -v`)
+    solve   - rest of the ngspice run (simulation plus writing the output)
+    parse   - parse_output on the produced file
+    cleanup - removing the run directory
+    plots   - create_plots for the parsed frame
+plus the end-to-end run_dc_sweep time and batch throughput through
+run_dc_sweep_batch.
+
+Results are written to benchmarks/results/<commit>.json; compare two runs with
+    python benchmarks/bench_pipeline.py --compare <base>.json <new>.json
+
+Usage:
+    python benchmarks/bench_pipeline.py --sizes 100 10000 1000000 --batches 1 100
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from plotting.charts import create_plots
+from simulation.limits import SimulationError
+from simulation.parser import parse_output
+from simulation.runner import (
+    _new_sim_dir, ngspice_env, render_sweep_netlist, resolve_sim_settings,
+    run_dc_sweep, run_dc_sweep_batch
+)
+from simulation.templates import OUTPUT_FILENAMES
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+FAKE_NGSPICE = os.path.join(REPO_ROOT, "tests", "fake_ngspice.py")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000, 1_000_000)
+DEFAULT_BATCHES = (1, 10, 100, 1000)
+STAGES = ("render", "write", "spawn", "solve", "parse", "cleanup", "plots")
+
+DEVICE = dict(device_name="sg13_lv_nmos", width=10e-6, length=1e-6, vds=0.9, vbs=0.0, ng=1, m=1)
+VGS_MAX = 1.2
+
+# Relative slowdown reported as a regression by --compare
+REGRESSION_THRESHOLD = 0.10
+
+
+def vgs_step_for(points: int) -> float:
+    return VGS_MAX / (points - 1)
+
+
+def git_commit() -> str:
+    """Short hash of HEAD, suffixed with '-dirty' for uncommitted changes."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + ("-dirty" if dirty else "")
+
+
+def best_of(func, repeat: int):
+    """Minimum wall time of `repeat` calls and the result of the last one."""
+    best, result = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def time_stages(points: int, sim_config: dict, output_format: str, repeat: int) -> dict:
+    """Runs the subprocess pipeline stage by stage; returns seconds per stage (best of `repeat`)."""
+    _, _, ngspice_bin = resolve_sim_settings(sim_config)
+    env = ngspice_env(sim_config["pdk_root"], sim_config["pdk_code"])
+    sweep_args = dict(DEVICE, vgs_max=VGS_MAX, vgs_step=vgs_step_for(points), output_format=output_format)
+
+    timings = {stage: [] for stage in STAGES}
+    rows = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        sim_dir = _new_sim_dir()
+        netlist_file = sim_dir / "input.cir"
+        output_file = sim_dir / OUTPUT_FILENAMES[output_format]
+        t1 = time.perf_counter()
+        netlist = render_sweep_netlist(**sweep_args, output_file=str(output_file))
+        t2 = time.perf_counter()
+        with open(netlist_file, "w") as f:
+            f.write(netlist)
+        t3 = time.perf_counter()
+        subprocess.run([ngspice_bin, "-v"], capture_output=True, env=env, check=True)
+        t4 = time.perf_counter()
+        subprocess.run([ngspice_bin, "-b", str(netlist_file)], capture_output=True, env=env, check=True)
+        t5 = time.perf_counter()
+        data = parse_output(str(output_file), DEVICE["device_name"], output_format)
+        t6 = time.perf_counter()
+        shutil.rmtree(sim_dir)
+        t7 = time.perf_counter()
+        create_plots({'data': data, 'params': {'width': 10.0, 'length': 1.0, 'm': 1, 'ng': 1}})
+        t8 = time.perf_counter()
+
+        rows = len(data)
+        timings["render"].append(t2 - t1)
+        timings["write"].append((t1 - t0) + (t3 - t2))
+        timings["spawn"].append(t4 - t3)
+        # The -b run includes its own process start; the remainder is the solve
+        timings["solve"].append(max((t5 - t4) - (t4 - t3), 0.0))
+        timings["parse"].append(t6 - t5)
+        timings["cleanup"].append(t7 - t6)
+        timings["plots"].append(t8 - t7)
+
+    result = {stage: min(values) for stage, values in timings.items()}
+    result["rows"] = rows
+    return result
+
+
+def bench_sweeps(sizes, sim_config: dict, output_format: str, repeat: int) -> list:
+    results = []
+    for points in sizes:
+        # Large sweeps are dominated by the fake solver; one pass is enough
+        n = repeat if points <= 100_000 else 1
+        stages = time_stages(points, sim_config, output_format, n)
+        t_total, _ = best_of(lambda: run_dc_sweep(
+            **DEVICE, vgs_max=VGS_MAX, vgs_step=vgs_step_for(points), sim_config=sim_config
+        ), n)
+        stages["end_to_end"] = t_total
+        stages["points"] = points
+        results.append(stages)
+        print(f"points={points:>8}  " + "  ".join(f"{s}={stages[s] * 1e3:8.2f}ms" for s in STAGES)
+              + f"  total={t_total * 1e3:9.2f}ms")
+    return results
+
+
+def bench_batches(batch_sizes, points: int, sim_config: dict, max_workers: int) -> list:
+    results = []
+    for batch in batch_sizes:
+        # Distinct lengths so no two jobs are identical
+        specs = [dict(DEVICE, length=(1.0 + 0.001 * i) * 1e-6, vgs_max=VGS_MAX, vgs_step=vgs_step_for(points))
+                 for i in range(batch)]
+        t0 = time.perf_counter()
+        failed = sum(isinstance(df, SimulationError) for _, df in run_dc_sweep_batch(specs, max_workers=max_workers, sim_config=sim_config))
+        elapsed = time.perf_counter() - t0
+        results.append({"batch": batch, "points": points, "seconds": elapsed,
+                        "sweeps_per_s": batch / elapsed, "failed": failed})
+        print(f"batch={batch:>5}  {elapsed:8.3f}s  {batch / elapsed:8.1f} sweeps/s  failed={failed}")
+    return results
+
+
+def compare(base_path: str, new_path: str, threshold: float = REGRESSION_THRESHOLD) -> int:
+    """Prints per-stage ratios new/base; returns the number of regressions above `threshold`."""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{base['commit']} -> {new['commit']}")
+
+    regressions = 0
+
+    def report(label, old, cur):
+        nonlocal regressions
+        if not old:
+            return
+        ratio = cur / old
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"  {label:<28} {old * 1e3:10.2f}ms -> {cur * 1e3:10.2f}ms  x{ratio:5.2f}{flag}")
+
+    old_sweeps = {r["points"]: r for r in base.get("sweeps", [])}
+    for row in new.get("sweeps", []):
+        old = old_sweeps.get(row["points"])
+        if old is None:
+            continue
+        for stage in STAGES + ("end_to_end",):
+            report(f"{row['points']} pts {stage}", old.get(stage), row.get(stage))
+
+    old_batches = {(r["batch"], r["points"]): r for r in base.get("batches", [])}
+    for row in new.get("batches", []):
+        old = old_batches.get((row["batch"], row["points"]))
+        if old is not None:
+            report(f"batch {row['batch']} x {row['points']} pts", old["seconds"], row["seconds"])
+
+    print(f"{regressions} regression(s) above {threshold:.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(DEFAULT_SIZES), help="Vgs points per sweep")
+    parser.add_argument("--batches", type=int, nargs="*", default=list(DEFAULT_BATCHES), help="sweeps per batch")
+    parser.add_argument("--batch-points", type=int, default=100, help="Vgs points per sweep in the batch runs")
+    parser.add_argument("--workers", type=int, default=None, help="run_dc_sweep_batch max_workers")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output-format", choices=sorted(OUTPUT_FILENAMES), default="ascii")
+    parser.add_argument("--engine", choices=("subprocess", "pool"), default="subprocess",
+                        help="engine for the end-to-end and batch runs")
+    parser.add_argument("--out", help="result file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two result files and exit")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, threshold=args.threshold) else 0)
+
+    commit = git_commit()
+    out_path = args.out or os.path.join(RESULTS_DIR, f"{commit}.json")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The runner writes to ./.sim_buffer; keep it out of the repository
+        os.chdir(tmp)
+        sim_config = {
+            "ngspice_path": FAKE_NGSPICE,
+            "pdk_root": os.path.join(tmp, "pdk"),
+            "pdk_code": "ihp-sg13g2",
+            "engine": args.engine,
+            "output_format": args.output_format,
+        }
+        sweeps = bench_sweeps(args.sizes, sim_config, args.output_format, args.repeat)
+        batches = bench_batches(args.batches, args.batch_points, sim_config, args.workers)
+        os.chdir(REPO_ROOT)
+
+    report = {
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "engine": args.engine,
+        "output_format": args.output_format,
+        "sweeps": sweeps,
+        "batches": batches,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
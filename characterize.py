@@ -0,0 +1,355 @@
+"""
+Headless gm/Id characterization.
+
+Sweeps the L x VDS x VBS x VGS grid of one or more devices with
+run_lut_sweep. The lengths are split into chunks that run in parallel, one
+ngspice process per chunk. Every finished chunk is written straight into a
+per-device LUT store (simulation/lutstore.py) in the output directory, so an
+interrupted job resumes where it stopped when it is run again with the same
+spec. Once all chunks are present the stores are finalized (see
+load_characterization).
+
+With --queue the chunks are not run locally but submitted to a shared work
+queue directory (simulation/distributed.py) and run by workers on any host
+that can reach it:
+
+    python -m simulation.distributed /shared/queue --jobs 8   # on every host
+    python characterize.py spec.json -o luts/ --queue /shared/queue
+
+Grid spec (JSON):
+    {
+        "devices": ["sg13_lv_nmos", "sg13_lv_pmos"],  # default: all devices of the process config
+        "width": 10.0,                                 # um
+        "ng": 1, "m": 1,
+        "lengths": {"start": 0.13, "stop": 10.0, "num": 40, "scale": "log"},  # um, or a list
+        "vds": {"start": 0.0, "stop": 1.2, "step": 0.05},                     # V, or a list
+        "vbs": [0.0, -0.3],
+        "vgs_max": 1.2,                                # default: the device's max_vgs
+        "vgs_step": 0.01,
+        "sim_config": {"output_format": "binary"}      # overrides of the process config
+    }
+Lengths outside a device's limits in the process config are skipped.
+
+Usage:
+    python characterize.py spec.json -o luts/ --jobs 8 --chunk-lengths 2
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+import config_utils
+from simulation.cache import ngspice_version, pdk_fingerprint
+from simulation.distributed import DEFAULT_LEASE_TIMEOUT, WorkQueue, run_jobs
+from simulation.lut import LUT_METRICS
+from simulation.lutstore import LutStore, LutWriter
+from simulation.runner import model_library, ngspice_env, resolve_sim_settings, run_lut_sweep
+
+# Lengths per chunk, i.e. per ngspice run
+DEFAULT_CHUNK_LENGTHS = 1
+
+# Exit status after Ctrl-C (checkpoints are kept)
+EXIT_INTERRUPTED = 130
+
+
+def expand_range(spec) -> list:
+    """
+    Values of a grid axis: a list, a single number, {"start", "stop", "step"}
+    (stop included) or {"start", "stop", "num", "scale": "lin" | "log"}.
+    """
+    if isinstance(spec, (int, float)):
+        return [float(spec)]
+    if isinstance(spec, (list, tuple)):
+        return [float(v) for v in spec]
+    start, stop = float(spec["start"]), float(spec["stop"])
+    if "step" in spec:
+        step = float(spec["step"])
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        return [round(start + i * step, 12) for i in range(count)]
+    num = int(spec["num"])
+    if spec.get("scale", "lin") == "log":
+        return [float(v) for v in np.geomspace(start, stop, num)]
+    return [float(v) for v in np.linspace(start, stop, num)]
+
+
+def resolve_job(spec: dict, process_config: dict) -> dict:
+    """
+    Expands a grid spec against the process config into a job: per device
+    the lengths [m] within its limits and the sweep settings.
+    """
+    devices_config = process_config.get("devices", {})
+    devices = spec.get("devices") or list(devices_config)
+    unknown = [d for d in devices if d not in devices_config]
+    if unknown:
+        raise ValueError(f"Devices {unknown} are not in the process config.")
+
+    lengths_um = expand_range(spec["lengths"])
+    job = {
+        "width": float(spec.get("width", 10.0)),
+        "ng": int(spec.get("ng", 1)),
+        "m": int(spec.get("m", 1)),
+        "vds": expand_range(spec.get("vds", 0.9)),
+        "vbs": expand_range(spec.get("vbs", 0.0)),
+        "vgs_step": float(spec.get("vgs_step", 0.01)),
+        "sim_config": spec.get("sim_config", {}),
+        "devices": {},
+    }
+    for device in devices:
+        limits = devices_config[device]
+        lengths = [l for l in lengths_um if limits["min_length"] <= l <= limits["max_length"]]
+        if len(lengths) < len(lengths_um):
+            print(f"{device}: skipping {len(lengths_um) - len(lengths)} lengths outside "
+                  f"[{limits['min_length']}, {limits['max_length']}] um")
+        if not lengths:
+            continue
+        job["devices"][device] = {
+            "lengths": [l * 1e-6 for l in lengths],
+            "vgs_max": float(spec.get("vgs_max", limits["max_vgs"])),
+        }
+    return job
+
+
+def job_fingerprint(job: dict) -> str:
+    return hashlib.sha256(json.dumps(job, sort_keys=True).encode()).hexdigest()
+
+
+def make_chunks(job: dict, chunk_lengths: int) -> list:
+    """Splits a job into run_lut_sweep calls of up to `chunk_lengths` lengths."""
+    chunks = []
+    for device, settings in job["devices"].items():
+        lengths = settings["lengths"]
+        for index, start in enumerate(range(0, len(lengths), chunk_lengths)):
+            chunks.append({
+                "device": device,
+                "index": index,
+                "start": start,
+                "lengths": lengths[start:start + chunk_lengths],
+                "vgs_max": settings["vgs_max"],
+            })
+    return chunks
+
+
+def store_path(output: Path, device: str) -> Path:
+    return output / f"{device}.lut"
+
+
+def device_writers(job: dict, chunks: list, output: Path, meta: dict, device_meta: dict = None) -> dict:
+    """One LutWriter per device, chunked like the job; `device_meta` adds metadata per device."""
+    device_meta = device_meta or {}
+    writers = {}
+    for device, settings in job["devices"].items():
+        bounds = [(c["start"], c["start"] + len(c["lengths"])) for c in chunks if c["device"] == device]
+        vgs = expand_range({"start": 0.0, "stop": settings["vgs_max"], "step": job["vgs_step"]})
+        axes = {"length": settings["lengths"], "vds": job["vds"], "vbs": job["vbs"], "vgs": vgs}
+        writers[device] = LutWriter(store_path(output, device), axes, bounds, LUT_METRICS,
+                                     dict(meta, device=device, **device_meta.get(device, {})))
+    return writers
+
+
+def prepare_output(output: Path, job: dict, chunk_lengths: int, restart: bool = False) -> str:
+    """
+    Creates the output directory, or checks that an existing one belongs to
+    the same job (otherwise its chunks would be mixed into the result).
+    Returns the job fingerprint.
+    """
+    manifest = output / "job.json"
+    fingerprint = job_fingerprint({"job": job, "chunk_lengths": chunk_lengths})
+    if manifest.exists() and not restart:
+        with open(manifest) as f:
+            if json.load(f).get("fingerprint") != fingerprint:
+                raise ValueError(
+                    f"{output} holds chunks of a different job; "
+                    "use --restart to discard them or choose another output directory."
+                )
+    if restart:
+        for old in output.glob("*.lut"):
+            shutil.rmtree(old)
+    output.mkdir(parents=True, exist_ok=True)
+    with open(manifest, "w") as f:
+        json.dump({"fingerprint": fingerprint, "chunk_lengths": chunk_lengths, "job": job}, f, indent=2)
+    return fingerprint
+
+
+def chunk_kwargs(chunk: dict, job: dict) -> dict:
+    """run_lut_sweep arguments of a chunk (without sim_config)."""
+    return {
+        "device_name": chunk["device"],
+        "width": job["width"] * 1e-6,
+        "lengths": chunk["lengths"],
+        "vds_values": job["vds"],
+        "vbs_values": job["vbs"],
+        "vgs_max": chunk["vgs_max"],
+        "vgs_step": job["vgs_step"],
+        "ng": job["ng"],
+        "m": job["m"],
+    }
+
+
+def run_chunk(chunk: dict, job: dict, sim_config: dict, writer: LutWriter) -> bool:
+    """Simulates one chunk and stores it; raises SimulationError on failure."""
+    lut = run_lut_sweep(**chunk_kwargs(chunk, job), sim_config=sim_config)
+    writer.write_lut(chunk["index"], lut)
+    return True
+
+
+def run_local(pending: list, job: dict, sim_config: dict, writers: dict, jobs: int = None) -> int:
+    """Runs chunks on this machine, `jobs` at a time; returns the failed count."""
+    failed = 0
+    pool = ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1, thread_name_prefix="characterize")
+    try:
+        futures = {pool.submit(run_chunk, c, job, sim_config, writers[c["device"]]): c for c in pending}
+        start = time.monotonic()
+        for done, future in enumerate(as_completed(futures), 1):
+            chunk = futures[future]
+            try:
+                ok = future.result()
+            except Exception as e:
+                print(f"{chunk['device']} chunk {chunk['index']}: {e}")
+                ok = False
+            failed += not ok
+            status = "done" if ok else "FAILED"
+            print(f"[{done}/{len(pending)}] {chunk['device']} chunk {chunk['index']} {status} "
+                  f"({time.monotonic() - start:.1f} s)")
+    finally:
+        # Ctrl-C: drop queued chunks, wait for the running ones to checkpoint
+        pool.shutdown(wait=True, cancel_futures=True)
+    return failed
+
+
+def run_queued(
+    pending: list,
+    job: dict,
+    writers: dict,
+    queue_dir: str,
+    fingerprint: str,
+    lease_timeout: float = DEFAULT_LEASE_TIMEOUT
+) -> int:
+    """
+    Submits chunks to a shared work queue and stores the results as workers
+    deliver them; returns the failed count.
+    """
+    queue = WorkQueue(queue_dir, lease_timeout=lease_timeout)
+    # The fingerprint keeps jobs of different specs apart in a shared queue
+    chunks = {f"{fingerprint[:12]}-{c['device']}-{c['index']:05d}": c for c in pending}
+    jobs = {
+        job_id: {"kind": "lut_sweep", "kwargs": chunk_kwargs(c, job), "sim_config": job["sim_config"]}
+        for job_id, c in chunks.items()
+    }
+    bad_results = 0
+    start = time.monotonic()
+
+    def store(job_id, lut):
+        nonlocal bad_results
+        chunk = chunks[job_id]
+        try:
+            writers[chunk["device"]].write_lut(chunk["index"], lut)
+            status = "done"
+        except ValueError as e:
+            print(f"{chunk['device']} chunk {chunk['index']}: {e}")
+            bad_results += 1
+            status = "FAILED"
+        print(f"{chunk['device']} chunk {chunk['index']} {status} ({time.monotonic() - start:.1f} s)")
+
+    return len(run_jobs(queue, jobs, store)) + bad_results
+
+
+def load_characterization(path: str) -> dict:
+    """Opens the LUT stores of a finished job: {device: LutStore}."""
+    return {
+        store.name[:-len(".lut")]: LutStore(store)
+        for store in sorted(Path(path).glob("*.lut"))
+        if (store / "meta.json").exists()
+    }
+
+
+def characterize(
+    spec: dict,
+    output: str,
+    jobs: int = None,
+    chunk_lengths: int = DEFAULT_CHUNK_LENGTHS,
+    restart: bool = False,
+    process_config: dict = None,
+    queue_dir: str = None,
+    lease_timeout: float = DEFAULT_LEASE_TIMEOUT
+) -> int:
+    """
+    Runs (or resumes) a characterization job into the directory `output`,
+    locally or through the work queue `queue_dir`. Returns the number of
+    chunks that failed; the stores are only finalized when all of them
+    succeeded.
+    """
+    if process_config is None:
+        process_config, error = config_utils.load_process_config()
+        if process_config is None:
+            raise ValueError(error)
+
+    job = resolve_job(spec, process_config)
+    sim_config = dict(process_config, **job["sim_config"])
+    chunks = make_chunks(job, chunk_lengths)
+    output = Path(output)
+    fingerprint = prepare_output(output, job, chunk_lengths, restart)
+
+    pdk_root, pdk_code, ngspice_bin = resolve_sim_settings(sim_config)
+    env = ngspice_env(pdk_root, pdk_code)
+    writers = device_writers(job, chunks, output, {
+        "pdk": pdk_code,
+        "ngspice_version": ngspice_version(ngspice_bin),
+        "params": {key: job[key] * 1e-6 if key == "width" else job[key] for key in ("width", "ng", "m", "vgs_step")},
+    }, {
+        # Tells LUTs of different PDK releases apart (model files and OSDI modules)
+        device: {"pdk_fingerprint": pdk_fingerprint(model_library(device), env)} for device in job["devices"]
+    })
+    pending = [c for c in chunks if not writers[c["device"]].has_chunk(c["index"])]
+    print(f"{len(chunks)} chunks, {len(chunks) - len(pending)} already done, {len(pending)} to run")
+
+    if queue_dir is not None:
+        failed = run_queued(pending, job, writers, queue_dir, fingerprint, lease_timeout)
+    else:
+        failed = run_local(pending, job, sim_config, writers, jobs)
+
+    if failed:
+        print(f"{failed} chunks failed; rerun to retry them")
+        return failed
+    for writer in writers.values():
+        writer.finish()
+    print(f"results written to {output}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("spec", help="grid spec (JSON file)")
+    parser.add_argument("-o", "--output", required=True, help="output directory (one <device>.lut store per device)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="parallel ngspice runs (default: CPU count)")
+    parser.add_argument("--chunk-lengths", type=int, default=DEFAULT_CHUNK_LENGTHS, help="lengths per chunk")
+    parser.add_argument("--restart", action="store_true", help="discard existing checkpoints")
+    parser.add_argument("--queue", help="run the chunks through this shared work queue directory")
+    parser.add_argument("--lease-timeout", type=float, default=DEFAULT_LEASE_TIMEOUT,
+                        help="seconds without a worker heartbeat before a chunk is requeued")
+    args = parser.parse_args(argv)
+
+    with open(args.spec) as f:
+        spec = json.load(f)
+    try:
+        failed = characterize(
+            spec, args.output, args.jobs, args.chunk_lengths, args.restart,
+            queue_dir=args.queue, lease_timeout=args.lease_timeout
+        )
+    except KeyboardInterrupt:
+        print("interrupted; completed chunks are checkpointed, rerun to resume")
+        sys.exit(EXIT_INTERRUPTED)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 import json
 import os
+import threading
+
+GLOBAL_CONFIG_PATH = "config/global.json"
 
 def load_global_config():
     """Load global configuration from config/global.json"""
     try:
-        with open("config/global.json", "r") as f:
+        with open(GLOBAL_CONFIG_PATH, "r") as f:
             return json.load(f)
     except FileNotFoundError:
         return {}
@@ -47,3 +50,46 @@ def load_process_config():
              
     except FileNotFoundError:
         return None, f"Configuration file for {process_name} not found at {full_config_path}."
+
+
+_config_cache = {}
+_config_lock = threading.Lock()
+
+def _file_signature(path):
+    """(mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def _process_config_path():
+    """Path of the process configuration that load_process_config would read, or None."""
+    global_config = load_global_config()
+    processes = global_config.get("processes", {})
+    if not processes:
+        return None
+    return resolve_config_path(processes[list(processes.keys())[0]])
+
+def load_process_config_cached():
+    """
+    Same result as load_process_config, memoized per working directory.
+    The files are only re-read when the mtime or size of config/global.json
+    or of the process file changes; otherwise this costs two stat calls.
+    The returned dict is shared between callers and must not be modified.
+    """
+    key = os.path.abspath(GLOBAL_CONFIG_PATH)
+    with _config_lock:
+        entry = _config_cache.get(key)
+        if entry is not None:
+            signature, process_path, process_signature, result = entry
+            if (_file_signature(key) == signature
+                    and (process_path is None or _file_signature(process_path) == process_signature)):
+                return result
+
+        signature = _file_signature(key)
+        process_path = _process_config_path()
+        process_signature = _file_signature(process_path) if process_path else None
+        result = load_process_config()
+        _config_cache[key] = (signature, process_path, process_signature, result)
+        return result
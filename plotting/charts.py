@@ -2,37 +2,130 @@ import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
 
-def create_plots(current: dict | None = None, history: list[dict] | None = None):
-    """
-    Generates a list of plotly figures for standard gm/Id plots.
-    
-    Args:
-        current: Dict with keys 'data' (DataFrame) and 'params' (Dict).
-        history: List of similar dicts for previous results.
-    """
-    
+from simulation.derived import derived
+from simulation.instrument import get_instrument, instrumented
+
+# Per-trace point budget; longer curves are decimated (None disables)
+DEFAULT_MAX_POINTS = 2000
+
+# Total points per figure above which traces are drawn with WebGL
+WEBGL_THRESHOLD = 20000
+
+# Layouts of the four figures, resolved once (template lookup is costly)
+FIGURE_LAYOUTS = (
     # 1. gm/Id vs Normalized Current (Id / (W/L))
-    fig1 = go.Figure()
-    
+    dict(
+        title="efficiency (gm/Id) vs current density (Id / (W/L))",
+        xaxis_title="Id / (W/L) [A]",
+        yaxis_title="gm/Id [V^-1]",
+        xaxis_type="log",
+        xaxis=dict(showgrid=True),
+        yaxis=dict(showgrid=True),
+        template="plotly_white"
+    ),
     # 2. Intrinsic Gain (gm/gds) vs gm/Id
-    fig2 = go.Figure()
-
+    dict(
+        title="intrinsic gain (gm/gds) vs gm/Id",
+        xaxis_title="gm/Id [V^-1]",
+        yaxis_title="gm/gds [V/V]",
+        xaxis=dict(autorange="reversed", showgrid=True),
+        template="plotly_white"
+    ),
     # 3. Transit Frequency (ft) vs gm/Id
-    fig3 = go.Figure()
-    
+    dict(
+        title="transit frequency (ft) vs gm/Id",
+        xaxis_title="gm/Id [V^-1]",
+        yaxis_title="ft [GHz]",
+        xaxis=dict(autorange="reversed", showgrid=True),
+        template="plotly_white"
+    ),
     # 4. Id vs Vgs
-    fig4 = go.Figure()
+    dict(
+        title="drain current vs Vgs",
+        xaxis_title="|Vgs| [V]",
+        yaxis_title="|Id| [A]",
+        yaxis_type="log",
+        xaxis=dict(showgrid=True),
+        template="plotly_white"
+    ),
+)
+
+_layout_templates = None
+
+def layout_templates() -> list:
+    """
+    Validated layouts of the four figures with the template already
+    resolved, as plain dicts (built on first use).
+    """
+    global _layout_templates
+    if _layout_templates is None:
+        _layout_templates = [go.Layout(**layout).to_plotly_json() for layout in FIGURE_LAYOUTS]
+    return _layout_templates
+
+def decimate_minmax(x: np.ndarray, y: np.ndarray, max_points: int | None):
+    """
+    Shape-preserving decimation of a curve to at most `max_points` points.
+
+    The curve is split into consecutive buckets (in sweep order) and each
+    bucket keeps the points where x and y reach their minimum and maximum,
+    plus the end points. Extremes are unchanged by monotone transforms, so
+    peaks and knees survive on log axes as well.
+    """
+    n = len(x)
+    if max_points is None or n <= max_points or max_points < 8:
+        return x, y
+
+    # Up to 4 extremes per bucket, plus both end points
+    buckets = (max_points - 2) // 4
+    size = -(-n // buckets)
+    padded = size * buckets
+
+    keep = [np.array([0, n - 1])]
+    base = np.arange(buckets) * size
+    for values in (x, y):
+        v = np.asarray(values, dtype=np.float64)
+        low = np.full(padded, np.inf)
+        high = np.full(padded, -np.inf)
+        finite = np.isfinite(v)
+        low[:n] = np.where(finite, v, np.inf)
+        high[:n] = np.where(finite, v, -np.inf)
+        keep.append(base + np.argmin(low.reshape(buckets, size), axis=1))
+        keep.append(base + np.argmax(high.reshape(buckets, size), axis=1))
+
+    index = np.unique(np.concatenate(keep))
+    index = index[index < n]
+    return x[index], y[index]
+
+@instrumented("create_plots")
+def create_plots(
+    current: dict | None = None,
+    history: list[dict] | None = None,
+    max_points: int | None = DEFAULT_MAX_POINTS,
+    webgl: bool | None = None
+):
+    """
+    Generates a list of plotly figures for standard gm/Id plots.
 
-    figs = [fig1, fig2, fig3, fig4]
+    Args:
+        current: Dict with keys 'data' (DataFrame) and 'params' (Dict), e.g.
+            LutStore.plot_result(...) of a stored characterization.
+        history: List of similar dicts, or HistoryRecords, for previous results.
+        max_points: Point budget per trace; longer curves are decimated with
+            decimate_minmax. None plots every point.
+        webgl: Draw with Scattergl. None (default) switches to WebGL when a
+            figure would hold more than WEBGL_THRESHOLD points.
+    """
+    # Traces per figure, as plain dicts; figures are built once at the end
+    traces = [[], [], [], []]
 
     # Helper to add traces
     def add_data_traces(result_obj, is_previous=False, index=0):
         if result_obj is None:
             return
-            
+
         dataframe = result_obj.get('data')
         params = result_obj.get('params', {})
-        
+
         if dataframe is None or dataframe.empty:
             return
 
@@ -49,20 +142,21 @@ def create_plots(current: dict | None = None, history: list[dict] | None = None)
         # 'm': m
         # 'ng': ng
         # The plotting logic previously used `width * 1e-6 * int(m)`.
-        
+
         m_val = int(params.get('m', 1))
-        
+
         # Calculate W/L effective
         width_m = w_um * 1e-6 * m_val
         length_m = l_um * 1e-6
-        
-        w_over_l = width_m / length_m if length_m > 0 else 1.0
-        
-        # Avoid SettingWithCopyWarning if valid DF
-        d = dataframe.copy()
-        d['id_abs'] = d['id'].abs()
-        d['id_norm'] = d['id_abs'] / w_over_l
-        d['ft_ghz'] = d['ft'] / 1e9
+
+        # W/L = 1 without a length
+        if length_m <= 0:
+            length_m = width_m
+
+        # Lazy derived metrics, memoized per result: history records are
+        # only computed once across reruns. Works for DataFrames and float32
+        # HistoryRecords alike.
+        d = derived(dataframe, width=width_m, length=length_m)
 
         if is_previous:
             line_props = dict(dash='dash', color='gray')
@@ -74,45 +168,22 @@ def create_plots(current: dict | None = None, history: list[dict] | None = None)
             suffix = ""
             opacity = 1.0
 
-        # 1. gm/Id vs Id/W
-        fig1.add_trace(go.Scatter(
-            x=d['id_norm'], 
-            y=d['gm_id'],
-            mode='lines',
-            name=f'gm/Id{suffix}',
-            line=line_props,
-            opacity=opacity
-        ))
-
-        # 2. gm/gds vs gm/Id
-        fig2.add_trace(go.Scatter(
-            x=d['gm_id'], 
-            y=d['gm_gds'],
-            mode='lines',
-            name=f'Gain{suffix}',
-            line=line_props,
-            opacity=opacity
-        ))
-
-        # 3. ft vs gm/Id
-        fig3.add_trace(go.Scatter(
-            x=d['gm_id'], 
-            y=d['ft_ghz'],
-            mode='lines',
-            name=f'ft{suffix}',
-            line=line_props,
-            opacity=opacity
-        ))
-
-        # 4. Id vs Vgs
-        fig4.add_trace(go.Scatter(
-            x=d['vgs'].abs(), 
-            y=d['id_abs'],
-            mode='lines',
-            name=f'Id{suffix}',
-            line=line_props,
-            opacity=opacity
-        ))
+        curves = (
+            (d['id_norm'], d['gm_id'], 'gm/Id'),     # 1. gm/Id vs Id/W
+            (d['gm_id'], d['gm_gds'], 'Gain'),       # 2. gm/gds vs gm/Id
+            (d['gm_id'], d['ft_ghz'], 'ft'),         # 3. ft vs gm/Id
+            (d['vgs_abs'], d['id_abs'], 'Id'),       # 4. Id vs Vgs
+        )
+        for fig_traces, (x, y, name) in zip(traces, curves):
+            x, y = decimate_minmax(x, y, max_points)
+            fig_traces.append(dict(
+                x=x,
+                y=y,
+                mode='lines',
+                name=f'{name}{suffix}',
+                line=dict(line_props),
+                opacity=opacity
+            ))
 
     # Add previous data first
     if history:
@@ -124,40 +195,20 @@ def create_plots(current: dict | None = None, history: list[dict] | None = None)
     # Add current data
     add_data_traces(current, is_previous=False)
 
-    # Update Layouts (Common settings)
-    fig1.update_layout(
-        title="efficiency (gm/Id) vs current density (Id / (W/L))",
-        xaxis_title="Id / (W/L) [A]",
-        yaxis_title="gm/Id [V^-1]",
-        xaxis_type="log",
-        xaxis=dict(showgrid=True),
-        yaxis=dict(showgrid=True),
-        template="plotly_white"
-    )
-    
-    fig2.update_layout(
-        title="intrinsic gain (gm/gds) vs gm/Id",
-        xaxis_title="gm/Id [V^-1]",
-        yaxis_title="gm/gds [V/V]",
-        xaxis=dict(autorange="reversed", showgrid=True),
-        template="plotly_white"
-    )
+    # Traces and layouts are built here from known-good properties, so
+    # plotly's per-property validation is skipped
+    figs = []
+    instrument = get_instrument()
+    with instrument.timer("figures"):
+        for fig_traces, layout in zip(traces, layout_templates()):
+            points = sum(len(t['x']) for t in fig_traces)
+            instrument.count("points_plotted", points)
+            use_webgl = webgl
+            if use_webgl is None:
+                use_webgl = points > WEBGL_THRESHOLD
+            trace_type = 'scattergl' if use_webgl else 'scatter'
+            for t in fig_traces:
+                t['type'] = trace_type
+            figs.append(go.Figure(data=fig_traces, layout=layout, _validate=False))
 
-    fig3.update_layout(
-        title="transit frequency (ft) vs gm/Id",
-        xaxis_title="gm/Id [V^-1]",
-        yaxis_title="ft [GHz]",
-        xaxis=dict(autorange="reversed", showgrid=True),
-        template="plotly_white"
-    )
-    
-    fig4.update_layout(
-        title="drain current vs Vgs",
-        xaxis_title="|Vgs| [V]",
-        yaxis_title="|Id| [A]",
-        yaxis_type="log",
-        xaxis=dict(showgrid=True),
-        template="plotly_white"
-    )
-    
     return figs
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+
+from .limits import SimulationError
+from .parser import ID_FLOOR
+from .runner import run_dc_sweep, run_vgs_segments
+
+# Defaults for run_adaptive_sweep
+DEFAULT_COARSE_STEP = 0.05
+DEFAULT_MIN_STEP = 0.0025
+DEFAULT_TOLERANCE = 0.01
+DEFAULT_REFINE_FACTOR = 4
+DEFAULT_MAX_PASSES = 4
+
+
+def interpolation_error(vgs: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Error of linear interpolation between the neighbours at every interior
+    point of a (possibly non-uniform) grid; 0 at the end points.
+    """
+    error = np.zeros(len(vgs))
+    if len(vgs) < 3:
+        return error
+    x0, x1, x2 = vgs[:-2], vgs[1:-1], vgs[2:]
+    y0, y1, y2 = values[:-2], values[1:-1], values[2:]
+    predicted = y0 + (y2 - y0) * (x1 - x0) / (x2 - x0)
+    error[1:-1] = np.abs(y1 - predicted)
+    return error
+
+
+def refine_intervals(data: pd.DataFrame, tolerance: float, min_step: float) -> np.ndarray:
+    """
+    Indices i of the intervals [vgs[i], vgs[i+1]] that need more points.
+
+    An interior point is flagged when linear interpolation from its
+    neighbours misses gm/Id (relative to its peak) or ln(Id) (i.e. the
+    relative Id error) by more than `tolerance`; both intervals around it
+    are refined, unless they are already narrower than 2 * min_step.
+    """
+    vgs = np.abs(data['vgs'].to_numpy())
+    gm_id = data['gm_id'].to_numpy()
+    log_id = np.log(np.maximum(np.abs(data['id'].to_numpy()), ID_FLOOR))
+
+    peak = np.max(np.abs(gm_id)) if len(gm_id) else 0.0
+    flagged = interpolation_error(vgs, log_id) > tolerance
+    if peak > 0:
+        flagged |= interpolation_error(vgs, gm_id) / peak > tolerance
+
+    points = np.flatnonzero(flagged)
+    intervals = np.unique(np.concatenate([points - 1, points]))
+    intervals = intervals[(intervals >= 0) & (intervals < len(vgs) - 1)]
+    wide = np.diff(vgs)[intervals] >= 2 * min_step
+    return intervals[wide]
+
+
+def merge_sweeps(frames: list) -> pd.DataFrame:
+    """Concatenates sweeps into one frame sorted by |Vgs|, dropping repeated points."""
+    merged = pd.concat([f for f in frames if f is not None and not f.empty], ignore_index=True)
+    order = np.argsort(np.abs(merged['vgs'].to_numpy()), kind='stable')
+    merged = merged.iloc[order]
+    # Segment end points may repeat an existing point up to float formatting
+    key = np.round(np.abs(merged['vgs'].to_numpy()), 9)
+    keep = np.ones(len(key), dtype=bool)
+    keep[1:] = key[1:] != key[:-1]
+    return merged[keep].reset_index(drop=True)
+
+
+def run_adaptive_sweep(
+    device_name: str,
+    width: float,
+    length: float,
+    vds: float,
+    vgs_max: float,
+    vbs: float = 0.0,
+    ng: int = 1,
+    m: int = 1,
+    coarse_step: float = DEFAULT_COARSE_STEP,
+    min_step: float = DEFAULT_MIN_STEP,
+    tolerance: float = DEFAULT_TOLERANCE,
+    refine_factor: int = DEFAULT_REFINE_FACTOR,
+    max_passes: int = DEFAULT_MAX_PASSES,
+    sim_config: dict = None
+):
+    """
+    DC sweep with Vgs points concentrated where gm/Id and Id bend.
+
+    A coarse sweep (run_dc_sweep, so it is cached like any other) is refined
+    in passes: every interval flagged by refine_intervals is split into
+    `refine_factor` sub-steps (not below `min_step`), and all new segments
+    of a pass are solved in one ngspice run (run_vgs_segments).
+
+    Returns:
+        DataFrame sorted by |Vgs| in the parse_ngspice_data layout, with
+        attrs['adaptive'] = {'passes', 'points'}. A failed refinement pass keeps
+        the points solved so far; a failed coarse sweep raises SimulationError.
+    """
+    data = run_dc_sweep(
+        device_name=device_name, width=width, length=length, vds=vds, vgs_max=vgs_max,
+        vgs_step=coarse_step, vbs=vbs, ng=ng, m=m, sim_config=sim_config
+    )
+    if data is None or data.empty:
+        return data
+    data = merge_sweeps([data])
+
+    passes = 0
+    while passes < max_passes:
+        intervals = refine_intervals(data, tolerance, min_step)
+        if len(intervals) == 0:
+            break
+        vgs = np.abs(data['vgs'].to_numpy())
+        segments = []
+        for i in intervals:
+            lo, hi = vgs[i], vgs[i + 1]
+            step = max((hi - lo) / refine_factor, min_step)
+            # Interior points only; the ends are already solved
+            segments.append((lo + step, hi - step / 2, step))
+
+        try:
+            refined = run_vgs_segments(
+                device_name=device_name, width=width, length=length, vds=vds, segments=segments,
+                vbs=vbs, ng=ng, m=m, sim_config=sim_config
+            )
+        except SimulationError:
+            break
+        data = merge_sweeps([data, refined])
+        passes += 1
+
+    data.attrs['adaptive'] = {'passes': passes, 'points': len(data)}
+    return data
@@ -0,0 +1,301 @@
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import os
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from .instrument import get_instrument, instrumented, parse_solve_time, process_peak_rss, rusage_peak_bytes
+from .limits import SimulationError, kill_process_group, relax_netlist, resolve_limits
+from .runner import (
+    _DcSweep, _retry_or_raise, check_ngspice, nice_prefix, resolve_engine, resolve_io_mode, run_dc_sweep
+)
+
+# Default quiet period before a coalesced request is started
+DEFAULT_DEBOUNCE = 0.15
+
+# Seconds between peak-RSS samples of a running child (instrumentation on)
+RSS_SAMPLE_INTERVAL = 0.02
+
+
+def cached_dc_sweep(
+    device_name: str,
+    width: float,
+    length: float,
+    vds: float,
+    vgs_max: float,
+    vgs_step: float = 0.01,
+    vbs: float = 0.0,
+    ng: int = 1,
+    m: int = 1,
+    sim_config: dict = None,
+    cache=None
+):
+    """The cached result of run_dc_sweep with these arguments, or None (nothing is run)."""
+    return _DcSweep(device_name, width, length, vds, vgs_max, vgs_step, vbs, ng, m, sim_config, cache).lookup()
+
+
+@instrumented("dc_sweep_async")
+async def run_dc_sweep_async(
+    device_name: str,
+    width: float,
+    length: float,
+    vds: float,
+    vgs_max: float,
+    vgs_step: float = 0.01,
+    vbs: float = 0.0,
+    ng: int = 1,
+    m: int = 1,
+    sim_config: dict = None,
+    cache=None
+):
+    """
+    Coroutine counterpart of run_dc_sweep (same arguments and result).
+
+    ngspice is started with asyncio.create_subprocess_exec in its own process
+    group. Cancelling the task kills the group and removes the run directory;
+    the limits and retries of the config apply as in run_dc_sweep.
+    io_mode "pipe" is served as "tmpfs" (netlist on stdin, output in a
+    RAM-backed directory).
+    The 'shared' and 'pool' engines run run_dc_sweep in a worker thread; a
+    cancelled call there is abandoned rather than interrupted.
+    """
+    engine = resolve_engine(sim_config)
+    if engine != "subprocess":
+        return await asyncio.to_thread(
+            run_dc_sweep, device_name, width, length, vds, vgs_max, vgs_step, vbs, ng, m,
+            sim_config=sim_config, cache=cache
+        )
+
+    instrument = get_instrument()
+    sweep = _DcSweep(device_name, width, length, vds, vgs_max, vgs_step, vbs, ng, m, sim_config, cache)
+    cached = await asyncio.to_thread(sweep.lookup)
+    if cached is not None:
+        instrument.count("cache_hits")
+        return cached
+
+    io_mode = "files" if resolve_io_mode(sim_config) == "files" else "tmpfs"
+    limits = resolve_limits(sim_config)
+    try:
+        netlist_content = sweep.prepare(io_mode)
+        attempt = 0
+        while True:
+            netlist = netlist_content if attempt == 0 else relax_netlist(netlist_content, attempt)
+            try:
+                await _run_attempt_async(netlist, sweep, io_mode, limits)
+                break
+            except SimulationError as e:
+                _retry_or_raise(e, attempt, limits, sweep.output_file)
+            attempt += 1
+        return await asyncio.to_thread(sweep.finish, str(sweep.output_file), attempt)
+    finally:
+        sweep.cleanup()
+
+
+async def _run_attempt_async(netlist_content: str, sweep: _DcSweep, io_mode: str, limits):
+    """One ngspice run of run_dc_sweep_async; raises SimulationError on failure."""
+    instrument = get_instrument()
+    ngspice_bin = sweep.ngspice_bin
+    if io_mode == "files":
+        with instrument.timer("write"):
+            with open(sweep.netlist_file, "w") as f:
+                f.write(netlist_content)
+        cmd, stdin = [ngspice_bin, "-b", str(sweep.netlist_file)], None
+    else:
+        cmd, stdin = [ngspice_bin, "-b"], netlist_content.encode()
+    cmd = nice_prefix(sweep.sim_config) + cmd
+    check_ngspice(ngspice_bin, sweep.sim_config)
+
+    instrument.count("runs")
+    start = time.perf_counter()
+    with instrument.timer("spawn"):
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE if stdin is not None else None,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=sweep.env,
+            cwd=os.getcwd(),
+            start_new_session=True,
+            preexec_fn=limits.preexec_fn()
+        )
+    limits.apply(proc.pid)
+    rss = _RssSampler(proc.pid) if instrument.enabled else None
+    timed_out = False
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(stdin), limits.timeout)
+    except asyncio.TimeoutError:
+        # The watchdog of the event loop: wait_for cancelled communicate()
+        timed_out = True
+        kill_process_group(proc)
+        stdout, stderr = b"", b""
+        await proc.wait()
+    except asyncio.CancelledError:
+        kill_process_group(proc)
+        await proc.wait()
+        raise
+    finally:
+        if rss is not None:
+            instrument.record_rss(rss.stop())
+    instrument.add_time("ngspice", time.perf_counter() - start)
+
+    stdout = stdout.decode(errors="replace")
+    stderr = stderr.decode(errors="replace")
+    solve = parse_solve_time(stdout) if instrument.enabled else None
+    if solve is not None:
+        instrument.add_time("solve", solve)
+    if proc.returncode != 0 or timed_out:
+        raise SimulationError.from_run(proc.returncode, stdout, stderr, timed_out, limits)
+    if not sweep.output_file.exists():
+        raise SimulationError.from_run(0, stdout, stderr)
+
+
+class _RssSampler:
+    """
+    Peak RSS of an ngspice child that asyncio reaps itself (so os.wait4 is
+    not available): VmHWM is sampled while it runs; without /proc, a new
+    high of the children's ru_maxrss is taken instead.
+    """
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.peak = process_peak_rss(pid)
+        self.children_before = self._children_peak()
+        self._task = asyncio.ensure_future(self._sample())
+
+    @staticmethod
+    def _children_peak() -> int:
+        if resource is None:
+            return 0
+        return rusage_peak_bytes(resource.getrusage(resource.RUSAGE_CHILDREN))
+
+    async def _sample(self):
+        while True:
+            self.peak = max(self.peak, process_peak_rss(self.pid))
+            await asyncio.sleep(RSS_SAMPLE_INTERVAL)
+
+    def stop(self) -> int:
+        self._task.cancel()
+        if self.peak == 0:
+            children = self._children_peak()
+            if children > self.children_before:
+                self.peak = children
+        return self.peak
+
+
+class LatestOnlyRunner:
+    """
+    Coalesces rapid sweep requests so that only the latest one per channel
+    (e.g. per app session) is simulated.
+
+    Requests run on a private event loop in a background thread. A new
+    request on a channel cancels the previous one: before it starts if it
+    is still in its debounce window, otherwise by killing its ngspice
+    process. Futures of superseded requests end with
+    concurrent.futures.CancelledError. Repeating the request that is
+    already in flight returns its future.
+    """
+
+    def __init__(self, debounce: float = DEFAULT_DEBOUNCE):
+        self.debounce = debounce
+        self.started = 0
+        self.cancelled = 0
+        # Reentrant: cancelling a future runs its done-callback (_forget) at once
+        self._lock = threading.RLock()
+        self._loop = None
+        self._thread = None
+        self._current = {}
+
+    def _ensure_loop(self):
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="latest-only-runner", daemon=True)
+            self._thread.start()
+        return self._loop
+
+    async def _run(self, debounce: float, kwargs: dict):
+        if debounce > 0:
+            # A cached result (e.g. pre-simulated by the speculative
+            # executor) costs nothing, so it skips the debounce
+            cached = await asyncio.to_thread(cached_dc_sweep, **kwargs)
+            if cached is not None:
+                get_instrument().count("cache_hits")
+                return cached
+            await asyncio.sleep(debounce)
+        with self._lock:
+            self.started += 1
+        return await run_dc_sweep_async(**kwargs)
+
+    @staticmethod
+    def request_key(kwargs: dict) -> tuple:
+        # A repeat under another config is a new request
+        config = json.dumps(kwargs.get("sim_config") or {}, sort_keys=True, default=str)
+        return tuple(sorted((k, v) for k, v in kwargs.items() if k not in ("sim_config", "cache"))) + (
+            hashlib.sha256(config.encode()).hexdigest(),
+        )
+
+    def submit(self, channel, debounce: float = None, **kwargs) -> concurrent.futures.Future:
+        """Schedules run_dc_sweep_async(**kwargs) as the latest request of `channel`."""
+        key = self.request_key(kwargs)
+        debounce = self.debounce if debounce is None else debounce
+        with self._lock:
+            loop = self._ensure_loop()
+            previous = self._current.get(channel)
+            if previous is not None:
+                prev_key, prev_future = previous
+                if prev_key == key and not prev_future.done():
+                    return prev_future
+                if prev_future.cancel():
+                    self.cancelled += 1
+            future = asyncio.run_coroutine_threadsafe(self._run(debounce, kwargs), loop)
+            self._current[channel] = (key, future)
+        # Finished requests do not keep their result (or the channel) alive
+        future.add_done_callback(lambda done: self._forget(channel, done))
+        return future
+
+    def _forget(self, channel, future):
+        with self._lock:
+            current = self._current.get(channel)
+            if current is not None and current[1] is future:
+                del self._current[channel]
+
+    def cancel(self, channel):
+        """Cancels the pending request of `channel`, if any."""
+        with self._lock:
+            previous = self._current.pop(channel, None)
+            if previous is not None and previous[1].cancel():
+                self.cancelled += 1
+
+    def close(self):
+        with self._lock:
+            for _, future in list(self._current.values()):
+                future.cancel()
+            self._current.clear()
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is not None:
+            # Let the cancelled runs kill their processes before stopping
+            asyncio.run_coroutine_threadsafe(asyncio.sleep(0.05), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.run_until_complete(loop.shutdown_default_executor())
+            loop.close()
+
+
+_latest_runner = None
+_latest_runner_lock = threading.Lock()
+
+
+def get_latest_runner() -> LatestOnlyRunner:
+    """Process-wide LatestOnlyRunner shared by all app sessions (one channel each)."""
+    global _latest_runner
+    with _latest_runner_lock:
+        if _latest_runner is None:
+            _latest_runner = LatestOnlyRunner()
+        return _latest_runner
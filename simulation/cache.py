@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Default on-disk budget for cached results
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Stands in for the per-run output path when hashing a rendered netlist
+OUTPUT_PLACEHOLDER = "<output>"
+
+# Bump when the stored layout or the parser output changes
+CACHE_FORMAT_VERSION = 1
+
+_version_memo = {}
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def ngspice_version(ngspice_bin: str) -> str:
+    """
+    Version banner of the ngspice binary ('ngspice -v'), memoized per binary and mtime.
+    Returns an empty string if it cannot be determined.
+    """
+    try:
+        resolved = ngspice_bin if os.path.isabs(ngspice_bin) else (shutil.which(ngspice_bin) or ngspice_bin)
+        stamp = (resolved, os.stat(resolved).st_mtime_ns)
+    except OSError:
+        return ""
+
+    if stamp not in _version_memo:
+        try:
+            result = subprocess.run([resolved, "-v"], capture_output=True, text=True, timeout=10, stdin=subprocess.DEVNULL)
+            _version_memo[stamp] = result.stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            _version_memo[stamp] = ""
+    return _version_memo[stamp]
+
+
+def _expand(path: str, env: dict) -> str:
+    path = re.sub(r'\$(\w+)', lambda m: env.get(m.group(1), m.group(0)), path)
+    return os.path.expanduser(path)
+
+
+def spiceinit_dependencies(lib_filename: str, env: dict, spiceinit_path: str = ".spiceinit") -> list:
+    """
+    Files a simulation depends on through .spiceinit: every loaded OSDI module and
+    the model library directory in which `lib_filename` is found on the sourcepath.
+
+    Returns:
+        list of (path, size, mtime_ns) tuples; missing files are recorded with None values.
+    """
+    try:
+        with open(spiceinit_path, "r") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return []
+
+    files = [os.path.abspath(spiceinit_path)]
+    search_dirs = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith("osdi"):
+            match = re.search(r"'([^']+)'|(\S+)$", line[4:].strip())
+            files.append(_expand(match.group(1) or match.group(2), env))
+        elif line.startswith("setcs sourcepath"):
+            inner = line[line.find("(") + 1:line.rfind(")")]
+            search_dirs.extend(_expand(p, env) for p in inner.split() if p != "$sourcepath")
+
+    # The corner library includes its model files by relative path,
+    # so the whole directory it lives in is part of the identity.
+    for directory in search_dirs:
+        if os.path.isfile(os.path.join(directory, lib_filename)):
+            files.extend(sorted(str(p) for p in Path(directory).iterdir() if p.is_file()))
+            break
+
+    deps = []
+    for path in files:
+        try:
+            st = os.stat(path)
+            deps.append((path, st.st_size, st.st_mtime_ns))
+        except OSError:
+            deps.append((path, None, None))
+    return deps
+
+
+def pdk_fingerprint(lib_filename: str, env: dict, spiceinit_path: str = ".spiceinit") -> str:
+    """
+    Hash of the contents of the spiceinit_dependencies of `lib_filename`
+    (file names and bytes, not paths or mtimes), so that one PDK release
+    gives the same value on every host and another release a different one.
+    """
+    h = hashlib.sha256()
+    for path, size, _ in spiceinit_dependencies(lib_filename, env, spiceinit_path):
+        h.update(os.path.basename(path).encode())
+        h.update(b"\0")
+        if size is None:
+            continue
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Persistent content-addressed store for simulation results.
+
+    Each entry is an uncompressed .npz with one float64 array per column,
+    named by the hex key. Recency is tracked through the file mtime, so the
+    LRU order survives restarts and is shared between processes.
+    """
+
+    def __init__(self, cache_dir, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # key -> size in bytes, seeded from disk
+        self._sizes = {}
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".npz"):
+                self._sizes[entry.name[:-4]] = entry.stat().st_size
+
+    @staticmethod
+    def make_key(netlist: str, version: str = "", dependencies: list | None = None) -> str:
+        """Hash of everything that determines a simulation result."""
+        h = hashlib.sha256()
+        h.update(f"zchar-cache-v{CACHE_FORMAT_VERSION}\n".encode())
+        h.update(netlist.encode())
+        h.update(b"\0")
+        h.update(version.encode())
+        h.update(b"\0")
+        h.update(json.dumps(dependencies or [], sort_keys=True).encode())
+        return h.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.npz"
+
+    def get(self, key: str):
+        """Returns the cached DataFrame, or None on a miss."""
+        path = self._path(key)
+        try:
+            with np.load(path) as npz:
+                data = pd.DataFrame({name: npz[name] for name in npz.files})
+            os.utime(path)
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+                self._sizes.pop(key, None)
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: pd.DataFrame):
+        """Stores a result and evicts least recently used entries over budget."""
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, **{str(col): data[col].to_numpy(dtype=np.float64) for col in data.columns})
+        # Atomic publish: readers never see a partial file
+        os.replace(tmp, path)
+
+        with self._lock:
+            self._sizes[key] = path.stat().st_size
+            if sum(self._sizes.values()) > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drops oldest entries until the store fits its budget. Caller holds the lock."""
+        entries = []
+        for key in list(self._sizes):
+            try:
+                entries.append((self._path(key).stat().st_mtime_ns, key))
+            except FileNotFoundError:
+                self._sizes.pop(key, None)
+        entries.sort()
+
+        total = sum(self._sizes.values())
+        for _, key in entries:
+            if total <= self.max_bytes:
+                break
+            total -= self._sizes.pop(key)
+            self._path(key).unlink(missing_ok=True)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._sizes):
+                self._path(key).unlink(missing_ok=True)
+            self._sizes.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._sizes),
+                'bytes': sum(self._sizes.values()),
+                'max_bytes': self.max_bytes,
+            }
+
+
+def cache_from_config(sim_config: dict | None):
+    """
+    Shared ResultCache configured by 'cache_dir' (and optional 'cache_max_mb')
+    in the simulation config, or None when caching is not configured.
+    """
+    if not sim_config or not sim_config.get("cache_dir"):
+        return None
+
+    cache_dir = os.path.abspath(os.path.expanduser(sim_config["cache_dir"]))
+    max_bytes = int(sim_config.get("cache_max_mb", DEFAULT_MAX_BYTES / 2**20) * 2**20)
+    with _caches_lock:
+        cache = _caches.get(cache_dir)
+        if cache is None:
+            cache = _caches[cache_dir] = ResultCache(cache_dir, max_bytes)
+        cache.max_bytes = max_bytes
+        return cache
@@ -0,0 +1,276 @@
+import threading
+import weakref
+
+import numpy as np
+
+from .lut import LutResult
+from .parser import masked_divide, transit_frequency
+
+# Raw columns of a sweep (parse_ngspice_data layout) and the geometry
+# scalars, in SI units: total width (width * m) and length in meters
+BASE_COLUMNS = ('vgs', 'id', 'gm', 'gds', 'cgg')
+GEOMETRY = ('width', 'length')
+
+
+class DerivedMetric:
+    """A registered metric: func(*values of `requires`) -> array."""
+
+    __slots__ = ('name', 'requires', 'func', 'unit', 'doc')
+
+    def __init__(self, name: str, requires: tuple, func, unit: str = "", doc: str = ""):
+        self.name = name
+        self.requires = tuple(requires)
+        self.func = func
+        self.unit = unit
+        self.doc = doc
+
+    def __repr__(self):
+        return f"DerivedMetric({self.name!r}, requires={self.requires})"
+
+
+DERIVED_METRICS = {}
+
+
+def register_metric(name: str, requires: tuple, unit: str = ""):
+    """
+    Decorator registering a vectorized derived metric. The function gets the
+    arrays (or geometry scalars) named in `requires` positionally; arrays
+    may have any shape with VGS along the last axis.
+
+    Requirements must already be registered (or be base columns / geometry),
+    which keeps the dependency graph acyclic.
+    """
+    unknown = [r for r in requires if r not in BASE_COLUMNS + GEOMETRY and r not in DERIVED_METRICS]
+    if unknown:
+        raise ValueError(f"Metric '{name}' requires unknown metrics {unknown}.")
+
+    def decorator(func):
+        DERIVED_METRICS[name] = DerivedMetric(name, requires, func, unit, (func.__doc__ or "").strip())
+        return func
+    return decorator
+
+
+def dependencies(name: str) -> list:
+    """All metrics `name` is computed from, in evaluation order (without base columns)."""
+    order = []
+
+    def visit(metric):
+        for required in DERIVED_METRICS[metric].requires:
+            if required in DERIVED_METRICS and required not in order:
+                visit(required)
+        order.append(metric)
+
+    visit(name)
+    return order[:-1]
+
+
+class DerivedMetrics:
+    """
+    Lazy view of a dataset with every registered metric on top.
+
+    `data` is a parse_ngspice_data DataFrame, a HistoryRecord, a dict of
+    arrays or a LutResult. Columns present in the data are used as they are;
+    anything else is computed from the registry on first access, together
+    with what it depends on, and kept in `cache`. The data is treated as
+    immutable.
+    """
+
+    def __init__(self, data, width: float = None, length: float = None, cache: dict = None):
+        if isinstance(data, LutResult):
+            columns = dict(data.data)
+            columns['vgs'] = np.broadcast_to(data.axes['vgs'], data.shape)
+            data = columns
+        self._data = data
+        self._geometry = {'width': width, 'length': length}
+        self.cache = {} if cache is None else cache
+
+    def __contains__(self, name: str) -> bool:
+        if name in GEOMETRY:
+            return self._geometry[name] is not None
+        if name in self._data:
+            return True
+        metric = DERIVED_METRICS.get(name)
+        return metric is not None and all(r in self for r in metric.requires)
+
+    def __getitem__(self, name: str):
+        if name in GEOMETRY:
+            value = self._geometry[name]
+            if value is None:
+                raise KeyError(f"'{name}' is needed but was not given.")
+            return value
+        try:
+            return self.cache[name]
+        except KeyError:
+            pass
+        if name in self._data:
+            value = np.asarray(self._data[name])
+        elif name in DERIVED_METRICS:
+            metric = DERIVED_METRICS[name]
+            value = metric.func(*(self[r] for r in metric.requires))
+        else:
+            raise KeyError(name)
+        self.cache[name] = value
+        return value
+
+    def get(self, name: str, default=None):
+        return self[name] if name in self else default
+
+
+# id(data) -> {(width, length): cache}, dropped when the data is collected
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+def _forget(key: int):
+    with _memo_lock:
+        _memo.pop(key, None)
+
+
+def derived(data, width: float = None, length: float = None) -> DerivedMetrics:
+    """
+    DerivedMetrics of `data`, memoized per dataset and geometry: asking again
+    for the same object (e.g. a history record on every rerun) reuses the
+    metrics computed before.
+    """
+    key = id(data)
+    with _memo_lock:
+        entry = _memo.get(key)
+        if entry is None:
+            try:
+                weakref.finalize(data, _forget, key)
+            except TypeError:
+                # No weak references (e.g. a plain dict): compute without memo
+                return DerivedMetrics(data, width, length)
+            entry = _memo[key] = {}
+        cache = entry.setdefault((width, length), {})
+    return DerivedMetrics(data, width, length, cache)
+
+
+def _along_vgs(values: np.ndarray, index: np.ndarray) -> np.ndarray:
+    """values[..., index] for one index per curve (shape of values without the last axis)."""
+    return np.take_along_axis(values, index[..., None], axis=-1)[..., 0]
+
+
+# --- Registered metrics -----------------------------------------------------
+
+@register_metric('id_abs', ('id',), "A")
+def _id_abs(ids):
+    """|Id|"""
+    return np.abs(ids)
+
+
+@register_metric('vgs_abs', ('vgs',), "V")
+def _vgs_abs(vgs):
+    """|Vgs|"""
+    return np.abs(vgs)
+
+
+@register_metric('gm_id', ('gm', 'id_abs'), "1/V")
+def _gm_id(gm, id_abs):
+    """Transconductance efficiency gm/Id"""
+    return masked_divide(gm, id_abs)
+
+
+@register_metric('gm_gds', ('gm', 'gds'), "V/V")
+def _gm_gds(gm, gds):
+    """Intrinsic gain gm/gds"""
+    return masked_divide(gm, gds)
+
+
+@register_metric('gm_ro', ('gm_gds',), "V/V")
+def _gm_ro(gm_gds):
+    """Intrinsic gain gm*ro (same as gm/gds)"""
+    return gm_gds
+
+
+@register_metric('ft', ('gm', 'cgg'), "Hz")
+def _ft(gm, cgg):
+    """Transit frequency gm / (2 pi Cgg)"""
+    return transit_frequency(gm, cgg)
+
+
+@register_metric('ft_ghz', ('ft',), "GHz")
+def _ft_ghz(ft):
+    """Transit frequency in GHz"""
+    return ft / 1e9
+
+
+@register_metric('gm_id_ft', ('gm_id', 'ft'), "Hz/V")
+def _gm_id_ft(gm_id, ft):
+    """Speed-efficiency product gm/Id * ft"""
+    return gm_id * ft
+
+
+@register_metric('id_w', ('id_abs', 'width'), "A/m")
+def _id_w(id_abs, width):
+    """Current density Id/W"""
+    return id_abs / width
+
+
+@register_metric('id_norm', ('id_abs', 'width', 'length'), "A")
+def _id_norm(id_abs, width, length):
+    """Normalized current Id/(W/L)"""
+    return id_abs * (length / width)
+
+
+@register_metric('gm_w', ('gm', 'width'), "S/m")
+def _gm_w(gm, width):
+    """gm/W"""
+    return gm / width
+
+
+@register_metric('gds_w', ('gds', 'width'), "S/m")
+def _gds_w(gds, width):
+    """gds/W"""
+    return gds / width
+
+
+@register_metric('cgg_w', ('cgg', 'width'), "F/m")
+def _cgg_w(cgg, width):
+    """Gate capacitance per width |Cgg|/W"""
+    return np.abs(cgg) / width
+
+
+@register_metric('vt', ('vgs_abs', 'id_abs', 'gm'), "V")
+def _vt(vgs_abs, id_abs, gm):
+    """
+    Threshold voltage per curve by the max-gm method: the tangent of Id(Vgs)
+    at the maximum of gm extrapolated to Id = 0.
+    """
+    gm = np.abs(gm)
+    peak = np.argmax(np.where(np.isfinite(gm), gm, -np.inf), axis=-1)
+    vt = _along_vgs(vgs_abs, peak) - masked_divide(_along_vgs(id_abs, peak), _along_vgs(gm, peak))
+    return np.broadcast_to(vt[..., None], gm.shape)
+
+
+@register_metric('vgs_gmid_half', ('vgs_abs', 'gm_id'), "V")
+def _vgs_gmid_half(vgs_abs, gm_id):
+    """
+    |Vgs| per curve, above the gm/Id maximum, at which gm/Id has fallen to
+    half of it, interpolated linearly; NaN if the sweep does not get there.
+    A marker of moderate inversion (IC ~ 1) close to, but not, the
+    threshold voltage: it is not an extrapolation (see 'vt' for that).
+    """
+    g = np.where(np.isfinite(gm_id), gm_id, 0.0)
+    vgs_abs = np.broadcast_to(vgs_abs, g.shape)
+    peak = np.argmax(g, axis=-1)
+    half = _along_vgs(g, peak) / 2
+    below = (np.arange(g.shape[-1]) > peak[..., None]) & (g <= half[..., None])
+    found = below.any(axis=-1) & (half > 0)
+    upper = np.where(found, np.argmax(below, axis=-1), 1)
+    x0, x1 = _along_vgs(vgs_abs, upper - 1), _along_vgs(vgs_abs, upper)
+    y0, y1 = _along_vgs(g, upper - 1), _along_vgs(g, upper)
+    vt = x0 + (x1 - x0) * masked_divide(half - y0, y1 - y0)
+    return np.broadcast_to(np.where(found, vt, np.nan)[..., None], g.shape)
+
+
+@register_metric('vov', ('vgs_abs', 'vt'), "V")
+def _vov(vgs_abs, vt):
+    """Overdrive |Vgs| - Vt (max-gm Vt)"""
+    return vgs_abs - vt
+
+
+@register_metric('vdsat', ('gm_id',), "V")
+def _vdsat(gm_id):
+    """Saturation voltage estimate V* = 2 / (gm/Id) (square law; pessimistic in weak inversion)"""
+    return masked_divide(2.0, gm_id)
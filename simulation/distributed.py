@@ -0,0 +1,389 @@
+"""
+Distributed sweeps through a shared-directory work queue.
+
+A coordinator submits jobs (run_dc_sweep / run_lut_sweep keyword arguments)
+to a directory that every worker host can reach, e.g. over NFS. Workers
+claim jobs with an atomic rename, keep a lease on them by touching the
+claim file, and write their results back as .npz files:
+
+    queue.json              lease timeout, max attempts
+    pending/<job>.json      submitted, waiting for a worker
+    claimed/<job>.json      being run; the mtime is the lease heartbeat
+    results/<job>.npz       finished (written once, duplicates are dropped)
+    failed/<job>.json       gave up after max_attempts, with the last error
+
+Claims whose lease has expired (dead or disconnected worker) are moved back
+to pending by the coordinator and count as a failed attempt, so a job that
+keeps killing its worker ends up in failed/. Workers use their own process
+config (ngspice and PDK paths of their host) plus the sim_config overrides
+of the job, except for the HOST_KEYS.
+
+Worker usage:
+    python -m simulation.distributed /shared/queue --jobs 4
+"""
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .lut import LutResult
+from .runner import run_dc_sweep, run_lut_sweep
+
+# Functions a job can run, by kind
+JOB_KINDS = {
+    "dc_sweep": run_dc_sweep,
+    "lut_sweep": run_lut_sweep,
+}
+
+# Seconds without a heartbeat after which a claimed job is requeued
+DEFAULT_LEASE_TIMEOUT = 60.0
+
+# Runs of a job (including requeues after failures) before it is given up
+DEFAULT_MAX_ATTEMPTS = 3
+
+QUEUE_DIRS = ("pending", "claimed", "results", "failed")
+
+# Config keys that describe the worker host; jobs cannot override them
+HOST_KEYS = ("ngspice_path", "pdk_root", "libngspice_path", "cache_dir")
+
+
+def _write_json(path: Path, data: dict):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def save_result(path: Path, result) -> bool:
+    """
+    Writes a LutResult or a sweep DataFrame (with its attrs) as .npz,
+    atomically and only if `path` does not exist yet (hard link of a
+    complete temporary file). Returns False if there already was a result.
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp.npz")
+    try:
+        if isinstance(result, LutResult):
+            result.save_npz(str(tmp))
+        else:
+            arrays = {f"column.{name}": result[name].to_numpy() for name in result.columns}
+            # Markers such as attrs['relaxed'] travel with the columns
+            arrays["attrs"] = np.array(json.dumps(result.attrs, default=lambda v: v.item() if hasattr(v, "item") else str(v)))
+            with open(tmp, "wb") as f:
+                np.savez(f, **arrays)
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            return False
+        return True
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def load_result(path: Path):
+    """Reads a result written by save_result."""
+    with np.load(path) as f:
+        if "dims" not in f.files:
+            prefix = "column."
+            frame = pd.DataFrame({key[len(prefix):]: f[key] for key in f.files if key.startswith(prefix)})
+            if "attrs" in f.files:
+                frame.attrs.update(json.loads(str(f["attrs"])))
+            return frame
+    return LutResult.load_npz(str(path))
+
+
+class WorkQueue:
+    """A work queue in the directory `path` (created if needed)."""
+
+    def __init__(self, path: str, lease_timeout: float = None, max_attempts: int = None):
+        """
+        lease_timeout / max_attempts are stored in queue.json by the side that
+        passes them (the coordinator); workers read them from there.
+        """
+        self.path = Path(path)
+        for name in QUEUE_DIRS:
+            (self.path / name).mkdir(parents=True, exist_ok=True)
+        settings_file = self.path / "queue.json"
+        settings = {"lease_timeout": DEFAULT_LEASE_TIMEOUT, "max_attempts": DEFAULT_MAX_ATTEMPTS}
+        if settings_file.exists():
+            with open(settings_file) as f:
+                settings.update(json.load(f))
+        if lease_timeout is not None or max_attempts is not None or not settings_file.exists():
+            if lease_timeout is not None:
+                settings["lease_timeout"] = float(lease_timeout)
+            if max_attempts is not None:
+                settings["max_attempts"] = int(max_attempts)
+            _write_json(settings_file, settings)
+        self.lease_timeout = settings["lease_timeout"]
+        self.max_attempts = settings["max_attempts"]
+
+    def _file(self, state: str, job_id: str) -> Path:
+        return self.path / state / (f"{job_id}.npz" if state == "results" else f"{job_id}.json")
+
+    def _ids(self, state: str) -> list:
+        suffix = ".npz" if state == "results" else ".json"
+        return sorted(name[:-len(suffix)] for name in os.listdir(self.path / state)
+                      if name.endswith(suffix) and not name.startswith("."))
+
+    def submit(self, job_id: str, kind: str, kwargs: dict, sim_config: dict = None) -> bool:
+        """Queues a job unless it is already queued, running or done."""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind '{kind}', expected one of {list(JOB_KINDS)}.")
+        if any(self._file(state, job_id).exists() for state in ("pending", "claimed", "results")):
+            return False
+        # A new submission retries a job that failed before
+        self._file("failed", job_id).unlink(missing_ok=True)
+        _write_json(self._file("pending", job_id), {
+            "id": job_id, "kind": kind, "kwargs": kwargs, "sim_config": sim_config or {}, "attempts": 0,
+        })
+        return True
+
+    def claim(self, worker: str = "") -> dict | None:
+        """Takes the next pending job, or returns None if there is none."""
+        for job_id in self._ids("pending"):
+            claimed = self._file("claimed", job_id)
+            try:
+                # Atomic: exactly one worker wins the rename
+                os.rename(self._file("pending", job_id), claimed)
+            except FileNotFoundError:
+                continue
+            try:
+                os.utime(claimed)
+                with open(claimed) as f:
+                    job = json.load(f)
+            except FileNotFoundError:
+                # Lease already expired and the job went back to pending
+                continue
+            job["worker"] = worker
+            return job
+        return None
+
+    def renew(self, job_id: str) -> bool:
+        """Extends the lease of a claimed job; False if it was taken back."""
+        try:
+            os.utime(self._file("claimed", job_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def complete(self, job_id: str, result) -> bool:
+        """
+        Stores the result of a job. Returns False if there already is one
+        (a requeued job finished twice); the duplicate is dropped.
+        """
+        fresh = save_result(self._file("results", job_id), result)
+        for state in ("claimed", "pending"):
+            self._file(state, job_id).unlink(missing_ok=True)
+        return fresh
+
+    def fail(self, job_id: str, error: str):
+        """Puts a failed job back to pending, or into failed/ after max_attempts."""
+        try:
+            with open(self._file("claimed", job_id)) as f:
+                job = json.load(f)
+        except FileNotFoundError:
+            return
+        job["attempts"] = job.get("attempts", 0) + 1
+        job["error"] = error
+        state = "failed" if job["attempts"] >= self.max_attempts else "pending"
+        _write_json(self._file(state, job_id), job)
+        self._file("claimed", job_id).unlink(missing_ok=True)
+
+    def requeue_expired(self) -> list:
+        """
+        Moves claims without a heartbeat for lease_timeout back to pending,
+        counting an attempt; after max_attempts they go to failed/.
+        """
+        requeued = []
+        deadline = time.time() - self.lease_timeout
+        for job_id in self._ids("claimed"):
+            claimed = self._file("claimed", job_id)
+            try:
+                if claimed.stat().st_mtime >= deadline:
+                    continue
+                if self._file("results", job_id).exists():
+                    claimed.unlink()
+                    continue
+                # Take the claim away first (atomic, hidden from _ids): a late
+                # heartbeat then fails instead of renewing the requeued job
+                taken = claimed.with_name(f".{claimed.name}.{os.getpid()}.{threading.get_ident()}.expired")
+                os.rename(claimed, taken)
+            except FileNotFoundError:
+                continue
+            with open(taken) as f:
+                job = json.load(f)
+            job["attempts"] = job.get("attempts", 0) + 1
+            job["error"] = "lease expired (worker died or lost the queue)"
+            state = "failed" if job["attempts"] >= self.max_attempts else "pending"
+            _write_json(self._file(state, job_id), job)
+            taken.unlink()
+            if state == "pending":
+                requeued.append(job_id)
+        return requeued
+
+    def has_result(self, job_id: str) -> bool:
+        return self._file("results", job_id).exists()
+
+    def result(self, job_id: str):
+        return load_result(self._file("results", job_id))
+
+    def failure(self, job_id: str) -> dict | None:
+        try:
+            with open(self._file("failed", job_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def status(self) -> dict:
+        """Number of jobs per state."""
+        return {state: len(self._ids(state)) for state in QUEUE_DIRS}
+
+
+def run_jobs(queue: WorkQueue, jobs: dict, on_result=None, poll: float = 0.5, timeout: float = None) -> list:
+    """
+    Coordinator loop: submits `jobs` (job id -> {'kind', 'kwargs',
+    'sim_config'}), requeues expired leases and hands every result to
+    on_result(job_id, result) exactly once, until all jobs are done or
+    failed. Jobs with a result from an earlier run are not run again.
+
+    Returns:
+        The ids of the failed jobs (also those left over after `timeout` seconds).
+    """
+    for job_id, job in jobs.items():
+        queue.submit(job_id, job["kind"], job["kwargs"], job.get("sim_config"))
+
+    open_jobs = set(jobs)
+    failed = []
+    start = time.monotonic()
+    while open_jobs:
+        for job_id in sorted(open_jobs):
+            if queue.has_result(job_id):
+                open_jobs.discard(job_id)
+                if on_result is not None:
+                    on_result(job_id, queue.result(job_id))
+            elif queue.failure(job_id) is not None:
+                open_jobs.discard(job_id)
+                failed.append(job_id)
+                print(f"job {job_id} failed: {queue.failure(job_id).get('error')}")
+        if not open_jobs:
+            break
+        if timeout is not None and time.monotonic() - start > timeout:
+            failed += sorted(open_jobs)
+            break
+        for job_id in queue.requeue_expired():
+            print(f"job {job_id}: lease expired, requeued")
+        time.sleep(poll)
+    return failed
+
+
+def _heartbeat(queue: WorkQueue, job_id: str, stop: threading.Event):
+    while not stop.wait(queue.lease_timeout / 3):
+        if not queue.renew(job_id):
+            return
+
+
+def run_job(queue: WorkQueue, job: dict, process_config: dict) -> bool:
+    """Runs one claimed job, keeping its lease alive; returns True on success."""
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(queue, job["id"], stop), daemon=True)
+    heartbeat.start()
+    try:
+        overrides = {k: v for k, v in job.get("sim_config", {}).items() if k not in HOST_KEYS}
+        sim_config = dict(process_config, **overrides)
+        result = JOB_KINDS[job["kind"]](**job["kwargs"], sim_config=sim_config)
+        error = None if result is not None else "simulation failed"
+    except Exception as e:
+        result, error = None, f"{type(e).__name__}: {e}"
+    finally:
+        stop.set()
+        heartbeat.join()
+
+    if error is not None:
+        queue.fail(job["id"], error)
+        return False
+    queue.complete(job["id"], result)
+    return True
+
+
+def run_worker(
+    queue_dir: str,
+    process_config: dict,
+    jobs: int = 1,
+    poll: float = 1.0,
+    idle_exit: float = None,
+    max_jobs: int = None,
+    stop: threading.Event = None,
+) -> int:
+    """
+    Pulls and runs jobs, `jobs` at a time, until `stop` is set, `max_jobs`
+    have run, or the queue has been empty for `idle_exit` seconds.
+
+    Returns:
+        The number of jobs run.
+    """
+    queue = WorkQueue(queue_dir)
+    worker = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    stop = stop or threading.Event()
+    done = 0
+    lock = threading.Lock()
+
+    def loop():
+        nonlocal done
+        idle_since = time.monotonic()
+        while not stop.is_set():
+            with lock:
+                if max_jobs is not None and done >= max_jobs:
+                    return
+                job = queue.claim(worker)
+                if job is not None:
+                    done += 1
+            if job is None:
+                if idle_exit is not None and time.monotonic() - idle_since > idle_exit:
+                    return
+                stop.wait(poll)
+                continue
+            ok = run_job(queue, job, process_config)
+            print(f"[{worker}] job {job['id']} {'done' if ok else 'FAILED'}", flush=True)
+            idle_since = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="worker") as pool:
+        for future in [pool.submit(loop) for _ in range(jobs)]:
+            future.result()
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("queue", help="shared queue directory")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="parallel ngspice runs")
+    parser.add_argument("--config", help="process config JSON (default: config/global.json)")
+    parser.add_argument("--poll", type=float, default=1.0, help="seconds between queue scans when idle")
+    parser.add_argument("--idle-exit", type=float, default=None, help="exit after this many idle seconds")
+    args = parser.parse_args(argv)
+
+    if args.config:
+        with open(args.config) as f:
+            process_config = json.load(f)
+    else:
+        import config_utils
+        process_config, error = config_utils.load_process_config()
+        if process_config is None:
+            print(f"Error: {error}")
+            raise SystemExit(2)
+
+    try:
+        run_worker(args.queue, process_config, args.jobs, args.poll, args.idle_exit)
+    except KeyboardInterrupt:
+        # Claims of interrupted jobs expire and are requeued by the coordinator
+        raise SystemExit(130)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+import itertools
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+# Columns kept for plotting (the parse_ngspice_data layout)
+HISTORY_COLUMNS = ('vgs', 'id', 'gm', 'gds', 'cgg', 'gm_id', 'gm_gds', 'ft')
+
+# Default budgets
+DEFAULT_SESSION_MB = 16
+DEFAULT_GLOBAL_MB = 256
+
+
+def params_hash(params: dict) -> int:
+    """Hash of a parameter dict, independent of key order."""
+    return hash(tuple(sorted(params.items())))
+
+
+class HistoryRecord:
+    """
+    One stored result: the columns of a sweep as a single contiguous float32
+    block (one row per column) plus the parameters it was run with.
+
+    Indexing by column name returns a read-only view, so a record can be
+    passed to create_plots in place of a DataFrame.
+    """
+
+    __slots__ = ('key', 'params', 'block', '_index', '__weakref__')
+
+    def __init__(self, data, params: dict):
+        columns = [c for c in HISTORY_COLUMNS if c in data]
+        self.key = params_hash(params)
+        self.params = dict(params)
+        self.block = np.empty((len(columns), len(data[columns[0]]) if columns else 0), dtype=np.float32)
+        for row, column in enumerate(columns):
+            self.block[row] = np.asarray(data[column], dtype=np.float64)
+        self.block.flags.writeable = False
+        self._index = {column: row for row, column in enumerate(columns)}
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.block[self._index[column]]
+
+    def __contains__(self, column: str) -> bool:
+        return column in self._index
+
+    def __len__(self) -> int:
+        return self.block.shape[1]
+
+    @property
+    def columns(self) -> tuple:
+        return tuple(self._index)
+
+    @property
+    def empty(self) -> bool:
+        return self.block.size == 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.block.nbytes
+
+    def get(self, name: str, default=None):
+        """Dict-style access used by create_plots: 'data' is the record itself."""
+        if name == 'data':
+            return self
+        if name == 'params':
+            return self.params
+        return default
+
+
+class HistoryBudget:
+    """
+    Memory budget shared by several HistoryStores (e.g. all sessions of a
+    server process). When the total exceeds `max_bytes`, the least recently
+    added records are evicted regardless of the store they belong to.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_GLOBAL_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._lock = threading.RLock()
+        # (store id, record key) -> (weakref to store, nbytes), oldest first
+        self._ledger = OrderedDict()
+        self._bytes = 0
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def _charge(self, store, key: int, nbytes: int):
+        with self._lock:
+            self._release(store.id, key)
+            self._ledger[(store.id, key)] = (weakref.ref(store), nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes and len(self._ledger) > 1:
+                (store_id, old_key), (ref, _) = next(iter(self._ledger.items()))
+                self._release(store_id, old_key)
+                owner = ref()
+                if owner is not None:
+                    owner._drop(old_key)
+                self.evictions += 1
+
+    def _release(self, store_id: int, key: int):
+        with self._lock:
+            entry = self._ledger.pop((store_id, key), None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+    def _release_store(self, store_id: int):
+        with self._lock:
+            for ledger_key in [k for k in self._ledger if k[0] == store_id]:
+                self._release(*ledger_key)
+
+
+_global_budget = None
+_global_budget_lock = threading.Lock()
+
+
+def global_budget(max_bytes: int = None) -> HistoryBudget:
+    """Process-wide HistoryBudget; `max_bytes` updates its limit."""
+    global _global_budget
+    with _global_budget_lock:
+        if _global_budget is None:
+            _global_budget = HistoryBudget()
+        if max_bytes is not None:
+            _global_budget.max_bytes = max_bytes
+        return _global_budget
+
+
+class HistoryStore:
+    """
+    Bounded history of previous results for one session.
+
+    Results are deduplicated by their parameter hash (re-adding a parameter
+    set only moves it to the front) and evicted oldest first once the
+    session budget `max_bytes` or the shared `budget` is exceeded.
+    """
+
+    _ids = itertools.count()
+
+    def __init__(self, max_bytes: int = DEFAULT_SESSION_MB * 1024 * 1024, budget: HistoryBudget = None):
+        self.max_bytes = max_bytes
+        self.budget = budget
+        self.id = next(self._ids)
+        self._lock = threading.RLock()
+        self._records = OrderedDict()
+        self._bytes = 0
+        if budget is not None:
+            # Give the bytes back when the session goes away
+            weakref.finalize(self, budget._release_store, self.id)
+
+    @classmethod
+    def from_config(cls, sim_config: dict | None):
+        """Store sized by 'history_session_mb', sharing the process budget 'history_global_mb'."""
+        sim_config = sim_config or {}
+        budget = global_budget(int(sim_config.get("history_global_mb", DEFAULT_GLOBAL_MB) * 1024 * 1024))
+        return cls(int(sim_config.get("history_session_mb", DEFAULT_SESSION_MB) * 1024 * 1024), budget)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def add(self, data, params: dict) -> HistoryRecord:
+        """Stores a result (DataFrame or record); returns its record."""
+        key = params_hash(params)
+        evicted = []
+        with self._lock:
+            record = self._records.get(key)
+            if record is not None:
+                self._records.move_to_end(key)
+            else:
+                record = data if isinstance(data, HistoryRecord) else HistoryRecord(data, params)
+                self._records[key] = record
+                self._bytes += record.nbytes
+                while self._bytes > self.max_bytes and len(self._records) > 1:
+                    old_key = next(iter(self._records))
+                    self._drop(old_key)
+                    evicted.append(old_key)
+        # The budget is updated outside the store lock (it calls back into _drop)
+        if self.budget is not None:
+            for old_key in evicted:
+                self.budget._release(self.id, old_key)
+            self.budget._charge(self, key, record.nbytes)
+        return record
+
+    def _drop(self, key: int):
+        with self._lock:
+            record = self._records.pop(key, None)
+            if record is not None:
+                self._bytes -= record.nbytes
+
+    def records(self, depth: int = None, exclude: dict = None) -> list:
+        """The `depth` most recent records, oldest first, optionally skipping a parameter set."""
+        skip = params_hash(exclude) if exclude is not None else None
+        with self._lock:
+            records = [r for k, r in self._records.items() if k != skip]
+        if depth is not None:
+            records = records[-depth:] if depth > 0 else []
+        return records
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._records)
+            self._records.clear()
+            self._bytes = 0
+        if self.budget is not None:
+            for key in keys:
+                self.budget._release(self.id, key)
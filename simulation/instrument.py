@@ -0,0 +1,357 @@
+import contextvars
+import functools
+import inspect
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+# Prefix of the exported Prometheus metric names
+METRIC_PREFIX = "zchar"
+
+# Counters kept by the pipeline (others may be added with count())
+COUNTERS = ("runs", "failures", "cache_hits", "points")
+
+# Analysis time ngspice reports at the end of a batch run (one line per analysis)
+_SOLVE_TIME = re.compile(r"Total analysis time \(seconds\)\s*=\s*([0-9.eE+-]+)")
+
+# Operation the calling code is currently inside of (see Instrument.operation)
+_current = contextvars.ContextVar("instrument_event", default=None)
+
+
+def parse_solve_time(output: str):
+    """Total analysis time reported by ngspice in `output`, or None if absent."""
+    times = _SOLVE_TIME.findall(output or "")
+    return sum(float(t) for t in times) if times else None
+
+
+def rusage_peak_bytes(usage) -> int:
+    """ru_maxrss in bytes (Linux reports KiB, macOS bytes)."""
+    return usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+
+
+def process_peak_rss(pid: int) -> int:
+    """Peak RSS so far of a running process (Linux VmHWM) in bytes, 0 if unknown."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+class _NullContext:
+    """Shared no-op timer handed out while instrumentation is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullContext()
+
+
+class _Timer:
+    __slots__ = ('instrument', 'stage', 'start')
+
+    def __init__(self, instrument, stage: str):
+        self.instrument = instrument
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.instrument.add_time(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _Operation:
+    """One instrumented call: collects stage times and counts into an event."""
+
+    __slots__ = ('instrument', 'event', 'start', 'token')
+
+    def __init__(self, instrument, name: str, labels: dict):
+        self.instrument = instrument
+        self.event = {'op': name, **labels, 'stages': {}, 'counts': {}}
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.token = _current.set(self.event)
+        return self.event
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self.token)
+        self.event['stages']['total'] = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.event['ok'] = False
+            self.event['error'] = f"{exc_type.__name__}: {exc}"
+        self.event.setdefault('ok', True)
+        if not self.event['ok']:
+            self.instrument.count("failures")
+        self.instrument._finish(self.event)
+        return False
+
+
+class Instrument:
+    """
+    Timers, counters and gauges of the simulation pipeline.
+
+    Stage times and counts are aggregated process-wide and also attached to
+    the operation (run_dc_sweep, create_plots, ...) they happen in. Every
+    finished operation is handed to the sinks as an event dict. While
+    disabled, timer() returns a shared no-op context and the other calls
+    return immediately.
+    """
+
+    def __init__(self, sinks=(), enabled: bool = None):
+        self.sinks = list(sinks)
+        self.enabled = bool(self.sinks) if enabled is None else enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # stage -> [count, total seconds, max seconds]
+            self.timers = {}
+            self.counters = dict.fromkeys(COUNTERS, 0)
+            self.peak_rss = 0
+
+    def timer(self, stage: str):
+        """Context manager timing `stage`."""
+        if not self.enabled:
+            return _NULL
+        return _Timer(self, stage)
+
+    def operation(self, name: str, **labels):
+        """Context manager delimiting one event; yields the event dict."""
+        if not self.enabled:
+            return _NULL
+        return _Operation(self, name, labels)
+
+    def add_time(self, stage: str, seconds: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self.timers.setdefault(stage, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+        event = _current.get()
+        if event is not None:
+            event['stages'][stage] = event['stages'].get(stage, 0.0) + seconds
+
+    def count(self, name: str, n: int = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+        event = _current.get()
+        if event is not None:
+            event['counts'][name] = event['counts'].get(name, 0) + n
+
+    def record_rss(self, nbytes: int):
+        """Peak resident set size of an ngspice child."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.peak_rss = max(self.peak_rss, nbytes)
+        event = _current.get()
+        if event is not None:
+            event['peak_rss_bytes'] = max(event.get('peak_rss_bytes', 0), nbytes)
+
+    def fail(self, reason: str = None):
+        """Marks the current operation as failed."""
+        event = _current.get() if self.enabled else None
+        if event is not None:
+            event['ok'] = False
+            if reason:
+                event.setdefault('error', reason)
+
+    def _finish(self, event: dict):
+        event['ts'] = time.time()
+        for sink in self.sinks:
+            try:
+                sink.emit(event, self)
+            except Exception as e:
+                print(f"Metrics sink {type(sink).__name__} failed: {e}")
+
+    def snapshot(self) -> dict:
+        """Copy of the aggregates: {'timers': {stage: {count, total, max}}, 'counters', 'peak_rss_bytes'}."""
+        with self._lock:
+            return {
+                'timers': {
+                    stage: {'count': c, 'total': total, 'max': peak}
+                    for stage, (c, total, peak) in self.timers.items()
+                },
+                'counters': dict(self.counters),
+                'peak_rss_bytes': self.peak_rss,
+            }
+
+    def prometheus_text(self) -> str:
+        """The aggregates in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        p = METRIC_PREFIX
+        lines = [
+            f"# HELP {p}_stage_seconds Time spent in each pipeline stage.",
+            f"# TYPE {p}_stage_seconds summary",
+        ]
+        for stage, t in sorted(snap['timers'].items()):
+            lines.append(f'{p}_stage_seconds_sum{{stage="{stage}"}} {t["total"]:.9g}')
+            lines.append(f'{p}_stage_seconds_count{{stage="{stage}"}} {t["count"]}')
+        lines += [
+            f"# HELP {p}_stage_seconds_max Longest single occurrence of each stage.",
+            f"# TYPE {p}_stage_seconds_max gauge",
+        ]
+        for stage, t in sorted(snap['timers'].items()):
+            lines.append(f'{p}_stage_seconds_max{{stage="{stage}"}} {t["max"]:.9g}')
+        for name, value in sorted(snap['counters'].items()):
+            lines += [f"# TYPE {p}_{name}_total counter", f"{p}_{name}_total {value}"]
+        lines += [
+            f"# HELP {p}_ngspice_peak_rss_bytes Largest peak RSS of an ngspice child.",
+            f"# TYPE {p}_ngspice_peak_rss_bytes gauge",
+            f"{p}_ngspice_peak_rss_bytes {snap['peak_rss_bytes']}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class JsonLogSink:
+    """Appends every event as one JSON line to `path` ('-' for stderr)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def emit(self, event: dict, instrument: Instrument):
+        line = json.dumps(event, default=str) + "\n"
+        with self._lock:
+            if self.path == "-":
+                sys.stderr.write(line)
+            else:
+                with open(self.path, "a") as f:
+                    f.write(line)
+
+
+class PrometheusSink:
+    """
+    Rewrites a Prometheus text-format file (e.g. for the node_exporter
+    textfile collector) at most every `min_interval` seconds.
+    """
+
+    def __init__(self, path: str, min_interval: float = 1.0):
+        self.path = Path(path)
+        self.min_interval = min_interval
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def emit(self, event: dict, instrument: Instrument):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last < self.min_interval:
+                return
+            self._last = now
+        self.write(instrument)
+
+    def write(self, instrument: Instrument):
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.{threading.get_ident()}")
+        tmp.write_text(instrument.prometheus_text())
+        # Scrapers never see a partial file
+        os.replace(tmp, self.path)
+
+
+class MemorySink:
+    """Keeps the last `maxlen` events, e.g. for the app's diagnostics panel."""
+
+    def __init__(self, maxlen: int = 100):
+        self.events = deque(maxlen=maxlen)
+
+    def emit(self, event: dict, instrument: Instrument):
+        self.events.append(event)
+
+
+_instrument = Instrument()
+_configured = None
+_configure_lock = threading.Lock()
+
+
+def get_instrument() -> Instrument:
+    """The process-wide Instrument used by the pipeline."""
+    return _instrument
+
+
+def configure_instrument(sim_config: dict = None) -> Instrument:
+    """
+    Sets up the process-wide sinks from 'metrics_log' (JSON lines path),
+    'metrics_prometheus' (text-format file path) and 'diagnostics' (keep
+    events for the app panel). Instrumentation stays off if none is set.
+    Calling it again with the same settings keeps the current sinks.
+    """
+    global _configured
+    sim_config = sim_config or {}
+    settings = (
+        sim_config.get("metrics_log"),
+        sim_config.get("metrics_prometheus"),
+        bool(sim_config.get("diagnostics", False)),
+    )
+    with _configure_lock:
+        if settings != _configured:
+            log_path, prom_path, panel = settings
+            sinks = []
+            if log_path:
+                sinks.append(JsonLogSink(os.path.expanduser(log_path)))
+            if prom_path:
+                sinks.append(PrometheusSink(os.path.expanduser(prom_path)))
+            if panel:
+                sinks.append(MemorySink())
+            _instrument.sinks = sinks
+            _instrument.enabled = bool(sinks)
+            _configured = settings
+    return _instrument
+
+
+def memory_sink(instrument: Instrument = None):
+    """The MemorySink of `instrument` (default: the process-wide one), if any."""
+    instrument = instrument or _instrument
+    return next((s for s in instrument.sinks if isinstance(s, MemorySink)), None)
+
+
+def instrumented(name: str):
+    """
+    Decorator running the function as an Instrument operation named `name`.
+    A None result marks the operation failed. Disabled: one attribute check.
+    """
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _instrument.enabled:
+                    return await func(*args, **kwargs)
+                with _instrument.operation(name):
+                    result = await func(*args, **kwargs)
+                    if result is None:
+                        _instrument.fail()
+                    return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _instrument.enabled:
+                return func(*args, **kwargs)
+            with _instrument.operation(name):
+                result = func(*args, **kwargs)
+                if result is None:
+                    _instrument.fail()
+                return result
+        return wrapper
+    return decorate
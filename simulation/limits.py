@@ -0,0 +1,221 @@
+"""
+Time and memory limits, failure classification and retries for ngspice runs.
+
+Every ngspice child runs in its own session, so that a watchdog can kill it
+together with anything it spawned. Limits come from the config (unset or 0
+means unlimited):
+
+    sim_timeout     wall-clock seconds per run, enforced by the watchdog
+    sim_cpu_time    CPU seconds per run (RLIMIT_CPU)
+    sim_memory_mb   address space per run in MiB (RLIMIT_AS)
+    sim_retries     reruns of a transient failure (timeout, nonconvergence)
+                    with relaxed convergence options, default 1
+
+A failed run raises SimulationError, whose `kind` tells what went wrong.
+Results of a relaxed retry are marked ('relaxed' in the DataFrame attrs or
+LutResult params) and kept out of the result cache.
+"""
+import math
+import os
+import re
+import signal
+import threading
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, only the wall-clock watchdog
+    resource = None
+
+FAILURE_KINDS = ("timeout", "nonconvergence", "oom", "missing_output", "error")
+
+# Kinds worth another attempt with relaxed options
+TRANSIENT_KINDS = ("timeout", "nonconvergence")
+
+DEFAULT_RETRIES = 1
+
+# Convergence aids of the 1st, 2nd, ... retry. gmin is left alone: it
+# shunts every junction and would bias gds in weak inversion.
+RELAXED_OPTIONS = (
+    ".options itl1=500 itl2=200 gminsteps=50 srcsteps=50",
+    ".options itl1=1000 itl2=500 gminsteps=100 srcsteps=100 reltol=3e-3 vntol=1e-5",
+)
+
+NONCONVERGENCE_PATTERN = re.compile(
+    r"timestep too small|gmin stepping failed|source stepping failed|iteration limit"
+    r"|singular matrix|no convergence|simulation\(s\) aborted",
+    re.IGNORECASE
+)
+OOM_PATTERN = re.compile(
+    r"can't allocate|cannot allocate|out of memory|bad_alloc|failed to map segment",
+    re.IGNORECASE
+)
+
+FAILURE_MESSAGES = {
+    "timeout": "ngspice was stopped by the time limit",
+    "nonconvergence": "ngspice did not converge",
+    "oom": "ngspice ran out of memory",
+    "missing_output": "ngspice produced no output",
+    "error": "ngspice failed",
+}
+
+
+class SimulationError(RuntimeError):
+    """A failed ngspice run; `kind` is one of FAILURE_KINDS."""
+
+    def __init__(self, kind: str, message: str = None, stdout: str = "", stderr: str = "",
+                 returncode: int = None, attempts: int = 1):
+        super().__init__(f"{kind}: {message or FAILURE_MESSAGES[kind]}")
+        self.kind = kind
+        self.message = message
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode = returncode
+        self.attempts = attempts
+
+    def __reduce__(self):
+        # Keeps the kind across process pools
+        return type(self), (self.kind, self.message, self.stdout, self.stderr, self.returncode, self.attempts)
+
+    @classmethod
+    def from_run(cls, returncode: int, stdout: str, stderr: str, timed_out: bool = False, limits=None):
+        """Classifies a run that failed or left no output."""
+        kind = failure_kind(returncode, f"{stdout}\n{stderr}", timed_out, limits)
+        message = FAILURE_MESSAGES[kind]
+        if returncode:
+            message += f" (exit code {returncode})"
+        return cls(kind, message, stdout, stderr, returncode)
+
+
+def failure_kind(returncode: int, output: str, timed_out: bool = False, limits=None) -> str:
+    """Failure kind of a run from its exit code and ngspice output."""
+    if timed_out or returncode == -getattr(signal, "SIGXCPU", -1):
+        return "timeout"
+    if OOM_PATTERN.search(output):
+        return "oom"
+    if returncode == -getattr(signal, "SIGKILL", -1):
+        # The hard CPU limit, otherwise the kernel OOM killer
+        return "timeout" if limits is not None and limits.cpu_time else "oom"
+    if NONCONVERGENCE_PATTERN.search(output):
+        return "nonconvergence"
+    return "error" if returncode else "missing_output"
+
+
+def relax_netlist(netlist: str, attempt: int) -> str:
+    """The netlist with the RELAXED_OPTIONS of retry `attempt` (1, 2, ...) before its .control block."""
+    options = RELAXED_OPTIONS[min(attempt, len(RELAXED_OPTIONS)) - 1]
+    match = re.search(r"^[ \t]*\.(control|end)\b", netlist, re.MULTILINE | re.IGNORECASE)
+    if match is None:
+        return f"{netlist}\n{options}\n"
+    return f"{netlist[:match.start()]}{options}\n{netlist[match.start():]}"
+
+
+class Limits:
+    """Per-run limits of ngspice children, see resolve_limits."""
+
+    def __init__(self, timeout: float = None, cpu_time: float = None, memory_mb: float = None,
+                 retries: int = DEFAULT_RETRIES):
+        self.timeout = timeout or None
+        self.cpu_time = cpu_time or None
+        self.memory_mb = memory_mb or None
+        self.retries = retries
+
+    def rlimits(self) -> list:
+        """(resource, soft, hard) triples to set on the child."""
+        if resource is None:
+            return []
+        limits = []
+        if self.cpu_time:
+            # SIGXCPU at the soft limit, SIGKILL a second later
+            soft = math.ceil(self.cpu_time)
+            limits.append((resource.RLIMIT_CPU, soft, soft + 1))
+        if self.memory_mb and hasattr(resource, "RLIMIT_AS"):
+            size = int(self.memory_mb * 2 ** 20)
+            limits.append((resource.RLIMIT_AS, size, size))
+        return limits
+
+    def preexec_fn(self):
+        """
+        Function setting the rlimits in the forked child, for platforms
+        without prlimit (apply() covers the others without running Python
+        code between fork and exec).
+        """
+        rlimits = self.rlimits()
+        if not rlimits or hasattr(resource, "prlimit"):
+            return None
+
+        def set_limits():
+            for name, soft, hard in rlimits:
+                resource.setrlimit(name, (soft, hard))
+        return set_limits
+
+    def apply(self, pid: int):
+        """Sets the rlimits on a started child (Linux prlimit)."""
+        if resource is None or not hasattr(resource, "prlimit"):
+            return
+        for name, soft, hard in self.rlimits():
+            try:
+                current = resource.prlimit(pid, name)[1]
+                if current != resource.RLIM_INFINITY:
+                    soft, hard = min(soft, current), min(hard, current)
+                resource.prlimit(pid, name, (soft, hard))
+            except ProcessLookupError:
+                # Already finished
+                return
+
+
+def resolve_limits(sim_config: dict = None) -> Limits:
+    """Limits from 'sim_timeout', 'sim_cpu_time', 'sim_memory_mb' and 'sim_retries' in the config."""
+    sim_config = sim_config or {}
+    values = {key: sim_config.get(key) for key in ("sim_timeout", "sim_cpu_time", "sim_memory_mb")}
+    for key, value in values.items():
+        if value is not None and float(value) < 0:
+            raise ValueError(f"'{key}' must not be negative, got {value}.")
+    retries = int(sim_config.get("sim_retries", DEFAULT_RETRIES))
+    if retries < 0:
+        raise ValueError(f"'sim_retries' must not be negative, got {retries}.")
+    return Limits(
+        timeout=float(values["sim_timeout"] or 0),
+        cpu_time=float(values["sim_cpu_time"] or 0),
+        memory_mb=float(values["sim_memory_mb"] or 0),
+        retries=retries,
+    )
+
+
+def kill_process_group(proc):
+    """Kills ngspice and anything it spawned (it runs in its own session)."""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except ProcessLookupError:
+        pass
+
+
+class Watchdog:
+    """
+    Kills the process group of `proc` once `timeout` seconds have passed,
+    unless it is left (as a context manager) before. `fired` tells whether
+    it did. A timeout of None watches nothing.
+    """
+
+    def __init__(self, proc, timeout: float = None):
+        self.proc = proc
+        self.fired = False
+        self._timer = None
+        if timeout:
+            self._timer = threading.Timer(timeout, self._fire)
+            self._timer.daemon = True
+
+    def _fire(self):
+        self.fired = True
+        kill_process_group(self.proc)
+
+    def __enter__(self):
+        if self._timer is not None:
+            self._timer.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._timer is not None:
+            self._timer.cancel()
@@ -0,0 +1,122 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Grid axes, outermost first. This is also the ngspice loop nesting order.
+LUT_AXES = ('length', 'vds', 'vbs', 'vgs')
+
+# Per-point quantities produced by parse_ngspice_data
+LUT_METRICS = ('id', 'gm', 'gds', 'cgg', 'gm_id', 'gm_gds', 'ft')
+
+
+class LutResult:
+    """
+    Dense N-dimensional gm/Id characterization result.
+
+    Attributes:
+        axes: Ordered dict of axis name -> 1D coordinate array.
+        data: Dict of metric name -> ndarray shaped like the axes.
+        params: The non-swept inputs (device, width, ng, m, ...).
+    """
+
+    def __init__(self, axes: dict, data: dict, params: dict | None = None):
+        self.axes = {}
+        for name, values in axes.items():
+            values = np.asarray(values)
+            # Numeric coordinates as float64; labels (e.g. corners) stay strings
+            self.axes[name] = values.astype(np.float64) if values.dtype.kind in "biuf" else values
+        self.data = data
+        self.params = params or {}
+
+        for name, values in self.data.items():
+            if values.shape != self.shape:
+                raise ValueError(f"Metric '{name}' has shape {values.shape}, expected {self.shape}.")
+
+    @property
+    def dims(self) -> tuple:
+        return tuple(self.axes.keys())
+
+    @property
+    def shape(self) -> tuple:
+        return tuple(len(v) for v in self.axes.values())
+
+    def __getitem__(self, metric: str) -> np.ndarray:
+        return self.data[metric]
+
+    def __repr__(self):
+        axes = ", ".join(f"{k}={len(v)}" for k, v in self.axes.items())
+        return f"LutResult({axes}; metrics={list(self.data)})"
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, axes: dict, params: dict | None = None):
+        """
+        Reshapes the flat output of parse_ngspice_data into a dense grid.
+
+        `axes` holds the coordinates of every axis except the innermost
+        'vgs' one, which is recovered from the first sweep block.
+        Rows must be in C order (last axis fastest).
+        """
+        outer_shape = tuple(len(v) for v in axes.values())
+        n_outer = int(np.prod(outer_shape))
+        if n_outer == 0 or len(frame) % n_outer != 0:
+            raise ValueError(
+                f"Cannot reshape {len(frame)} rows into grid {outer_shape} x vgs."
+            )
+        n_vgs = len(frame) // n_outer
+        shape = outer_shape + (n_vgs,)
+
+        full_axes = dict(axes)
+        full_axes['vgs'] = frame['vgs'].to_numpy()[:n_vgs]
+
+        data = {
+            metric: frame[metric].to_numpy().reshape(shape)
+            for metric in LUT_METRICS if metric in frame.columns
+        }
+        return cls(full_axes, data, params)
+
+    def curve(self, **index) -> pd.DataFrame:
+        """
+        Returns one VGS sweep as a DataFrame in the parse_ngspice_data layout.
+
+        Args:
+            **index: Integer index for every non-vgs axis, e.g. length=0, vds=2, vbs=0.
+        """
+        key = tuple(index.get(name, 0) for name in self.dims[:-1])
+        frame = pd.DataFrame({'vgs': self.axes['vgs']})
+        for metric, values in self.data.items():
+            frame[metric] = values[key]
+        return frame
+
+    def save_npz(self, path: str):
+        """
+        Writes the result to an .npz file (axes, metrics and params as JSON).
+        The file is written under a temporary name and renamed into place, so
+        `path` either holds a complete result or does not exist.
+        """
+        arrays = {f"axis.{name}": values for name, values in self.axes.items()}
+        arrays.update({f"data.{name}": values for name, values in self.data.items()})
+        arrays['params'] = np.array(json.dumps(self.params))
+        arrays['dims'] = np.array(self.dims)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load_npz(cls, path: str):
+        """Reads a result written by save_npz."""
+        with np.load(path) as f:
+            axes = {name: f[f"axis.{name}"] for name in f['dims']}
+            data = {key[len("data."):]: f[key] for key in f.files if key.startswith("data.")}
+            params = json.loads(str(f['params']))
+        return cls(axes, data, params)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Flattens the grid to a long DataFrame with one column per axis."""
+        grids = np.meshgrid(*self.axes.values(), indexing='ij')
+        frame = pd.DataFrame({name: g.ravel() for name, g in zip(self.dims, grids)})
+        for metric, values in self.data.items():
+            frame[metric] = values.ravel()
+        return frame
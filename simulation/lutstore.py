@@ -0,0 +1,351 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .lut import LUT_METRICS, LutResult
+
+# Identifies the directory layout in meta.json
+STORE_FORMAT = "zchar-lut"
+STORE_VERSION = 1
+
+META_FILENAME = "meta.json"
+
+# Tolerance of write_lut when comparing simulated with declared coordinates
+# (ASCII output keeps about 7 significant digits)
+AXIS_RTOL = 1e-6
+AXIS_ATOL = 1e-9
+
+
+def _chunk_name(index: int) -> str:
+    return f"chunk-{index:05d}.npy"
+
+
+def _chunk_meta_name(index: int) -> str:
+    return f"chunk-{index:05d}.json"
+
+
+def _save_npy(path: Path, values: np.ndarray):
+    """np.save under a temporary name, renamed into place."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, np.ascontiguousarray(values))
+    os.replace(tmp, path)
+
+
+def _write_meta(path: Path, meta: dict, name: str = META_FILENAME):
+    tmp = path / f".{name}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=2, default=lambda v: v.item() if hasattr(v, "item") else str(v))
+    os.replace(tmp, path / name)
+
+
+def _axis_json(values: np.ndarray) -> list:
+    return [v.item() if hasattr(v, "item") else v for v in values]
+
+
+class LutWriter:
+    """
+    Writes a LUT store chunk by chunk along its first axis.
+
+    Layout of the store directory:
+        meta.json                     dims, axes, metrics, chunk bounds, metadata
+        <metric>/chunk-00000.npy      one array per metric and chunk, shaped
+                                      (chunk length, *other axes)
+        chunk-00000.json              per-chunk metadata, written last
+
+    The axes are declared up front; chunks may be written in any order (and
+    by different runs, see has_chunk). meta.json is written by finish(),
+    so a store without it is incomplete.
+    """
+
+    def __init__(self, path: str, axes: dict, chunks: list, metrics=LUT_METRICS, meta: dict = None):
+        """
+        Args:
+            axes: Ordered axis name -> coordinates, outermost (chunked) first.
+            chunks: (start, stop) ranges of the first axis, one per chunk.
+            metrics: Metric names stored per chunk.
+            meta: Extra metadata (device, PDK, netlist hash, params, ...).
+        """
+        self.path = Path(path)
+        self.axes = {name: np.asarray(values) for name, values in axes.items()}
+        self.chunks = [tuple(c) for c in chunks]
+        self.metrics = tuple(metrics)
+        self.meta = dict(meta or {})
+        for metric in self.metrics:
+            (self.path / metric).mkdir(parents=True, exist_ok=True)
+
+    @property
+    def dims(self) -> tuple:
+        return tuple(self.axes)
+
+    def _chunk_shape(self, index: int) -> tuple:
+        start, stop = self.chunks[index]
+        return (stop - start,) + tuple(len(v) for v in list(self.axes.values())[1:])
+
+    def has_chunk(self, index: int) -> bool:
+        """True if chunk `index` has been written completely."""
+        return (self.path / _chunk_meta_name(index)).exists()
+
+    def write_chunk(self, index: int, data: dict, meta: dict = None):
+        """Stores metric name -> array (shaped like the chunk) as chunk `index`."""
+        shape = self._chunk_shape(index)
+        for metric in self.metrics:
+            values = np.asarray(data[metric])
+            if values.shape != shape:
+                raise ValueError(f"Chunk {index} of '{metric}' has shape {values.shape}, expected {shape}.")
+            _save_npy(self.path / metric / _chunk_name(index), values)
+        # Marks the chunk complete
+        _write_meta(self.path, meta or {}, _chunk_meta_name(index))
+
+    def write_lut(self, index: int, lut: LutResult):
+        """
+        Stores a LutResult covering chunk `index` (its first axis is the
+        chunk's range). Its coordinates, e.g. the Vgs values ngspice actually
+        swept, must match the axes of the store in magnitude (PMOS sweeps
+        come out negative); otherwise ValueError.
+        """
+        start, stop = self.chunks[index]
+        for position, (name, expected) in enumerate(self.axes.items()):
+            if position == 0:
+                expected = expected[start:stop]
+            actual = np.asarray(lut.axes.get(name, []), dtype=np.float64)
+            if actual.shape != expected.shape or not np.allclose(
+                    np.abs(actual), np.abs(expected), rtol=AXIS_RTOL, atol=AXIS_ATOL):
+                raise ValueError(f"Chunk {index} has {name} = {actual.tolist()}, expected {expected.tolist()}.")
+        self.write_chunk(index, lut.data, lut.params)
+
+    def missing(self) -> list:
+        return [i for i in range(len(self.chunks)) if not self.has_chunk(i)]
+
+    def finish(self) -> "LutStore":
+        """Writes meta.json once all chunks are present and opens the store."""
+        missing = self.missing()
+        if missing:
+            raise ValueError(f"Chunks {missing} of {self.path} have not been written.")
+        dtype = np.load(self.path / self.metrics[0] / _chunk_name(0), mmap_mode="r").dtype
+        chunk_meta = []
+        for index in range(len(self.chunks)):
+            with open(self.path / _chunk_meta_name(index)) as f:
+                chunk_meta.append(json.load(f))
+        _write_meta(self.path, {
+            "format": STORE_FORMAT,
+            "version": STORE_VERSION,
+            "dims": list(self.dims),
+            "axes": {name: _axis_json(values) for name, values in self.axes.items()},
+            "metrics": list(self.metrics),
+            "chunks": [list(c) for c in self.chunks],
+            "dtype": dtype.str,
+            "chunk_meta": chunk_meta,
+            **self.meta,
+        })
+        return LutStore(self.path)
+
+
+def split_chunks(length: int, chunk_size: int) -> list:
+    """(start, stop) ranges covering range(length) in steps of `chunk_size`."""
+    return [(start, min(start + chunk_size, length)) for start in range(0, length, chunk_size)]
+
+
+def write_lut(path: str, lut: LutResult, chunk_size: int = 1, meta: dict = None) -> "LutStore":
+    """
+    Writes a LutResult as a store chunked along its first axis. Its params
+    are kept in the metadata; widths and lengths are taken to be in meters
+    (as from run_lut_sweep) unless meta sets 'geometry_unit' to 'um'.
+    """
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    first = lut.dims[0]
+    chunks = split_chunks(len(lut.axes[first]), chunk_size)
+    meta = {"params": lut.params, "geometry_unit": "m", **(meta or {})}
+    writer = LutWriter(path, lut.axes, chunks, metrics=tuple(lut.data), meta=meta)
+    for index, (start, stop) in enumerate(chunks):
+        writer.write_chunk(index, {metric: values[start:stop] for metric, values in lut.data.items()})
+    return writer.finish()
+
+
+def write_frame(path: str, frame: pd.DataFrame, params: dict = None, meta: dict = None) -> "LutStore":
+    """
+    Writes a single sweep (parse_ngspice_data / run_dc_sweep output) as a
+    store with the one axis 'vgs'. `params` are the sweep inputs, e.g. the
+    app's parameter dict, and come back with LutStore.plot_result.
+    """
+    data = {metric: frame[metric].to_numpy() for metric in LUT_METRICS if metric in frame.columns}
+    lut = LutResult({'vgs': frame['vgs'].to_numpy()}, data, params)
+    return write_lut(path, lut, chunk_size=max(len(frame), 1), meta={"geometry_unit": "um", **(meta or {})})
+
+
+class ChunkedArray:
+    """
+    Read-only view of one metric across the chunk files of a store.
+
+    Indexing reads only the chunks that the first index touches, through
+    memory maps, and returns an ndarray; nothing is loaded before that.
+    """
+
+    def __init__(self, store: "LutStore", metric: str):
+        self.store = store
+        self.metric = metric
+        self.shape = store.shape
+        self.dtype = np.dtype(store.meta.get("dtype", "<f8"))
+        self._bounds = np.array([stop for _, stop in store.chunks])
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __array__(self, dtype=None, copy=None):
+        values = self[...]
+        return values if dtype is None else values.astype(dtype)
+
+    def _chunk(self, index: int) -> np.ndarray:
+        return self.store._mmap(self.metric, index)
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        if any(k is Ellipsis for k in key):
+            i = next(i for i, k in enumerate(key) if k is Ellipsis)
+            key = key[:i] + (slice(None),) * (self.ndim - len(key) + 1) + key[i + 1:]
+        first, rest = (key[0], key[1:]) if key else (slice(None), ())
+
+        if isinstance(first, (int, np.integer)):
+            position = int(first) + (self.shape[0] if first < 0 else 0)
+            if not 0 <= position < self.shape[0]:
+                raise IndexError(f"index {first} is out of bounds for axis 0 with size {self.shape[0]}")
+            chunk = int(np.searchsorted(self._bounds, position, side="right"))
+            start = self.store.chunks[chunk][0]
+            return np.array(self._chunk(chunk)[(position - start,) + rest])
+
+        positions = np.arange(self.shape[0])[first]
+        if len(positions) == 0:
+            return np.empty((0,) + np.empty(self.shape[1:])[rest].shape, dtype=self.dtype)
+        chunk_of = np.searchsorted(self._bounds, positions, side="right")
+        parts, picked = [], []
+        for chunk in np.unique(chunk_of):
+            start, stop = self.store.chunks[chunk]
+            members = np.flatnonzero(chunk_of == chunk)
+            local = positions[members] - start
+            if len(local) == stop - start and np.all(np.diff(local) == 1):
+                local = slice(None)
+            parts.append(self._chunk(chunk)[(local,) + rest])
+            picked.append(members)
+        values = np.concatenate(parts) if len(parts) > 1 else np.array(parts[0])
+        # Parts come back grouped by chunk; restore the requested order
+        picked = np.concatenate(picked)
+        return values if np.all(np.diff(picked) > 0) else values[np.argsort(picked)]
+
+
+class LutStore:
+    """
+    Read access to a LUT store written by LutWriter / write_lut.
+
+    Metric arrays are ChunkedArrays over memory-mapped chunk files, so only
+    the selected slices are read, e.g. store.select(length=3) for all VGS
+    curves of one length.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        with open(self.path / META_FILENAME) as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != STORE_FORMAT:
+            raise ValueError(f"{self.path} is not a {STORE_FORMAT} store.")
+        if self.meta.get("version", 0) > STORE_VERSION:
+            raise ValueError(f"{self.path} has store version {self.meta['version']}, newer than {STORE_VERSION}.")
+        self.axes = {name: np.asarray(self.meta["axes"][name]) for name in self.meta["dims"]}
+        self.chunks = [tuple(c) for c in self.meta["chunks"]]
+        self.metrics = tuple(self.meta["metrics"])
+        self._maps = {}
+
+    @property
+    def dims(self) -> tuple:
+        return tuple(self.axes)
+
+    @property
+    def shape(self) -> tuple:
+        return tuple(len(v) for v in self.axes.values())
+
+    @property
+    def params(self) -> dict:
+        return self.meta.get("params", {})
+
+    def __repr__(self):
+        axes = ", ".join(f"{k}={len(v)}" for k, v in self.axes.items())
+        return f"LutStore({self.path}; {axes}; metrics={list(self.metrics)})"
+
+    def _mmap(self, metric: str, index: int) -> np.ndarray:
+        key = (metric, index)
+        if key not in self._maps:
+            self._maps[key] = np.load(self.path / metric / _chunk_name(index), mmap_mode="r")
+        return self._maps[key]
+
+    def __getitem__(self, metric: str) -> ChunkedArray:
+        if metric not in self.metrics:
+            raise KeyError(metric)
+        return ChunkedArray(self, metric)
+
+    def _key(self, index: dict) -> tuple:
+        unknown = set(index) - set(self.dims)
+        if unknown:
+            raise KeyError(f"Unknown axes {sorted(unknown)}, expected some of {list(self.dims)}.")
+        return tuple(index.get(name, slice(None)) for name in self.dims)
+
+    def select(self, metrics=None, **index) -> LutResult:
+        """
+        Materializes a slice as a LutResult. Axes indexed with an integer are
+        dropped, slices / index lists are kept, e.g. select(length=0, vds=[1, 2]).
+        """
+        key = self._key(index)
+        axes = {
+            name: values[k] for (name, values), k in zip(self.axes.items(), key)
+            if not isinstance(k, (int, np.integer))
+        }
+        metrics = self.metrics if metrics is None else metrics
+        data = {metric: self[metric][key] for metric in metrics}
+        params = dict(self.params)
+        for (name, values), k in zip(self.axes.items(), key):
+            if isinstance(k, (int, np.integer)):
+                params[name] = values[k].item()
+        return LutResult(axes, data, params)
+
+    def curve(self, **index) -> pd.DataFrame:
+        """One VGS sweep in the parse_ngspice_data layout; every other axis needs an integer index."""
+        missing = [name for name in self.dims[:-1] if not isinstance(index.get(name), (int, np.integer))]
+        if missing:
+            raise ValueError(f"curve() needs an integer index for {missing}.")
+        selection = self.select(**index)
+        frame = pd.DataFrame({'vgs': selection.axes['vgs']})
+        for metric, values in selection.data.items():
+            frame[metric] = values
+        return frame
+
+    def plot_result(self, **index) -> dict:
+        """
+        A curve as create_plots expects it: {'data': DataFrame, 'params': dict}
+        with width / length in um for the Id/(W/L) normalization.
+        """
+        frame = self.curve(**index)
+        params = dict(self.params)
+        for name, k in index.items():
+            params[name] = self.axes[name][k].item()
+        if self.meta.get("geometry_unit", "m") == "m":
+            # create_plots takes the app's micrometers
+            for name in ('width', 'length'):
+                if name in params:
+                    params[name] = params[name] * 1e6
+        return {'data': frame, 'params': params}
+
+    def to_lut_result(self) -> LutResult:
+        """Loads the whole store into memory."""
+        return self.select()
+
+
+def open_lut(path: str) -> LutStore:
+    return LutStore(path)
@@ -1,72 +1,223 @@
+import io
+import mmap
+
 import pandas as pd
 import numpy as np
 
-def parse_ngspice_data(file_path: str, device_name: str) -> pd.DataFrame:
+from .instrument import get_instrument
+
+# Magnitudes below this are treated as zero when dividing
+DIVISION_EPS = 1e-18
+
+# Floor applied to |Id| so log plots and gm/Id stay finite
+ID_FLOOR = 1e-15
+
+# wrdata column positions of the model vectors
+ID_COL = 1
+GM_COL = 3
+GDS_COL = 5
+CGG_COL = 7
+RAW_COLUMNS = [0, ID_COL, GM_COL, GDS_COL, CGG_COL]
+
+
+def masked_divide(num: np.ndarray, den: np.ndarray, eps: float = DIVISION_EPS) -> np.ndarray:
+    """
+    Element-wise num / den, yielding 0 wherever |den| <= eps (or den is NaN).
+    """
+    num = np.asarray(num, dtype=np.float64)
+    den = np.asarray(den, dtype=np.float64)
+    out = np.zeros(np.broadcast(num, den).shape, dtype=np.float64)
+    np.divide(num, den, out=out, where=np.abs(den) > eps)
+    return out
+
+
+def transit_frequency(gm: np.ndarray, cgg: np.ndarray) -> np.ndarray:
+    """
+    ft = gm / (2 pi |Cgg|), 0 where |Cgg| <= DIVISION_EPS (the mask is on
+    Cgg itself, not on 2 pi |Cgg|).
+    """
+    return masked_divide(gm, np.abs(np.asarray(cgg, dtype=np.float64))) / (2 * np.pi)
+
+
+def derive_metrics(vgs, ids, gm, gds, cgg) -> pd.DataFrame:
+    """
+    Builds the standard gm/Id result frame from raw model vectors.
+    All inputs are array-likes of equal length; work is fully vectorized.
+    """
+    vgs = np.asarray(vgs, dtype=np.float64)
+    gm = np.asarray(gm, dtype=np.float64)
+    gds = np.asarray(gds, dtype=np.float64)
+    cgg = np.asarray(cgg, dtype=np.float64)
+
+    # Model 'ids' parameter is always positive magnitude of channel current
+    # np.maximum keeps NaN, same as the builtin max(x, floor) did per row
+    id_abs = np.maximum(np.abs(np.asarray(ids, dtype=np.float64)), ID_FLOOR)
+
+    return pd.DataFrame({
+        'vgs': vgs,
+        'id': id_abs,
+        'gm': gm,
+        'gds': gds,
+        'cgg': cgg,
+        # Calculate gm/Id
+        'gm_id': masked_divide(gm, id_abs),
+        # Intrinsic Gain: gm/gds
+        'gm_gds': masked_divide(gm, gds),
+        # Transit Frequency ft ~ gm / (2 pi Cgg), Cgg is total gate capacitance
+        'ft': transit_frequency(gm, cgg),
+    })
+
+
+def parse_ngspice_data(file_path, device_name: str) -> pd.DataFrame:
     """
     Parses the whitespace-separated output file from ngspice.
+    `file_path` may also be the file contents as bytes (pipe I/O mode).
     Returns a pandas DataFrame.
     """
+    if isinstance(file_path, (bytes, bytearray, memoryview)):
+        if len(file_path) == 0:
+            return pd.DataFrame()
+        file_path = io.BytesIO(file_path)
     try:
-        # ngspice wrdata format:
-        # col1 col2 col3 col4 ...
-        # We need to skip header if present (wrdata usually doesn't have a header line unless specified?)
-        # wrdata output example:
+        # ngspice wrdata format (no header line):
         # 0.000000e+00 6.542201e-09 0.000000e+00 1.797203e-03 ...
-        
-        # We might need to handle column names if 'wrdata' puts them there?
-        # Usually wrdata is just numbers.
-        
-        df_raw = pd.read_csv(file_path, sep=r'\s+', header=None)
+        # Only the first X column is needed, skip converting the duplicates
+        df_raw = pd.read_csv(file_path, sep=r'\s+', header=None, usecols=RAW_COLUMNS)
     except Exception as e:
         print(f"Error parsing csv: {e}")
         return pd.DataFrame() # Return empty on error
-        
+
     if df_raw.empty:
         return pd.DataFrame()
 
-    # We take col 0 as Vgs (or Vsg for PMOS potentially, though our sweep is Vgs)
-    
-    # Map raw columns to meaningful names
-    # New format: ids gm gds cgg
-    # wrdata produces X Y pairs
+    # wrdata produces X Y pairs for vectors: ids gm gds cgg
     # Col 0: Vgs
     # Col 1: ids
     # Col 2: Vgs
     # Col 3: gm
     # ...
-    
-    id_col = 1
-    gm_col = 3
-    gds_col = 5
-    cgg_col = 7
-    
-    data = pd.DataFrame()
-    data['vgs'] = df_raw.iloc[:, 0]
-    
-    # Process Id
-    # Model 'ids' parameter is always positive magnitude of channel current
-    data['id'] = df_raw.iloc[:, id_col].abs()
-    data['id'] = data['id'].apply(lambda x: max(x, 1e-15)) 
-
-    # Process gm (directly from model)
-    data['gm'] = df_raw.iloc[:, gm_col]
-    
-    # Process gds (directly from model)
-    data['gds'] = df_raw.iloc[:, gds_col]
-    
-    # Process cgg (directly from model)
-    data['cgg'] = df_raw.iloc[:, cgg_col]
-    
-    
-    # Calculate gm/Id
-    data['gm_id'] = data.apply(lambda row: row['gm'] / row['id'] if abs(row['id']) > 1e-18 else 0, axis=1)
-    
-    # Intrinsic Gain: gm/gds
-    data['gm_gds'] = data.apply(lambda row: row['gm'] / row['gds'] if abs(row['gds']) > 1e-18 else 0, axis=1)
-    
-    # Transit Frequency ft ~ gm / (2 pi Cgg)
-    # Cgg is total gate capacitance. cgg output is typically capacitance (positive or negative depending on spice?)
-    # Usually cgg is positive total gate cap.
-    data['ft'] = data.apply(lambda row: row['gm'] / (2 * np.pi * abs(row['cgg'])) if abs(row['cgg']) > 1e-18 else 0, axis=1)
-    
-    return data
+    return derive_metrics(
+        vgs=df_raw[0].to_numpy(),
+        ids=df_raw[ID_COL].to_numpy(),
+        gm=df_raw[GM_COL].to_numpy(),
+        gds=df_raw[GDS_COL].to_numpy(),
+        cgg=df_raw[CGG_COL].to_numpy(),
+    )
+
+
+# Model vectors by their ngspice parameter name, in derive_metrics order
+RAW_VECTORS = ('ids', 'gm', 'gds', 'cgg')
+
+
+def read_ngspice_raw(file_path) -> list:
+    """
+    Memory-maps an ngspice binary rawfile without copying the data.
+    `file_path` may also be the rawfile contents as bytes, which are then
+    viewed in place.
+
+    A file may hold several plots back to back (e.g. 'write' with appendwrite).
+
+    Returns:
+        list of dicts with keys 'plotname', 'variables' (list of names) and
+        'data' (read-only np.memmap, or array view, shaped (points, variables)).
+    """
+    plots = []
+    in_memory = isinstance(file_path, (bytes, bytearray, memoryview))
+    if in_memory:
+        buf = memoryview(file_path).toreadonly()
+        if len(buf) == 0:
+            return plots
+        # Same interface as mmap for the header scan below
+        raw = bytes(buf) if not isinstance(file_path, bytes) else file_path
+    else:
+        with open(file_path, "rb") as f:
+            if f.seek(0, 2) == 0:
+                return plots
+            raw = buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    try:
+        pos = 0
+        while pos < len(buf):
+            marker = raw.find(b"Binary:\n", pos)
+            if marker < 0:
+                source = "rawfile data" if in_memory else file_path
+                raise ValueError(f"No 'Binary:' section after offset {pos} in {source}.")
+            header = raw[pos:marker].decode("ascii", errors="replace").splitlines()
+
+            fields = {}
+            variables = []
+            in_vars = False
+            for line in header:
+                if in_vars and line[:1] in ("\t", " "):
+                    # "<index> <name> <type>"
+                    variables.append(line.split()[1])
+                    continue
+                in_vars = False
+                key, _, value = line.partition(":")
+                fields[key.strip().lower()] = value.strip()
+                if key.strip().lower() == "variables":
+                    in_vars = True
+
+            if "complex" in fields.get("flags", "").lower():
+                raise ValueError("Complex rawfile data is not supported.")
+
+            n_vars = int(fields["no. variables"])
+            n_points = int(fields["no. points"])
+            offset = marker + len(b"Binary:\n")
+            if in_memory:
+                data = np.frombuffer(buf, dtype="<f8", count=n_points * n_vars, offset=offset).reshape(n_points, n_vars)
+            else:
+                data = np.memmap(file_path, dtype="<f8", mode="r", offset=offset, shape=(n_points, n_vars))
+            plots.append({
+                'plotname': fields.get("plotname", ""),
+                'variables': variables[:n_vars],
+                'data': data,
+            })
+            pos = offset + n_points * n_vars * 8
+    finally:
+        if not in_memory:
+            buf.close()
+    return plots
+
+
+def parse_ngspice_raw(file_path, device_name: str) -> pd.DataFrame:
+    """
+    Parses a binary rawfile written by the templates' 'write' output mode.
+    Returns a pandas DataFrame in the same layout as parse_ngspice_data.
+    """
+    try:
+        plots = read_ngspice_raw(file_path)
+    except Exception as e:
+        print(f"Error parsing rawfile: {e}")
+        return pd.DataFrame()
+
+    if not plots:
+        return pd.DataFrame()
+
+    # scale (the swept source, always the first variable), ids, gm, gds, cgg
+    vectors = [[] for _ in range(len(RAW_VECTORS) + 1)]
+    for plot in plots:
+        names = [name.lower() for name in plot['variables']]
+        index = [0]
+        for vector in RAW_VECTORS:
+            matches = [i for i, name in enumerate(names) if name.endswith(f"[{vector}]")]
+            if not matches:
+                raise ValueError(f"Vector '{vector}' missing from rawfile plot '{plot['plotname']}'.")
+            index.append(matches[0])
+        for slot, i in enumerate(index):
+            vectors[slot].append(plot['data'][:, i])
+
+    # A single plot stays a strided view on the mapped file
+    columns = [parts[0] if len(parts) == 1 else np.concatenate(parts) for parts in vectors]
+    return derive_metrics(*columns)
+
+
+def parse_output(file_path, device_name: str, output_format: str = 'ascii') -> pd.DataFrame:
+    """
+    Dispatches to the parser matching the template output format.
+    `file_path` is a path, or the output itself as bytes.
+    """
+    with get_instrument().timer("parse"):
+        if output_format == 'binary':
+            return parse_ngspice_raw(file_path, device_name)
+        return parse_ngspice_data(file_path, device_name)
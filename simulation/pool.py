@@ -0,0 +1,284 @@
+import atexit
+import itertools
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+import warnings
+
+from .limits import Limits, kill_process_group, resolve_limits
+
+# Defaults for the warm worker pool
+DEFAULT_MAX_CIRCUITS = 200
+DEFAULT_START_TIMEOUT = 60.0
+DEFAULT_RUN_TIMEOUT = 600.0
+
+_MARKER = "__ZCHAR_DONE_{}__"
+
+
+class WorkerError(RuntimeError):
+    """A pooled ngspice process died or stopped responding."""
+
+
+class WorkerTimeout(WorkerError):
+    """A pooled ngspice process did not finish a run in time."""
+
+
+class NgspiceWorker:
+    """
+    One long-lived ngspice process in pipe mode ('ngspice -p').
+
+    .spiceinit and the OSDI modules are loaded once at start-up; circuits are
+    then fed over stdin with 'source', and completion is detected by echoing
+    a unique marker and waiting for it on stdout.
+
+    The process runs in its own session and gets the rlimits of `limits`
+    (set only a memory cap: a CPU limit would add up over all circuits).
+    """
+
+    _ids = itertools.count()
+
+    def __init__(self, ngspice_bin: str, env: dict, cwd: str, start_timeout: float = DEFAULT_START_TIMEOUT,
+                 limits: Limits = None):
+        self.ngspice_bin = ngspice_bin
+        self.env = env
+        self.cwd = cwd
+        self.circuits = 0
+        self._seq = itertools.count()
+        self._lines = queue.Queue()
+
+        cmd = [ngspice_bin, "-p"]
+        # ngspice writes stdout through stdio; force line buffering on the pipe
+        # so markers arrive as soon as they are echoed.
+        if shutil.which("stdbuf"):
+            cmd = ["stdbuf", "-oL", "-eL"] + cmd
+
+        self.proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            env=env,
+            cwd=cwd,
+            start_new_session=True,
+            preexec_fn=limits.preexec_fn() if limits is not None else None
+        )
+        if limits is not None:
+            limits.apply(self.proc.pid)
+        self.name = f"ngspice-worker-{next(self._ids)}"
+        self._reader = threading.Thread(target=self._read_stdout, name=f"{self.name}-reader", daemon=True)
+        self._reader.start()
+
+        # Ready once .spiceinit has been processed and the worker answers
+        self.ping(timeout=start_timeout)
+
+    def _read_stdout(self):
+        for line in self.proc.stdout:
+            self._lines.put(line)
+        # EOF: the process exited
+        self._lines.put(None)
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def _send(self, *commands: str):
+        try:
+            self.proc.stdin.write("".join(f"{c}\n" for c in commands))
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise WorkerError(f"{self.name}: cannot write to ngspice ({e}).")
+
+    def _wait_marker(self, marker: str, timeout: float) -> list:
+        """Collects stdout until `marker`; returns the lines before it."""
+        deadline = time.monotonic() + timeout
+        output = []
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise WorkerTimeout(f"{self.name}: no response within {timeout:.0f} s.")
+            try:
+                line = self._lines.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if line is None:
+                raise WorkerError(f"{self.name}: ngspice exited (code {self.proc.wait()}).\n" + "".join(output))
+            if line.strip() == marker:
+                return output
+            output.append(line)
+
+    def ping(self, timeout: float = 10.0):
+        """Health check: raises WorkerError unless the process echoes back in time."""
+        marker = _MARKER.format(f"ping{next(self._seq)}")
+        self._send(f"echo {marker}")
+        self._wait_marker(marker, timeout)
+
+    def run_file(self, netlist_file: str, timeout: float = DEFAULT_RUN_TIMEOUT) -> str:
+        """
+        Sources a netlist (its .control block runs the analysis and writes the
+        output), then frees the circuit and its plots.
+        Returns the ngspice output of the run.
+        """
+        marker = _MARKER.format(next(self._seq))
+        self._send(f"source {netlist_file}", "destroy all", "remcirc", f"echo {marker}")
+        output = self._wait_marker(marker, timeout)
+        self.circuits += 1
+        return "".join(output)
+
+    def close(self):
+        if self.alive():
+            try:
+                self._send("quit")
+                self.proc.wait(timeout=2)
+            except (WorkerError, subprocess.TimeoutExpired):
+                pass
+        if self.alive():
+            kill_process_group(self.proc)
+            self.proc.wait()
+
+
+class NgspicePool:
+    """
+    Fixed-size pool of warm NgspiceWorker processes.
+
+    Workers are health-checked when taken from the pool, restarted if they
+    crashed or timed out, and recycled after `max_circuits` circuits to bound
+    the memory growth of a long-lived ngspice. `memory_mb` caps the address
+    space of each worker (RLIMIT_AS).
+    """
+
+    def __init__(
+        self,
+        ngspice_bin: str,
+        env: dict,
+        size: int = None,
+        max_circuits: int = DEFAULT_MAX_CIRCUITS,
+        cwd: str = None,
+        run_timeout: float = DEFAULT_RUN_TIMEOUT,
+        memory_mb: float = None
+    ):
+        self.ngspice_bin = ngspice_bin
+        self.env = env
+        self.size = size or os.cpu_count() or 1
+        self.max_circuits = max_circuits
+        self.cwd = cwd or os.getcwd()
+        self.run_timeout = run_timeout
+        self.limits = Limits(memory_mb=memory_mb)
+        self.restarts = 0
+        self._idle = queue.Queue()
+        self._closed = False
+        # Workers start lazily; a slot is either an idle worker or None
+        for _ in range(self.size):
+            self._idle.put(None)
+
+    def _start_worker(self) -> NgspiceWorker:
+        return NgspiceWorker(self.ngspice_bin, self.env, self.cwd, limits=self.limits)
+
+    def _checkout(self) -> NgspiceWorker:
+        worker = self._idle.get()
+        if worker is not None and (not worker.alive() or worker.circuits >= self.max_circuits):
+            worker.close()
+            worker = None
+            self.restarts += 1
+        if worker is not None:
+            try:
+                worker.ping()
+            except WorkerError:
+                worker.close()
+                worker = None
+                self.restarts += 1
+        if worker is None:
+            try:
+                worker = self._start_worker()
+            except Exception:
+                # Give the slot back so the pool does not shrink
+                self._idle.put(None)
+                raise
+        return worker
+
+    def run_file(self, netlist_file: str) -> str:
+        """
+        Runs one netlist on an idle worker (blocks while all are busy).
+        A worker that fails is discarded and replaced on next use.
+        """
+        if self._closed:
+            raise RuntimeError("Pool is closed.")
+        worker = self._checkout()
+        try:
+            return worker.run_file(netlist_file, timeout=self.run_timeout)
+        except WorkerError:
+            worker.close()
+            worker = None
+            self.restarts += 1
+            raise
+        finally:
+            if self._closed and worker is not None:
+                # Replaced or shut down while this run was going on
+                worker.close()
+                worker = None
+            self._idle.put(worker)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                worker.close()
+
+
+# (ngspice binary, PDK root, PDK, working dir) -> (settings, NgspicePool)
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_worker_pool(sim_config: dict, ngspice_bin: str, env: dict) -> NgspicePool:
+    """
+    Shared pool per (ngspice binary, PDK, working dir), sized by 'pool_size'
+    and recycled after 'pool_max_circuits' circuits per worker. Runs time
+    out after 'sim_timeout' seconds (DEFAULT_RUN_TIMEOUT if unset);
+    'sim_memory_mb' caps each worker. 'sim_cpu_time' cannot be applied to
+    long-lived workers and only draws a warning.
+
+    A reloaded config with other pool settings closes the pool and starts
+    a new one.
+    """
+    sim_config = sim_config or {}
+    limits = resolve_limits(sim_config)
+    key = (ngspice_bin, env.get("PDK_ROOT"), env.get("PDK"), os.getcwd())
+    settings = dict(
+        size=sim_config.get("pool_size") or os.cpu_count() or 1,
+        max_circuits=sim_config.get("pool_max_circuits", DEFAULT_MAX_CIRCUITS),
+        run_timeout=limits.timeout or DEFAULT_RUN_TIMEOUT,
+        memory_mb=limits.memory_mb,
+    )
+    with _pools_lock:
+        current = _pools.get(key)
+        if current is not None and current[0] == settings:
+            return current[1]
+        if current is not None:
+            current[1].close()
+        if limits.cpu_time:
+            warnings.warn(
+                "'sim_cpu_time' is not enforced by the 'pool' engine (its workers outlive single runs); "
+                "'sim_timeout' still applies.", RuntimeWarning, stacklevel=2
+            )
+        pool = NgspicePool(ngspice_bin, env, **settings)
+        _pools[key] = (settings, pool)
+        return pool
+
+
+def shutdown_pools():
+    """Stops every pooled ngspice process."""
+    with _pools_lock:
+        for _, pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+atexit.register(shutdown_pools)
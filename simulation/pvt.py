@@ -0,0 +1,226 @@
+import secrets
+
+from .instrument import instrumented
+from .runner import CORNERS, _lut_from_frame, _run_deck, format_values, is_nmos, model_library
+from .templates import (
+    NMOS_CIRCUIT_TEMPLATE, PMOS_CIRCUIT_TEMPLATE, CORNER_DECK_TEMPLATE, TEMPERATURE_COMMANDS,
+    MONTE_CARLO_DECK_TEMPLATE, output_placeholders
+)
+
+# Default simulation temperature of ngspice [degC]
+DEFAULT_TEMPERATURE = 27.0
+
+# Suffix of the statistical (mismatch) library sections: mos_<corner><suffix>
+DEFAULT_MC_SECTION_SUFFIX = "_mismatch"
+
+
+def render_circuit(device_name: str, width: float, length: float, vds: float, vbs: float, ng: int, m: int, corner: str) -> str:
+    """The device circuit without analysis, using library section mos_<corner>."""
+    template = NMOS_CIRCUIT_TEMPLATE if is_nmos(device_name) else PMOS_CIRCUIT_TEMPLATE
+    return template.format(
+        model_path=model_library(device_name),
+        model_name=device_name,
+        width=width,
+        length=length,
+        ng=ng,
+        m=m,
+        vds=vds,
+        vbs=vbs,
+        corner=corner
+    )
+
+
+def _device_fields(device_name: str) -> dict:
+    nmos = is_nmos(device_name)
+    return {'sign': "" if nmos else "-", 'instance': "xn1" if nmos else "xp1", 'model_name': device_name}
+
+
+def render_corner_netlist(
+    device_name: str,
+    width: float,
+    length: float,
+    vds: float,
+    vgs_max: float,
+    vgs_step: float,
+    vbs: float,
+    ng: int,
+    m: int,
+    corners: list,
+    temperatures: list,
+    output_file: str,
+    output_format: str = "ascii"
+) -> str:
+    """Formats a deck that sweeps Vgs for every corner and temperature in one session."""
+    placeholders = output_placeholders(output_format)
+    loop = TEMPERATURE_COMMANDS.format(
+        temperatures=format_values(temperatures),
+        vgs_max=vgs_max,
+        vgs_step=vgs_step,
+        output_file=output_file,
+        write_command=placeholders['write_command'],
+        **_device_fields(device_name)
+    )
+    blocks = []
+    for i, corner in enumerate(corners):
+        if i > 0:
+            # Replace the circuit, re-reading the library with the next section
+            circuit = render_circuit(device_name, width, length, vds, vbs, ng, m, corner)
+            blocks.append("remcirc")
+            blocks += [f"circbyline {line}" for line in circuit.splitlines() if line.strip()]
+            blocks.append("circbyline .end")
+        blocks.append(loop)
+
+    return CORNER_DECK_TEMPLATE.format(
+        circuit=render_circuit(device_name, width, length, vds, vbs, ng, m, corners[0]),
+        corner_commands="\n".join(blocks),
+        output_options=placeholders['output_options']
+    )
+
+
+def render_monte_carlo_netlist(
+    device_name: str,
+    width: float,
+    length: float,
+    vds: float,
+    vgs_max: float,
+    vgs_step: float,
+    vbs: float,
+    ng: int,
+    m: int,
+    runs: int,
+    section: str,
+    temperature: float,
+    seed: int,
+    output_file: str,
+    output_format: str = "ascii"
+) -> str:
+    """Formats a deck that repeats the Vgs sweep `runs` times with fresh mismatch draws."""
+    placeholders = output_placeholders(output_format)
+    return MONTE_CARLO_DECK_TEMPLATE.format(
+        circuit=render_circuit(device_name, width, length, vds, vbs, ng, m, section),
+        runs=runs,
+        seed=seed,
+        temperature=repr(float(temperature)),
+        vgs_max=vgs_max,
+        vgs_step=vgs_step,
+        output_file=output_file,
+        **placeholders,
+        **_device_fields(device_name)
+    )
+
+
+@instrumented("corner_sweep")
+def run_corner_sweep(
+    device_name: str,
+    width: float,
+    length: float,
+    vds: float,
+    vgs_max: float,
+    vgs_step: float = 0.01,
+    vbs: float = 0.0,
+    ng: int = 1,
+    m: int = 1,
+    corners: list = CORNERS,
+    temperatures: list = (DEFAULT_TEMPERATURE,),
+    sim_config: dict = None
+):
+    """
+    Sweeps Vgs of one geometry / bias point over process corners and
+    temperatures [degC] in a single ngspice run.
+
+    The PDK's OSDI modules are loaded once; each corner re-reads the model
+    library with its own section.
+
+    Returns:
+        LutResult with axes ('corner', 'temp', 'vgs'). Raises SimulationError on failure.
+    """
+    corners = list(corners)
+    temperatures = list(temperatures)
+    if not corners or not temperatures:
+        raise ValueError("corners and temperatures must not be empty.")
+    unknown = [c for c in corners if c not in CORNERS]
+    if unknown:
+        raise ValueError(f"Unknown corners {unknown}, expected some of {list(CORNERS)}.")
+
+    params = {
+        'device_name': device_name,
+        'width': width,
+        'length': length,
+        'vds': vds,
+        'vbs': vbs,
+        'ng': ng,
+        'm': m,
+        'vgs_max': vgs_max,
+        'vgs_step': vgs_step,
+    }
+
+    def render(output_file, fmt):
+        return render_corner_netlist(
+            device_name, width, length, vds, vgs_max, vgs_step, vbs, ng, m,
+            corners, temperatures, output_file, fmt
+        )
+
+    axes = {'corner': corners, 'temp': temperatures}
+    return _run_deck(render, device_name, sim_config, lambda frame, netlist: _lut_from_frame(frame, axes, params))
+
+
+@instrumented("monte_carlo")
+def run_monte_carlo(
+    device_name: str,
+    width: float,
+    length: float,
+    vds: float,
+    vgs_max: float,
+    vgs_step: float = 0.01,
+    vbs: float = 0.0,
+    ng: int = 1,
+    m: int = 1,
+    runs: int = 100,
+    corner: str = "tt",
+    temperature: float = DEFAULT_TEMPERATURE,
+    seed: int = None,
+    sim_config: dict = None
+):
+    """
+    Mismatch Monte Carlo of one geometry / bias point in a single ngspice run.
+
+    The circuit uses the statistical library section mos_<corner> plus the
+    'mc_section_suffix' from sim_config (default '_mismatch') and is
+    reloaded with 'mc_source' before each of the `runs` sweeps. `seed`
+    (random if None) is kept in the result params for reproduction.
+
+    Returns:
+        LutResult with axes ('mc', 'vgs'). Raises SimulationError on failure.
+    """
+    if runs < 1:
+        raise ValueError("runs must be at least 1.")
+    if corner not in CORNERS:
+        raise ValueError(f"Unknown corner '{corner}', expected one of {list(CORNERS)}.")
+    if seed is None:
+        seed = secrets.randbelow(2**31)
+
+    suffix = (sim_config or {}).get("mc_section_suffix", DEFAULT_MC_SECTION_SUFFIX)
+    section = f"{corner}{suffix}"
+    params = {
+        'device_name': device_name,
+        'width': width,
+        'length': length,
+        'vds': vds,
+        'vbs': vbs,
+        'ng': ng,
+        'm': m,
+        'vgs_max': vgs_max,
+        'vgs_step': vgs_step,
+        'corner': corner,
+        'temp': temperature,
+        'seed': seed,
+    }
+
+    def render(output_file, fmt):
+        return render_monte_carlo_netlist(
+            device_name, width, length, vds, vgs_max, vgs_step, vbs, ng, m,
+            runs, section, temperature, seed, output_file, fmt
+        )
+
+    axes = {'mc': range(runs)}
+    return _run_deck(render, device_name, sim_config, lambda frame, netlist: _lut_from_frame(frame, axes, params))
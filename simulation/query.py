@@ -0,0 +1,254 @@
+import numpy as np
+import pandas as pd
+
+from .derived import DERIVED_METRICS, DerivedMetrics
+from .lut import LutResult
+
+# Default resolution of the precomputed gm/Id axis
+DEFAULT_GM_ID_POINTS = 256
+
+# Metrics tabulated against gm/Id by default; any metric of
+# simulation.derived can be requested. Width-normalized ones use the total
+# simulated width (width * m), like the plots.
+QUERY_METRICS = ('id_w', 'gm_gds', 'ft', 'vgs', 'gm_w', 'gds_w', 'cgg_w')
+
+# Strictly positive metrics spanning decades are interpolated in log space
+LOG_METRICS = {'id_w', 'ft', 'gm_w', 'gds_w'}
+
+
+def pchip_slopes(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Fritsch-Carlson slopes for a monotone piecewise cubic Hermite interpolant.
+    `x` must be strictly increasing; works along the last axis of `y`.
+    """
+    h = np.diff(x)
+    delta = np.diff(y, axis=-1) / h
+    slopes = np.zeros_like(y)
+
+    if y.shape[-1] == 2:
+        slopes[..., :] = delta
+        return slopes
+
+    # Interior: weighted harmonic mean, zero at local extrema
+    w1 = 2 * h[1:] + h[:-1]
+    w2 = h[1:] + 2 * h[:-1]
+    d0, d1 = delta[..., :-1], delta[..., 1:]
+    same_sign = (d0 * d1) > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        harmonic = (w1 + w2) / (w1 / d0 + w2 / d1)
+    slopes[..., 1:-1] = np.where(same_sign, harmonic, 0.0)
+
+    # End points: one-sided three-point estimate, clipped to keep monotonicity
+    for end, (hh0, hh1, dd0, dd1) in ((0, (h[0], h[1], delta[..., 0], delta[..., 1])),
+                                       (-1, (h[-1], h[-2], delta[..., -1], delta[..., -2]))):
+        s = ((2 * hh0 + hh1) * dd0 - hh0 * dd1) / (hh0 + hh1)
+        s = np.where(np.sign(s) != np.sign(dd0), 0.0, s)
+        s = np.where((np.sign(dd0) != np.sign(dd1)) & (np.abs(s) > 3 * np.abs(dd0)), 3 * dd0, s)
+        slopes[..., end] = s
+    return slopes
+
+
+def pchip_eval(x: np.ndarray, y: np.ndarray, slopes: np.ndarray, xq: np.ndarray) -> np.ndarray:
+    """Evaluates the Hermite interpolant at xq (1D); NaN outside [x[0], x[-1]]."""
+    i = np.clip(np.searchsorted(x, xq, side='right') - 1, 0, len(x) - 2)
+    h = x[i + 1] - x[i]
+    t = (xq - x[i]) / h
+    t2, t3 = t * t, t * t * t
+    result = (
+        (2 * t3 - 3 * t2 + 1) * y[i]
+        + (t3 - 2 * t2 + t) * h * slopes[i]
+        + (-2 * t3 + 3 * t2) * y[i + 1]
+        + (t3 - t2) * h * slopes[i + 1]
+    )
+    return np.where((xq >= x[0]) & (xq <= x[-1]), result, np.nan)
+
+
+def monotone_branch(gm_id: np.ndarray) -> np.ndarray:
+    """
+    Indices of one VGS sweep where gm/Id strictly decreases: from the
+    weak-inversion peak towards strong inversion. This is the branch designers
+    size on and makes gm/Id a valid interpolation coordinate.
+    """
+    valid = np.isfinite(gm_id) & (gm_id > 0)
+    if not valid.any():
+        return np.array([], dtype=int)
+    start = int(np.argmax(np.where(valid, gm_id, -np.inf)))
+    index = np.arange(start, len(gm_id))
+    index = index[valid[index]]
+    # Keep points that set a new running minimum
+    values = gm_id[index]
+    running_min = np.minimum.accumulate(values)
+    keep = np.ones(len(index), dtype=bool)
+    keep[1:] = values[1:] < running_min[:-1]
+    return index[keep]
+
+
+def _blend_axis(table: np.ndarray, dim: int, pos: float) -> np.ndarray:
+    """Linear interpolation of `table` along `dim` at fractional index `pos`."""
+    n = table.shape[dim]
+    i0 = min(int(pos), max(n - 2, 0))
+    frac = pos - i0
+    lower = np.take(table, i0, axis=dim)
+    if n == 1 or frac == 0.0:
+        return lower
+    upper = np.take(table, i0 + 1, axis=dim)
+    if frac == 1.0:
+        return upper
+    return (1.0 - frac) * lower + frac * upper
+
+
+class GmIdLookup:
+    """
+    Precomputed gm/Id-indexed tables for fast sizing queries.
+
+    For every (L, VDS, VBS) curve of a LutResult the monotone branch of
+    gm/Id(VGS) is resampled with a monotone cubic (PCHIP) interpolant onto a
+    shared uniform gm/Id axis. Queries are then pure array arithmetic:
+    uniform-grid indexing along gm/Id plus multilinear interpolation in
+    L, VDS and VBS, for any number of points in one call.
+    """
+
+    def __init__(self, lut: LutResult, metrics=QUERY_METRICS, gm_id_points: int = DEFAULT_GM_ID_POINTS):
+        if lut.dims != ('length', 'vds', 'vbs', 'vgs'):
+            raise ValueError(f"Expected LUT axes (length, vds, vbs, vgs), got {lut.dims}.")
+
+        self.axes = {name: lut.axes[name] for name in ('length', 'vds', 'vbs')}
+        width = lut.params.get('width', 1.0) * lut.params.get('m', 1)
+        derived = DerivedMetrics(lut, width=width, length=lut.params.get('length'))
+        # 'vgs' is tabulated as |Vgs|
+        names = {metric: 'vgs_abs' if metric == 'vgs' else metric for metric in metrics}
+        unknown = [metric for metric, name in names.items() if name not in derived]
+        if unknown:
+            raise ValueError(f"Unknown metrics {sorted(unknown)}, available: {['vgs'] + list(DERIVED_METRICS)}.")
+        # Only the requested metrics (and what they depend on) are computed
+        sources = {metric: np.broadcast_to(derived[name], lut.shape) for metric, name in names.items()}
+
+        gm_id = lut['gm_id']
+        finite = gm_id[np.isfinite(gm_id) & (gm_id > 0)]
+        self.gm_id_axis = np.linspace(finite.min(), finite.max(), gm_id_points)
+        self._g0 = self.gm_id_axis[0]
+        self._dg = self.gm_id_axis[1] - self.gm_id_axis[0]
+
+        outer = lut.shape[:-1]
+        self.tables = {m: np.full(outer + (gm_id_points,), np.nan) for m in metrics}
+
+        for key in np.ndindex(*outer):
+            branch = monotone_branch(gm_id[key])
+            if len(branch) < 2:
+                continue
+            # Interpolate against increasing gm/Id
+            x = gm_id[key][branch][::-1]
+            for metric in metrics:
+                y = sources[metric][key][branch][::-1]
+                log = metric in LOG_METRICS and np.all(y > 0)
+                y = np.log(y) if log else y
+                values = pchip_eval(x, y, pchip_slopes(x, y), self.gm_id_axis)
+                self.tables[metric][key] = np.exp(values) if log else values
+
+        # Outer axes ascending (e.g. VBS given as 0, -0.3) for the index search
+        for dim, name in enumerate(self.axes):
+            order = np.argsort(self.axes[name])
+            self.axes[name] = self.axes[name][order]
+            for metric in self.tables:
+                self.tables[metric] = np.take(self.tables[metric], order, axis=dim)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, params: dict, **kwargs):
+        """
+        Lookup for a single parse_ngspice_data sweep.
+        `params` needs 'width' (and optionally 'length', 'vds', 'vbs', 'm') in SI units.
+        """
+        axes = {name: [params.get(name, 0.0)] for name in ('length', 'vds', 'vbs')}
+        return cls(LutResult.from_frame(frame, axes, params), **kwargs)
+
+    def _axis_position(self, name: str, values):
+        """Fractional index along an outer axis; NaN outside the characterized range."""
+        axis = self.axes[name]
+        if values is None:
+            if len(axis) != 1:
+                raise ValueError(f"'{name}' is required: the LUT has {len(axis)} {name} points.")
+            return np.zeros(())
+        values = np.asarray(values, dtype=np.float64)
+        if len(axis) == 1:
+            return np.where(np.isclose(values, axis[0], rtol=1e-9, atol=0.0), 0.0, np.nan)
+        pos = np.interp(values, axis, np.arange(len(axis)))
+        return np.where((values >= axis[0]) & (values <= axis[-1]), pos, np.nan)
+
+    def lookup(self, metric: str, gm_id, length=None, vds=None, vbs=None) -> np.ndarray:
+        """
+        Interpolates `metric` at the given operating points.
+
+        All arguments broadcast against each other, so thousands of points
+        (or a full gm/Id x L mesh) are answered in one vectorized call.
+        Points outside the characterized space return NaN.
+        """
+        table = self.tables[metric]
+        gm_id = np.asarray(gm_id, dtype=np.float64)
+        g_pos = (gm_id - self._g0) / self._dg
+        g_pos = np.where((g_pos >= 0) & (g_pos <= len(self.gm_id_axis) - 1), g_pos, np.nan)
+        positions = [
+            self._axis_position('length', length),
+            self._axis_position('vds', vds),
+            self._axis_position('vbs', vbs),
+            g_pos,
+        ]
+        shape = np.broadcast_shapes(*(p.shape for p in positions))
+
+        # Scalar coordinates (typically the bias point) are folded into the
+        # small table first, so per-point work only covers the varying axes.
+        for dim in reversed(range(len(positions))):
+            if positions[dim].ndim == 0:
+                if np.isnan(positions[dim]):
+                    return np.full(shape, np.nan)
+                table = _blend_axis(table, dim, float(positions[dim]))
+                del positions[dim]
+        if not positions:
+            return np.asarray(table, dtype=np.float64).reshape(shape)
+
+        positions = np.broadcast_arrays(*positions)
+        out_of_range = np.zeros(shape, dtype=bool)
+        for pos in positions:
+            out_of_range |= np.isnan(pos)
+
+        # Flat gather over the remaining axes
+        flat = table.ravel()
+        strides = np.cumprod((table.shape[1:] + (1,))[::-1])[::-1]
+        base = np.zeros(shape, dtype=np.intp)
+        frac, steps = [], []
+        for pos, n, stride in zip(positions, table.shape, strides):
+            pos = np.where(np.isnan(pos), 0.0, pos)
+            i0 = np.clip(pos.astype(np.intp), 0, max(n - 2, 0))
+            base += i0 * stride
+            frac.append(pos - i0)
+            steps.append(stride if n > 1 else 0)
+
+        # Multilinear blend of the 2^k surrounding table entries
+        result = np.zeros(shape)
+        for corner in np.ndindex(*(2,) * len(frac)):
+            weight = None
+            offset = 0
+            for bit, f, step in zip(corner, frac, steps):
+                if bit and step == 0:
+                    break
+                w = f if bit else 1.0 - f
+                weight = w if weight is None else weight * w
+                offset += bit * step
+            else:
+                values = flat[base + offset]
+                # Zero-weight corners may sit outside a curve's gm/Id range (NaN)
+                result += np.where(weight > 0, weight * values, 0.0)
+
+        result[out_of_range] = np.nan
+        return result
+
+    def id_w(self, gm_id, length=None, vds=None, vbs=None) -> np.ndarray:
+        """Current density Id/W [A/m] at the given gm/Id."""
+        return self.lookup('id_w', gm_id, length, vds, vbs)
+
+    def gm_gds(self, gm_id, length=None, vds=None, vbs=None) -> np.ndarray:
+        """Intrinsic gain gm/gds at the given gm/Id."""
+        return self.lookup('gm_gds', gm_id, length, vds, vbs)
+
+    def ft(self, gm_id, length=None, vds=None, vbs=None) -> np.ndarray:
+        """Transit frequency [Hz] at the given gm/Id."""
+        return self.lookup('ft', gm_id, length, vds, vbs)
@@ -0,0 +1,212 @@
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .parser import derive_metrics
+from .runner import resolve_corner, resolve_output_format, resolve_sim_settings, run_dc_sweep
+
+# Columns proportional to the total device width (W * m)
+EXTENSIVE_COLUMNS = ('id', 'gm', 'gds', 'cgg')
+
+# Default relative error accepted by the verification spot-check
+DEFAULT_VERIFY_RTOL = 0.02
+
+# Number of Vgs points compared by the verification spot-check (and
+# simulated for it, see ScalingReuse)
+VERIFY_POINTS = 16
+
+
+def scale_result(data, factor: float):
+    """
+    Result of a device `factor` times wider (or with `factor` times the multiplier).
+    Extensive quantities scale linearly; gm/Id, gm/gds and ft are recomputed and
+    therefore unchanged up to the Id floor.
+    """
+    return derive_metrics(
+        data['vgs'].to_numpy(),
+        *(data[col].to_numpy() * factor for col in EXTENSIVE_COLUMNS)
+    )
+
+
+def spot_check(derived, simulated, rtol: float = DEFAULT_VERIFY_RTOL) -> dict:
+    """
+    Compares a derived result against a real simulation at VERIFY_POINTS
+    evenly spaced Vgs points, ignoring the Id floor region.
+    """
+    n = min(len(derived), len(simulated))
+    index = np.unique(np.linspace(0, n - 1, VERIFY_POINTS).astype(int))
+    errors = {}
+    for col in EXTENSIVE_COLUMNS:
+        a = derived[col].to_numpy()[index]
+        b = simulated[col].to_numpy()[index]
+        scale = np.max(np.abs(b)) if len(b) else 0.0
+        significant = np.abs(b) > 1e-6 * scale
+        rel = np.abs(a - b)[significant] / np.abs(b)[significant]
+        errors[col] = float(rel.max()) if rel.size else 0.0
+    worst = max(errors.values()) if errors else 0.0
+    return {'max_rel_error': worst, 'errors': errors, 'ok': worst <= rtol}
+
+
+class ScalingReuse:
+    """
+    Reuses earlier sweeps when a request differs only in size.
+
+    Results are keyed on everything except the width and the multiplier m,
+    including the corner, output format, PDK and ngspice of sim_config.
+    A request with the same width and a different m is derived exactly by
+    scaling the extensive columns; a request whose total width is within
+    `width_tolerance` (relative) of a stored one at the same ng is derived
+    the same way to first order. Derived frames carry
+    attrs['derived'] = {'source': ..., 'scale': ...}.
+
+    With `verify` set, every derived result is spot-checked against a real
+    simulation of about VERIFY_POINTS Vgs points (a coarser step on the same
+    grid); if the check fails, the full sweep is simulated, returned and
+    stored instead. An exact repeat returns a copy of the stored frame.
+    """
+
+    def __init__(
+        self,
+        width_tolerance: float = 0.0,
+        verify: bool = False,
+        verify_rtol: float = DEFAULT_VERIFY_RTOL,
+        max_entries: int = 64,
+        runner=run_dc_sweep
+    ):
+        if not 0.0 <= width_tolerance < 1.0:
+            raise ValueError(f"'reuse_width_tolerance' must be in [0, 1), got {width_tolerance}.")
+        self.width_tolerance = width_tolerance
+        self.verify = verify
+        self.verify_rtol = verify_rtol
+        self.max_entries = max_entries
+        self.runner = runner
+        self.derived = 0
+        self.simulated = 0
+        self.verify_failures = 0
+        self._lock = threading.Lock()
+        # base key -> list of (width, m, DataFrame); LRU over base keys
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def _base_key(device_name, length, vds, vgs_max, vgs_step, vbs, ng, sim_config=None):
+        # Results of another corner, PDK or ngspice must not be scaled into this one
+        settings = (resolve_corner(sim_config), resolve_output_format(sim_config)) + resolve_sim_settings(sim_config)
+        return (device_name, float(length), float(vds), float(vgs_max), float(vgs_step), float(vbs), int(ng)) + settings
+
+    @classmethod
+    def from_config(cls, sim_config: dict | None, **kwargs):
+        """ScalingReuse configured by 'reuse_width_tolerance' and 'reuse_verify'."""
+        sim_config = sim_config or {}
+        return cls(
+            width_tolerance=float(sim_config.get("reuse_width_tolerance", 0.0)),
+            verify=sim_config.get("reuse_verify", False),
+            **kwargs
+        )
+
+    def _find(self, key, width: float, m: int):
+        """Best stored (width, m, data) to derive from, or None."""
+        candidates = self._entries.get(key)
+        if not candidates:
+            return None
+        best, best_dev = None, None
+        for entry in candidates:
+            deviation = abs(width / entry[0] - 1.0)
+            if deviation <= self.width_tolerance + 1e-12 and (best is None or deviation < best_dev):
+                best, best_dev = entry, deviation
+        return best
+
+    def _store(self, key, width: float, m: int, data):
+        with self._lock:
+            entries = self._entries.setdefault(key, [])
+            entries[:] = [e for e in entries if not (e[0] == width and e[1] == m)]
+            entries.append((width, m, data))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def run_dc_sweep(
+        self,
+        device_name: str,
+        width: float,
+        length: float,
+        vds: float,
+        vgs_max: float,
+        vgs_step: float = 0.01,
+        vbs: float = 0.0,
+        ng: int = 1,
+        m: int = 1,
+        sim_config: dict = None,
+        runner=None
+    ):
+        """
+        Same interface and units as simulation.runner.run_dc_sweep.
+        `runner` overrides the simulation function for this call.
+        """
+        runner = runner or self.runner
+        key = self._base_key(device_name, length, vds, vgs_max, vgs_step, vbs, ng, sim_config)
+        with self._lock:
+            source = self._find(key, width, m)
+            if source is not None:
+                self._entries.move_to_end(key)
+
+        if source is not None:
+            src_width, src_m, src_data = source
+            if src_width == width and src_m == m:
+                # Callers may modify what they get
+                return src_data.copy()
+
+            factor = (width * m) / (src_width * src_m)
+            data = scale_result(src_data, factor)
+            data.attrs['derived'] = {
+                'source': {'width': src_width, 'm': src_m},
+                'scale': factor,
+                'exact': src_width == width,
+            }
+
+            if not self.verify:
+                self.derived += 1
+                return data
+
+            # Every stride-th point of the derived grid, simulated
+            stride = max(1, math.ceil((round(vgs_max / vgs_step) + 1) / VERIFY_POINTS))
+            sample = runner(
+                device_name=device_name, width=width, length=length, vds=vds, vgs_max=vgs_max,
+                vgs_step=vgs_step * stride, vbs=vbs, ng=ng, m=m, sim_config=sim_config
+            )
+            if sample is None or sample.empty:
+                return sample
+            check = spot_check(data.iloc[::stride].reset_index(drop=True), sample, self.verify_rtol)
+            data.attrs['verification'] = check
+            if check['ok']:
+                self.derived += 1
+                return data
+            self.verify_failures += 1
+            simulated = runner(
+                device_name=device_name, width=width, length=length, vds=vds, vgs_max=vgs_max,
+                vgs_step=vgs_step, vbs=vbs, ng=ng, m=m, sim_config=sim_config
+            )
+            if simulated is None or simulated.empty:
+                return simulated
+            simulated.attrs['verification'] = check
+            self.simulated += 1
+            self._store(key, width, m, simulated)
+            return simulated
+
+        data = runner(
+            device_name=device_name, width=width, length=length, vds=vds, vgs_max=vgs_max,
+            vgs_step=vgs_step, vbs=vbs, ng=ng, m=m, sim_config=sim_config
+        )
+        self.simulated += 1
+        # A result of relaxed convergence options is not scaled into others
+        if data is not None and not data.empty and not data.attrs.get('relaxed'):
+            self._store(key, width, m, data)
+        return data
+
+    def stats(self) -> dict:
+        return {
+            'derived': self.derived,
+            'simulated': self.simulated,
+            'verify_failures': self.verify_failures,
+        }
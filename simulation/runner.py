@@ -1,30 +1,46 @@
 import subprocess
 import os
+import select
 import tempfile
+import threading
 import uuid
 import shutil
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from pathlib import Path
-from .templates import NMOS_SWEEP_TEMPLATE, PMOS_SWEEP_TEMPLATE
-from .parser import parse_ngspice_data
+from .templates import (
+    NMOS_SWEEP_TEMPLATE, PMOS_SWEEP_TEMPLATE, NMOS_LUT_TEMPLATE, PMOS_LUT_TEMPLATE,
+    NMOS_SEGMENTS_TEMPLATE, PMOS_SEGMENTS_TEMPLATE, SEGMENT_COMMAND, OUTPUT_FILENAMES, output_placeholders
+)
+from .parser import parse_output
+from .lut import LutResult
+from .shared import get_shared_engine
+from .pool import WorkerError, WorkerTimeout, get_worker_pool
+from .cache import OUTPUT_PLACEHOLDER, ResultCache, cache_from_config, ngspice_version, spiceinit_dependencies
+from .instrument import get_instrument, instrumented, parse_solve_time, rusage_peak_bytes
+from .limits import (
+    TRANSIENT_KINDS, Limits, SimulationError, Watchdog, kill_process_group, relax_netlist, resolve_limits
+)
 
-def run_dc_sweep(
-    device_name: str,
-    width: float,
-    length: float,
-    vds: float,
-    vgs_max: float,
-    vgs_step: float = 0.01,
-    vbs: float = 0.0,
-    ng: int = 1,
-    m: int = 1,
-    model_path: str = None,
-    sim_config: dict = None
-):
+ENGINES = ("subprocess", "shared", "pool")
+
+# Process corners, i.e. the 'mos_<corner>' sections of the corner libraries
+CORNERS = ("tt", "ff", "ss", "fs", "sf")
+
+# How netlists and outputs travel between Python and ngspice:
+# "files" - run directory under ./.sim_buffer (default)
+# "pipe"  - netlist on stdin, output through a FIFO in a RAM-backed directory
+# "tmpfs" - netlist on stdin, output file in a RAM-backed directory
+IO_MODES = ("files", "pipe", "tmpfs")
+
+# Run directories for the "pipe" and "tmpfs" modes
+TMPFS_DIRNAME = "zchar-sim-buffer"
+
+def resolve_sim_settings(sim_config: dict = None):
     """
-    Runs a DC sweep for the given device parameters.
-    Returns a pandas DataFrame with results.
+    Resolves PDK location and ngspice binary from the simulation config.
+    Returns:
+        tuple: (pdk_root, pdk_code, ngspice_bin)
     """
-    
     # Default config values if not provided (fallback)
     pdk_root = "/home/cgurleyuk/analog/pdk/IHP-Open-PDK"
     pdk_code = "ihp-sg13g2"
@@ -36,8 +52,8 @@ def run_dc_sweep(
         # Expand user path for ngspice if provided
         if "ngspice_path" in sim_config:
             ngspice_bin = os.path.expanduser(sim_config["ngspice_path"])
-    
-    # Verify ngspice executable exists if it's an absolute path, 
+
+    # Verify ngspice executable exists if it's an absolute path,
     # otherwise trust it's in PATH or handle failure later.
     if os.path.isabs(ngspice_bin) and not os.path.exists(ngspice_bin):
         # Fallback or error? For now, we'll try to proceed or just let subprocess fail.
@@ -45,41 +61,327 @@ def run_dc_sweep(
         if shutil.which("ngspice"):
              ngspice_bin = "ngspice"
 
-    run_id = str(uuid.uuid4())
-    # Use local directory to avoid potential temp permission/path issues with ngspice
-    work_dir = Path.cwd() / ".sim_buffer"
-    work_dir.mkdir(exist_ok=True)
-    
-    sim_dir = work_dir / run_id
-    sim_dir.mkdir(parents=True, exist_ok=True)
-    
-    netlist_file = sim_dir / "input.cir"
-    output_file = sim_dir / "output.txt"
-    
-    # Env variables for spiceinit
+    return pdk_root, pdk_code, ngspice_bin
+
+def check_ngspice(ngspice_bin: str, sim_config: dict = None):
+    """Raises FileNotFoundError if the ngspice executable cannot be run."""
+    if not shutil.which(ngspice_bin) and not (os.path.isfile(ngspice_bin) and os.access(ngspice_bin, os.X_OK)):
+        if sim_config and "ngspice_path" in sim_config:
+             raise FileNotFoundError(f"Ngspice executable not found at configured path: '{sim_config['ngspice_path']}' (expanded: '{ngspice_bin}') and not in system PATH.")
+        else:
+             raise FileNotFoundError(f"Ngspice not found in system PATH and no 'ngspice_path' configured.")
+
+def ngspice_env(pdk_root: str, pdk_code: str) -> dict:
+    """Environment for ngspice so that .spiceinit can locate the PDK."""
     env = os.environ.copy()
     env["PDK_ROOT"] = pdk_root
     env["PDK"] = pdk_code
-    
-    # Model configuration
-    # We rely on .spiceinit 'sourcepath' to find the library files
-    # so we just need the filename.
+    return env
+
+def model_library(device_name: str) -> str:
+    """
+    Corner library file for a device.
+    We rely on .spiceinit 'sourcepath' to find the library files
+    so we just need the filename.
+    """
     if "hv" in device_name.lower():
-        lib_filename = "cornerMOShv.lib"
+        return "cornerMOShv.lib"
+    return "cornerMOSlv.lib"
+
+def is_nmos(device_name: str) -> bool:
+    return "nmos" in device_name.lower()
+
+def resolve_output_format(sim_config: dict = None) -> str:
+    """Output format from the config: 'ascii' (wrdata, default) or 'binary' (rawfile)."""
+    if sim_config:
+        return sim_config.get("output_format", "ascii")
+    return "ascii"
+
+def resolve_corner(sim_config: dict = None) -> str:
+    """Process corner from the config ('corner'), 'tt' by default."""
+    corner = sim_config.get("corner", "tt") if sim_config else "tt"
+    if corner not in CORNERS:
+        raise ValueError(f"Unknown corner '{corner}', expected one of {list(CORNERS)}.")
+    return corner
+
+def resolve_engine(sim_config: dict = None) -> str:
+    """Simulation backend from the config: 'subprocess' (default), 'shared' or 'pool'."""
+    engine = sim_config.get("engine", "subprocess") if sim_config else "subprocess"
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {list(ENGINES)}.")
+    return engine
+
+def resolve_io_mode(sim_config: dict = None, engine: str = "subprocess") -> str:
+    """
+    I/O mode from the config ('io_mode'), adjusted to what `engine` and the
+    platform support: the pool workers read netlists from files and FIFOs
+    need os.mkfifo, so "pipe" falls back to "tmpfs" there.
+    """
+    io_mode = sim_config.get("io_mode", "files") if sim_config else "files"
+    if io_mode not in IO_MODES:
+        raise ValueError(f"Unknown io_mode '{io_mode}', expected one of {list(IO_MODES)}.")
+    if io_mode == "pipe" and (engine != "subprocess" or not hasattr(os, "mkfifo")):
+        io_mode = "tmpfs"
+    return io_mode
+
+def nice_prefix(sim_config: dict = None) -> list:
+    """
+    Command prefix that starts ngspice with the niceness 'nice' from the
+    config (e.g. for background runs), or [] if unset or `nice` is missing.
+    """
+    nice = int(sim_config.get("nice", 0)) if sim_config else 0
+    if nice == 0 or shutil.which("nice") is None:
+        return []
+    return ["nice", "-n", str(nice)]
+
+def tmpfs_root() -> Path:
+    """RAM-backed directory for run directories: /dev/shm if usable, else the system temp dir."""
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK | os.X_OK):
+        return shm / TMPFS_DIRNAME
+    return Path(tempfile.gettempdir()) / TMPFS_DIRNAME
+
+def format_values(values) -> str:
+    """Space-separated list for a control-block 'foreach', full precision."""
+    return " ".join(repr(float(v)) for v in values)
+
+def _new_sim_dir(io_mode: str = "files") -> Path:
+    run_id = str(uuid.uuid4())
+    if io_mode == "files":
+        # Use local directory to avoid potential temp permission/path issues with ngspice
+        work_dir = Path.cwd() / ".sim_buffer"
     else:
-        lib_filename = "cornerMOSlv.lib" 
+        # Nothing of the run reaches a persistent (possibly network) filesystem
+        work_dir = tmpfs_root()
+    work_dir.mkdir(exist_ok=True)
 
-    # Determine polarity and template
-    if "nmos" in device_name.lower():
-        template = NMOS_SWEEP_TEMPLATE
+    sim_dir = work_dir / run_id
+    sim_dir.mkdir(parents=True, exist_ok=True)
+    return sim_dir
+
+class _FifoReader(threading.Thread):
+    """
+    Collects everything written to a FIFO while ngspice runs.
+
+    The FIFO is opened read-write so that it never reports end-of-file:
+    ngspice may open and close it several times (appendwrite), and a run
+    that writes nothing must not leave the reader blocked.
+    """
+
+    def __init__(self, path: Path):
+        super().__init__(name="ngspice-fifo", daemon=True)
+        self.fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+        self.chunks = []
+        self.finished = threading.Event()
+
+    def _drain(self):
+        while True:
+            try:
+                chunk = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                return
+            if not chunk:
+                return
+            self.chunks.append(chunk)
+
+    def run(self):
+        while not self.finished.is_set():
+            ready, _, _ = select.select([self.fd], [], [], 0.05)
+            if ready:
+                self._drain()
+        self._drain()
+
+    def result(self) -> bytes:
+        """Stops reading (once ngspice has exited) and returns the data."""
+        self.finished.set()
+        self.join()
+        os.close(self.fd)
+        return b"".join(self.chunks)
+
+def _run_process(cmd: list, input: str, env: dict, limits: Limits) -> subprocess.CompletedProcess:
+    """
+    Runs ngspice in its own session under `limits` and returns the
+    CompletedProcess whatever the exit code; `timed_out` is set on it when
+    the watchdog killed the process group. With instrumentation on, the
+    pipes are drained by threads and the child is reaped with os.wait4 to
+    also record the spawn time and its peak RSS.
+    """
+    instrument = get_instrument()
+    measure = instrument.enabled and hasattr(os, "wait4")
+    with instrument.timer("spawn"):
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            env=env,
+            cwd=os.getcwd(),
+            start_new_session=True,
+            preexec_fn=limits.preexec_fn()
+        )
+    limits.apply(proc.pid)
+    captured = {}
+
+    def drain(name, stream):
+        captured[name] = stream.read()
+        stream.close()
+
+    try:
+        with Watchdog(proc, limits.timeout) as watchdog:
+            if not measure:
+                captured["stdout"], captured["stderr"] = proc.communicate(input)
+            else:
+                readers = [threading.Thread(target=drain, args=item) for item in (("stdout", proc.stdout), ("stderr", proc.stderr))]
+                for reader in readers:
+                    reader.start()
+                if input is not None:
+                    try:
+                        proc.stdin.write(input)
+                        proc.stdin.close()
+                    except BrokenPipeError:
+                        pass
+                for reader in readers:
+                    reader.join()
+                _, status, usage = os.wait4(proc.pid, 0)
+                proc.returncode = os.waitstatus_to_exitcode(status)
+                instrument.record_rss(rusage_peak_bytes(usage))
+    except BaseException:
+        # Interrupted (e.g. KeyboardInterrupt): the child is in its own
+        # session and would not get the signal
+        kill_process_group(proc)
+        try:
+            proc.wait()
+        except ChildProcessError:
+            pass
+        raise
+
+    result = subprocess.CompletedProcess(cmd, proc.returncode, captured["stdout"], captured["stderr"])
+    result.timed_out = watchdog.fired
+    return result
+
+def _run_attempt(netlist_content: str, netlist_file: Path, output_file: Path, ngspice_bin: str, env: dict, sim_config: dict, engine: str, io_mode: str, limits: Limits):
+    """One ngspice run of _run_netlist; raises SimulationError on failure."""
+    instrument = get_instrument()
+    use_stdin = engine == "subprocess" and io_mode != "files"
+    if not use_stdin:
+        with instrument.timer("write"):
+            with open(netlist_file, "w") as f:
+                f.write(netlist_content)
+
+    # Final check before running
+    check_ngspice(ngspice_bin, sim_config)
+
+    instrument.count("runs")
+    output = None
+    if engine == "pool":
+        try:
+            with instrument.timer("ngspice"):
+                stdout = get_worker_pool(sim_config, ngspice_bin, env).run_file(str(netlist_file))
+            stderr = ""
+        except WorkerError as e:
+            raise SimulationError.from_run(None, str(e), "", timed_out=isinstance(e, WorkerTimeout)) from e
     else:
-        template = PMOS_SWEEP_TEMPLATE
+        reader = None
+        if io_mode == "pipe":
+            os.mkfifo(output_file)
+            reader = _FifoReader(output_file)
+            reader.start()
+        try:
+            # Run ngspice from the CURRENT directory so it finds .spiceinit
+            # We pass the absolute path to netlist_file, or the netlist on stdin
+            cmd = [ngspice_bin, "-b"] if use_stdin else [ngspice_bin, "-b", str(netlist_file)]
+            cmd = nice_prefix(sim_config) + cmd
+
+            with instrument.timer("ngspice"):
+                result = _run_process(cmd, netlist_content if use_stdin else None, env, limits)
+            stdout, stderr = result.stdout, result.stderr
+        finally:
+            output = reader.result() if reader is not None else None
+        if result.returncode != 0 or result.timed_out:
+            raise SimulationError.from_run(result.returncode, stdout, stderr, result.timed_out, limits)
+
+    if instrument.enabled:
+        # Solver time as reported by ngspice, without startup and model loading
+        solve = parse_solve_time(stdout)
+        if solve is not None:
+            instrument.add_time("solve", solve)
+
+    if output is not None:
+        if not output:
+            raise SimulationError.from_run(0, stdout, stderr)
+        return output
+
+    if not output_file.exists():
+        raise SimulationError.from_run(0, stdout, stderr)
+    return str(output_file)
+
+def _retry_or_raise(error: SimulationError, attempt: int, limits: Limits, output_file: Path):
+    """
+    Counts the failed `attempt` (0 = first run) and re-raises `error` unless
+    it is transient and retries are left; a retried attempt's partial output
+    (or FIFO) is removed.
+    """
+    instrument = get_instrument()
+    instrument.count(f"failed_{error.kind}")
+    if error.kind not in TRANSIENT_KINDS or attempt >= limits.retries:
+        error.attempts = attempt + 1
+        raise error
+    instrument.count("retries")
+    output_file.unlink(missing_ok=True)
 
-    # Format netlist
-    # Note: we don't pass full path for model_path anymore, just the lib name 
+def _run_netlist(netlist_content: str, netlist_file: Path, output_file: Path, ngspice_bin: str, env: dict, sim_config: dict = None, engine: str = "subprocess", io_mode: str = "files"):
+    """
+    Runs the netlist with ngspice and checks that output was produced.
+    engine "subprocess" starts ngspice in batch mode, "pool" hands the netlist
+    to a warm pipe-mode worker.
+
+    In io_mode "files" the netlist is written to `netlist_file`; "pipe" and
+    "tmpfs" pass it on stdin instead, and "pipe" reads `output_file` from a
+    FIFO so the output never lands on disk.
+
+    Subprocess runs are held to the limits of the config (see
+    simulation/limits.py); timeouts and nonconvergence are retried with
+    relaxed convergence options up to 'sim_retries' times.
+
+    Returns (output, attempt): the output to hand to parse_output (a path,
+    or the output bytes in "pipe" mode) and the retry that produced it (0 =
+    the netlist as given, else run with relax_netlist(..., attempt)). Raises
+    SimulationError if ngspice failed or produced nothing.
+    """
+    limits = resolve_limits(sim_config)
+    attempt = 0
+    while True:
+        netlist = netlist_content if attempt == 0 else relax_netlist(netlist_content, attempt)
+        try:
+            output = _run_attempt(netlist, netlist_file, output_file, ngspice_bin, env, sim_config, engine, io_mode, limits)
+            return output, attempt
+        except SimulationError as e:
+            _retry_or_raise(e, attempt, limits, output_file)
+        attempt += 1
+
+def render_sweep_netlist(
+    device_name: str,
+    width: float,
+    length: float,
+    vds: float,
+    vgs_max: float,
+    vgs_step: float,
+    vbs: float,
+    ng: int,
+    m: int,
+    output_file: str,
+    output_format: str = "ascii",
+    corner: str = "tt"
+) -> str:
+    """Formats the single-point DC sweep netlist for a device."""
+    # Determine polarity and template
+    template = NMOS_SWEEP_TEMPLATE if is_nmos(device_name) else PMOS_SWEEP_TEMPLATE
+
+    # Note: we don't pass full path for model_path anymore, just the lib name
     # because spiceinit handles the search path.
-    netlist_content = template.format(
-        model_path=lib_filename,
+    return template.format(
+        model_path=model_library(device_name),
         model_name=device_name,
         width=width,
         length=length,
@@ -89,50 +391,398 @@ def run_dc_sweep(
         vgs_max=vgs_max,
         vgs_step=vgs_step,
         vbs=vbs,
-        output_file=str(output_file)
+        output_file=output_file,
+        corner=corner,
+        **output_placeholders(output_format)
     )
-    
-    with open(netlist_file, "w") as f:
-        f.write(netlist_content)
-        
-    # Final check before running
-    if not shutil.which(ngspice_bin) and not (os.path.isfile(ngspice_bin) and os.access(ngspice_bin, os.X_OK)):
-        if sim_config and "ngspice_path" in sim_config:
-             raise FileNotFoundError(f"Ngspice executable not found at configured path: '{sim_config['ngspice_path']}' (expanded: '{ngspice_bin}') and not in system PATH.")
-        else:
-             raise FileNotFoundError(f"Ngspice not found in system PATH and no 'ngspice_path' configured.")
 
-    try:
-        # Run ngspice from the CURRENT directory so it finds .spiceinit
-        # We pass the absolute path to netlist_file
-        cmd = [ngspice_bin, "-b", str(netlist_file)]
-        
-        result = subprocess.run(
-            cmd, 
-            capture_output=True, 
-            text=True, 
-            check=True,
-            env=env, # Pass env with PDK paths
-            cwd=os.getcwd() # Explicitly run from project root
+def sweep_cache_key(netlist_content: str, device_name: str, ngspice_bin: str, env: dict) -> str:
+    """
+    Cache key for a rendered netlist (output path replaced by OUTPUT_PLACEHOLDER):
+    covers the netlist, the ngspice version and the PDK files loaded through .spiceinit.
+    """
+    return ResultCache.make_key(
+        netlist_content,
+        ngspice_version(ngspice_bin),
+        spiceinit_dependencies(model_library(device_name), env)
+    )
+
+class _DcSweep:
+    """
+    Everything of one run_dc_sweep around the ngspice process: settings,
+    cache lookup, run directory, netlist, parsing and cache store. Shared by
+    run_dc_sweep and run_dc_sweep_async, which differ only in how they run
+    ngspice.
+    """
+
+    def __init__(self, device_name, width, length, vds, vgs_max, vgs_step, vbs, ng, m, sim_config=None, cache=None):
+        pdk_root, pdk_code, self.ngspice_bin = resolve_sim_settings(sim_config)
+        # Env variables for spiceinit
+        self.env = ngspice_env(pdk_root, pdk_code)
+        self.sim_config = sim_config
+        self.device_name = device_name
+        self.sweep_args = dict(
+            device_name=device_name,
+            width=width,
+            length=length,
+            vds=vds,
+            vgs_max=vgs_max,
+            vgs_step=vgs_step,
+            vbs=vbs,
+            ng=ng,
+            m=m,
+            output_format=resolve_output_format(sim_config),
+            corner=resolve_corner(sim_config),
         )
-        
-        # Parse results
-        if not output_file.exists():
-            print(f"Error: Output file not produced.\nSTDOUT: {result.stdout}\nSTDERR: {result.stderr}")
+        self.cache = cache if cache is not None else cache_from_config(sim_config)
+        self.cache_key = None
+        self.sim_dir = self.netlist_file = self.output_file = None
+
+    def lookup(self):
+        """The cached result, or None (also without a cache)."""
+        if self.cache is None:
             return None
-            
-        # Parse output
+        if self.cache_key is None:
+            self.cache_key = sweep_cache_key(
+                self.netlist(OUTPUT_PLACEHOLDER), self.device_name, self.ngspice_bin, self.env
+            )
+        return self.cache.get(self.cache_key)
+
+    def netlist(self, output_file: str) -> str:
+        return render_sweep_netlist(**self.sweep_args, output_file=output_file)
+
+    def prepare(self, io_mode: str) -> str:
+        """Creates the run directory; returns the netlist writing into it."""
+        self.sim_dir = _new_sim_dir(io_mode)
+        self.netlist_file = self.sim_dir / "input.cir"
+        self.output_file = self.sim_dir / OUTPUT_FILENAMES[self.sweep_args["output_format"]]
+        with get_instrument().timer("render"):
+            return self.netlist(str(self.output_file))
+
+    def finish(self, output, attempt: int = 0):
+        """Parses the output of _run_netlist and stores the result in the cache."""
         try:
-            return parse_ngspice_data(str(output_file), device_name)
+            data = parse_output(output, self.device_name, self.sweep_args["output_format"])
         except Exception as e:
-            print(f"Error reading simulation output: {e}")
-            return None
-            
-    except subprocess.CalledProcessError as e:
-        print(f"NGSPICE Execution Failed:\n{e.stdout}\n{e.stderr}")
-        return None
+            raise SimulationError("missing_output", f"unreadable output ({e})") from e
+        return self.store(data, attempt)
+
+    def store(self, data, attempt: int = 0):
+        """
+        Counts and caches `data`. A result of a relaxed retry (`attempt` > 0)
+        is marked with attrs['relaxed'] = attempt and not cached: it is not
+        what the nominal netlist, which the cache key stands for, gives.
+        """
+        get_instrument().count("points", len(data))
+        if attempt:
+            data.attrs['relaxed'] = attempt
+        elif self.cache is not None and not data.empty:
+            self.cache.put(self.cache_key, data)
+        return data
+
+    def cleanup(self):
+        if self.sim_dir is not None and self.sim_dir.exists():
+            shutil.rmtree(self.sim_dir, ignore_errors=True)
+
+@instrumented("dc_sweep")
+def run_dc_sweep(
+    device_name: str,
+    width: float,
+    length: float,
+    vds: float,
+    vgs_max: float,
+    vgs_step: float = 0.01,
+    vbs: float = 0.0,
+    ng: int = 1,
+    m: int = 1,
+    model_path: str = None,
+    sim_config: dict = None,
+    cache=None
+):
+    """
+    Runs a DC sweep for the given device parameters.
+    Returns a pandas DataFrame with results.
+
+    Results are served from / stored to `cache` (a ResultCache), or the
+    cache configured by 'cache_dir' in sim_config, when one is available.
+
+    sim_config 'engine' selects the backend: "subprocess" (default, one
+    ngspice process per sweep), "shared" (in-process libngspice that keeps
+    the models loaded between sweeps) or "pool" (warm pipe-mode ngspice
+    processes, see simulation/pool.py). 'io_mode' selects how the netlist
+    and output are exchanged (see IO_MODES).
+
+    Raises SimulationError when ngspice fails, runs into a limit of the
+    config or produces no output (see simulation/limits.py). A result that
+    needed relaxed convergence options carries attrs['relaxed'] (the retry)
+    and is not cached.
+    """
+    instrument = get_instrument()
+    sweep = _DcSweep(device_name, width, length, vds, vgs_max, vgs_step, vbs, ng, m, sim_config, cache)
+    cached = sweep.lookup()
+    if cached is not None:
+        instrument.count("cache_hits")
+        return cached
+
+    engine = resolve_engine(sim_config)
+    if engine == "shared":
+        instrument.count("runs")
+        with instrument.timer("ngspice"):
+            data = get_shared_engine(sim_config, sweep.env).run_sweep(sweep.netlist(OUTPUT_PLACEHOLDER))
+        return sweep.store(data)
+
+    io_mode = resolve_io_mode(sim_config, engine)
+    try:
+        netlist_content = sweep.prepare(io_mode)
+        output, attempt = _run_netlist(
+            netlist_content, sweep.netlist_file, sweep.output_file, sweep.ngspice_bin, sweep.env,
+            sim_config, engine, io_mode
+        )
+        return sweep.finish(output, attempt)
+    finally:
+        sweep.cleanup()
+
+def _run_batch_job(spec: dict, sim_config: dict, cache):
+    kwargs = dict(spec)
+    kwargs.setdefault("sim_config", sim_config)
+    if cache is not None:
+        kwargs.setdefault("cache", cache)
+    try:
+        return run_dc_sweep(**kwargs)
+    except SimulationError as e:
+        # One failed sweep does not end the batch
+        return e
+
+def run_dc_sweep_batch(
+    specs: list,
+    max_workers: int = None,
+    ordered: bool = True,
+    executor: str = "thread",
+    sim_config: dict = None,
+    cache=None
+):
+    """
+    Runs many DC sweeps concurrently and streams results back.
+
+    Args:
+        specs: List of run_dc_sweep keyword dicts (device_name, width, length, ...).
+        max_workers: Concurrent ngspice processes, defaults to the number of cores.
+        ordered: Yield in spec order if True, otherwise as soon as each job completes.
+        executor: "thread" (ngspice runs out of process, so threads scale) or
+            "process" to also spread output parsing over cores.
+        sim_config: Default sim_config for specs that don't carry their own.
+        cache: Optional ResultCache shared by all jobs (thread executor only;
+            process workers use the 'cache_dir' from sim_config instead).
+
+    Yields:
+        tuple: (index into specs, DataFrame, or the SimulationError of a failed sweep)
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    if executor == "thread":
+        pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ngspice")
+    elif executor == "process":
+        pool = ProcessPoolExecutor(max_workers=max_workers)
+        cache = None
+    else:
+        raise ValueError(f"Unknown executor '{executor}', expected 'thread' or 'process'.")
+
+    try:
+        futures = {
+            pool.submit(_run_batch_job, spec, sim_config, cache): index
+            for index, spec in enumerate(specs)
+        }
+        if ordered:
+            for future, index in futures.items():
+                yield index, future.result()
+        else:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+    finally:
+        # Stop queued jobs if the consumer bails out early
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def _run_deck(render, device_name: str, sim_config: dict, build):
+    """
+    Runs a netlist with several analyses (Vgs segments, LUT grids, corner
+    and Monte Carlo decks) in a real ngspice: the 'shared' engine only
+    handles single sweeps. render(output_file, output_format) returns the
+    netlist; the parsed output goes to build(frame, netlist), whose result
+    is returned. `netlist` has the output path replaced by OUTPUT_PLACEHOLDER.
+
+    Limits and retries are those of _run_netlist; a frame from a relaxed
+    retry carries attrs['relaxed']. Raises SimulationError on failure.
+    """
+    pdk_root, pdk_code, ngspice_bin = resolve_sim_settings(sim_config)
+    fmt = resolve_output_format(sim_config)
+    engine = resolve_engine(sim_config)
+    if engine == "shared":
+        engine = "subprocess"
+
+    io_mode = resolve_io_mode(sim_config, engine)
+    sim_dir = _new_sim_dir(io_mode)
+    netlist_file = sim_dir / "input.cir"
+    output_file = sim_dir / OUTPUT_FILENAMES[fmt]
+    env = ngspice_env(pdk_root, pdk_code)
+    netlist_content = render(str(output_file), fmt)
+
+    try:
+        output, attempt = _run_netlist(netlist_content, netlist_file, output_file, ngspice_bin, env, sim_config, engine, io_mode)
+        try:
+            frame = parse_output(output, device_name, fmt)
+            get_instrument().count("points", len(frame))
+            if attempt:
+                frame.attrs['relaxed'] = attempt
+            return build(frame, netlist_content.replace(str(output_file), OUTPUT_PLACEHOLDER))
+        except Exception as e:
+            raise SimulationError("missing_output", f"unreadable output ({e})") from e
     finally:
-        # Cleanup
-        # shutil.rmtree(sim_dir) # Keep for debugging if needed, or implement cleanup
         if sim_dir.exists():
             shutil.rmtree(sim_dir)
+
+def _lut_from_frame(frame, axes: dict, params: dict) -> LutResult:
+    """LutResult.from_frame of a _run_deck frame; a relaxed retry is recorded as params['relaxed']."""
+    if frame.attrs.get('relaxed'):
+        # Simulated with relaxed convergence options
+        params = dict(params, relaxed=frame.attrs['relaxed'])
+    return LutResult.from_frame(frame, axes=axes, params=params)
+
+def render_segments_netlist(
+    device_name: str,
+    width: float,
+    length: float,
+    vds: float,
+    segments: list,
+    vbs: float,
+    ng: int,
+    m: int,
+    output_file: str,
+    output_format: str = "ascii",
+    corner: str = "tt"
+) -> str:
+    """Formats a netlist that sweeps Vgs over each (start, stop, step) segment in turn."""
+    nmos = is_nmos(device_name)
+    template = NMOS_SEGMENTS_TEMPLATE if nmos else PMOS_SEGMENTS_TEMPLATE
+    placeholders = output_placeholders(output_format)
+    commands = "\n".join(
+        SEGMENT_COMMAND.format(
+            sign="" if nmos else "-",
+            start=repr(float(start)),
+            stop=repr(float(stop)),
+            step=repr(float(step)),
+            write_command=placeholders['write_command'],
+            output_file=output_file,
+            instance="xn1" if nmos else "xp1",
+            model_name=device_name
+        )
+        for start, stop, step in segments
+    )
+    return template.format(
+        model_path=model_library(device_name),
+        model_name=device_name,
+        width=width,
+        length=length,
+        ng=ng,
+        m=m,
+        vds=vds,
+        vbs=vbs,
+        segment_commands=commands,
+        corner=corner,
+        **placeholders
+    )
+
+@instrumented("vgs_segments")
+def run_vgs_segments(
+    device_name: str,
+    width: float,
+    length: float,
+    vds: float,
+    segments: list,
+    vbs: float = 0.0,
+    ng: int = 1,
+    m: int = 1,
+    sim_config: dict = None
+):
+    """
+    Sweeps several Vgs ranges of one bias point in a single ngspice run.
+
+    Args:
+        segments: List of (start, stop, step) Vgs magnitudes.
+
+    Returns:
+        DataFrame with the segments concatenated in order (as parse_ngspice_data),
+        or None if there are no segments. Raises SimulationError on failure.
+    """
+    if not segments:
+        return None
+
+    def render(output_file, fmt):
+        return render_segments_netlist(
+            device_name, width, length, vds, segments, vbs, ng, m, output_file, fmt, resolve_corner(sim_config)
+        )
+
+    return _run_deck(render, device_name, sim_config, lambda frame, netlist: frame)
+
+@instrumented("lut_sweep")
+def run_lut_sweep(
+    device_name: str,
+    width: float,
+    lengths: list,
+    vds_values: list,
+    vbs_values: list,
+    vgs_max: float,
+    vgs_step: float = 0.01,
+    ng: int = 1,
+    m: int = 1,
+    sim_config: dict = None
+):
+    """
+    Characterizes a full L x VDS x VBS x VGS grid in a single ngspice run.
+
+    The PDK models and OSDI modules are loaded once; the grid is walked by a
+    control-block loop. Lengths in meters, voltages as magnitudes (PMOS
+    polarity is handled by the template, like run_dc_sweep).
+
+    Returns:
+        LutResult with arrays shaped (len(lengths), len(vds_values), len(vbs_values), n_vgs).
+        Raises SimulationError on failure.
+    """
+    if len(lengths) == 0 or len(vds_values) == 0 or len(vbs_values) == 0:
+        raise ValueError("lengths, vds_values and vbs_values must not be empty.")
+
+    template = NMOS_LUT_TEMPLATE if is_nmos(device_name) else PMOS_LUT_TEMPLATE
+
+    def render(output_file, fmt):
+        return template.format(
+            model_path=model_library(device_name),
+            model_name=device_name,
+            width=width,
+            length=lengths[0],
+            ng=ng,
+            m=m,
+            lengths=format_values(lengths),
+            vds_values=format_values(vds_values),
+            vbs_values=format_values(vbs_values),
+            vgs_max=vgs_max,
+            vgs_step=vgs_step,
+            output_file=output_file,
+            corner=resolve_corner(sim_config),
+            **output_placeholders(fmt)
+        )
+
+    def build(frame, netlist):
+        params = {
+            'device_name': device_name,
+            'width': width,
+            # Identifies the simulated netlist (output path excluded)
+            'netlist_hash': ResultCache.make_key(netlist),
+            'corner': resolve_corner(sim_config),
+            'ng': ng,
+            'm': m,
+            'vgs_max': vgs_max,
+            'vgs_step': vgs_step,
+        }
+        return _lut_from_frame(frame, {'length': lengths, 'vds': vds_values, 'vbs': vbs_values}, params)
+
+    return _run_deck(render, device_name, sim_config, build)
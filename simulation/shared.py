@@ -0,0 +1,217 @@
+import ctypes
+import ctypes.util
+import os
+import re
+import threading
+import warnings
+
+import numpy as np
+
+from .limits import SimulationError, resolve_limits
+from .parser import RAW_VECTORS, derive_metrics
+
+# Output commands are dropped in shared mode: vectors are read from memory
+_OUTPUT_COMMANDS = ("wrdata", "write", "set filetype", "set appendwrite")
+
+
+class _VectorInfo(ctypes.Structure):
+    """struct vector_info from sharedspice.h"""
+    _fields_ = [
+        ("v_name", ctypes.c_char_p),
+        ("v_type", ctypes.c_int),
+        ("v_flags", ctypes.c_short),
+        ("v_realdata", ctypes.POINTER(ctypes.c_double)),
+        ("v_compdata", ctypes.c_void_p),
+        ("v_length", ctypes.c_int),
+    ]
+
+
+# Callback signatures from sharedspice.h
+_SendChar = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_void_p)
+_SendStat = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_void_p)
+_ControlledExit = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_int, ctypes.c_bool, ctypes.c_bool, ctypes.c_int, ctypes.c_void_p)
+_SendData = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_void_p)
+_SendInitData = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p)
+_BGThreadRunning = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_bool, ctypes.c_int, ctypes.c_void_p)
+
+
+def find_libngspice(sim_config: dict = None) -> str:
+    """Path of libngspice from 'libngspice_path' in the config, or the system library search."""
+    if sim_config and sim_config.get("libngspice_path"):
+        return os.path.expanduser(sim_config["libngspice_path"])
+    return ctypes.util.find_library("ngspice") or "libngspice.so"
+
+
+def load_library(lib_path: str):
+    """Loads libngspice and declares the prototypes used by SharedNgspice."""
+    lib = ctypes.CDLL(lib_path)
+    lib.ngSpice_Init.argtypes = [_SendChar, _SendStat, _ControlledExit, _SendData, _SendInitData, _BGThreadRunning, ctypes.c_void_p]
+    lib.ngSpice_Init.restype = ctypes.c_int
+    lib.ngSpice_Command.argtypes = [ctypes.c_char_p]
+    lib.ngSpice_Command.restype = ctypes.c_int
+    lib.ngSpice_Circ.argtypes = [ctypes.POINTER(ctypes.c_char_p)]
+    lib.ngSpice_Circ.restype = ctypes.c_int
+    lib.ngGet_Vec_Info.argtypes = [ctypes.c_char_p]
+    lib.ngGet_Vec_Info.restype = ctypes.POINTER(_VectorInfo)
+    lib.ngSpice_CurPlot.argtypes = []
+    lib.ngSpice_CurPlot.restype = ctypes.c_char_p
+    return lib
+
+
+def split_netlist(netlist: str):
+    """
+    Splits a rendered template into circuit lines and control commands.
+    Output commands are removed from the control section.
+
+    Returns:
+        tuple: (circuit_lines, control_commands)
+    """
+    circuit, control = [], []
+    in_control = False
+    for line in netlist.splitlines():
+        stripped = line.strip()
+        low = stripped.lower()
+        if low.startswith(".control"):
+            in_control = True
+        elif low.startswith(".endc"):
+            in_control = False
+        elif in_control:
+            if stripped and not stripped.startswith("*") and not low.startswith(_OUTPUT_COMMANDS):
+                control.append(stripped)
+        else:
+            circuit.append(line)
+    return circuit, control
+
+
+class SharedNgspice:
+    """
+    In-process ngspice driven through libngspice.
+
+    .spiceinit (and with it the OSDI modules) is evaluated once by
+    ngSpice_Init, so every later sweep only pays for parsing the netlist and
+    the DC solve. libngspice keeps global state, so there is one engine per
+    process (see get_shared_engine); calls are serialized by a lock.
+    """
+
+    def __init__(self, lib, env: dict | None = None):
+        self._lib = lib
+        self._lock = threading.Lock()
+        self._output = []
+        self._exited = False
+
+        # .spiceinit resolves $PDK_ROOT/$PDK from the process environment
+        for key, value in (env or {}).items():
+            os.environ[key] = value
+
+        # Keep references so the callbacks are not garbage collected
+        self._callbacks = (
+            _SendChar(self._on_char),
+            _SendStat(lambda text, ident, user: 0),
+            _ControlledExit(self._on_exit),
+            _SendData(0),
+            _SendInitData(0),
+            _BGThreadRunning(lambda running, ident, user: 0),
+        )
+        self._lib.ngSpice_Init(*self._callbacks, None)
+
+    def _on_char(self, text, ident, user):
+        self._output.append(text.decode(errors="replace") if text else "")
+        return 0
+
+    def _on_exit(self, status, unload, quit_request, ident, user):
+        # Never let ngspice terminate the host process
+        self._exited = True
+        return 0
+
+    def command(self, cmd: str) -> int:
+        return self._lib.ngSpice_Command(cmd.encode())
+
+    def load_circuit(self, lines: list):
+        """Sends a circuit as with 'source', without a file."""
+        # The first line is taken as the title
+        while lines and not lines[0].strip():
+            lines = lines[1:]
+        encoded = [line.encode() for line in lines]
+        array = (ctypes.c_char_p * (len(encoded) + 1))(*encoded, None)
+        return self._lib.ngSpice_Circ(array)
+
+    def vector(self, name: str):
+        """Copy of a real vector of the current plot, or None if it does not exist."""
+        info = self._lib.ngGet_Vec_Info(name.encode())
+        if not info:
+            return None
+        info = info.contents
+        if not info.v_realdata or info.v_length <= 0:
+            return None
+        return np.ctypeslib.as_array(info.v_realdata, shape=(info.v_length,)).copy()
+
+    def run_sweep(self, netlist: str):
+        """
+        Runs a rendered DC sweep template and returns the parse_ngspice_data frame.
+        Raises SimulationError if libngspice rejects the circuit or a command,
+        or if the solve produced no data.
+        """
+        circuit, control = split_netlist(netlist)
+        # The saved device vectors, in template order
+        saves = next((c for c in control if c.lower().startswith("save")), "")
+        names = re.findall(r"@\S+\[\w+\]", saves)
+
+        with self._lock:
+            if self._exited:
+                raise RuntimeError("libngspice requested exit; the shared engine can no longer be used.")
+            self._output.clear()
+            vectors = []
+            try:
+                # Non-zero: ngspice rejected the circuit or the command
+                status = self.load_circuit(circuit)
+                for cmd in control:
+                    if status:
+                        break
+                    status = self.command(cmd)
+
+                if not status:
+                    vectors = [self.vector("v-sweep")]
+                    for vector in RAW_VECTORS:
+                        match = [n for n in names if n.lower().endswith(f"[{vector}]")]
+                        vectors.append(self.vector(match[0]) if match else None)
+            finally:
+                # Free the plot and the circuit, models stay loaded
+                self.command("destroy all")
+                self.command("remcirc")
+                # Read before the next caller clears it
+                output = "\n".join(self._output)
+
+        if status or any(v is None for v in vectors):
+            raise SimulationError.from_run(status, output, "")
+        return derive_metrics(*vectors)
+
+
+_engine = None
+_engine_key = None
+_engine_lock = threading.Lock()
+
+
+def get_shared_engine(sim_config: dict, env: dict) -> SharedNgspice:
+    """
+    Process-wide SharedNgspice, created on first use.
+    libngspice cannot be re-initialized for a different PDK in the same process.
+    It runs inside this process, so the limits of the config (sim_timeout,
+    sim_cpu_time, sim_memory_mb) cannot be enforced; they draw a warning.
+    """
+    global _engine, _engine_key
+    lib_path = find_libngspice(sim_config)
+    key = (lib_path, env.get("PDK_ROOT"), env.get("PDK"))
+    with _engine_lock:
+        if _engine is None:
+            limits = resolve_limits(sim_config)
+            if limits.timeout or limits.cpu_time or limits.memory_mb:
+                warnings.warn(
+                    "The 'shared' engine runs ngspice in-process and ignores 'sim_timeout', 'sim_cpu_time' "
+                    "and 'sim_memory_mb'; use the 'subprocess' or 'pool' engine to enforce them.",
+                    RuntimeWarning, stacklevel=2
+                )
+            _engine = SharedNgspice(load_library(lib_path), {k: env[k] for k in ("PDK_ROOT", "PDK") if k in env})
+            _engine_key = key
+        elif key != _engine_key:
+            raise RuntimeError(f"Shared ngspice engine already initialized for {_engine_key}, cannot switch to {key}.")
+        return _engine
@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+
+from .query import GmIdLookup
+from .runner import run_dc_sweep
+
+# Candidates per sizing: every characterized length x this many gm/Id values
+DEFAULT_GM_ID_POINTS = 128
+
+# Upper bound on the finger count tried to keep the finger width in limits
+DEFAULT_MAX_NG = 64
+
+# Objectives of the Pareto set; the ones in MAXIMIZED are better when larger
+DEFAULT_OBJECTIVES = ('id', 'area', 'ft')
+MAXIMIZED = {'ft', 'gm_gds', 'gm_id'}
+
+
+def pareto_mask(costs: np.ndarray) -> np.ndarray:
+    """
+    Boolean mask of the non-dominated rows of `costs` (n points x k
+    objectives, all minimized). Each pass removes everything the current
+    point dominates, so the cost is O(n * front size) array work.
+    """
+    n = len(costs)
+    index = np.arange(n)
+    remaining = costs
+    i = 0
+    while i < len(remaining):
+        better = np.any(remaining < remaining[i], axis=1) | np.all(remaining == remaining[i], axis=1)
+        index, remaining = index[better], remaining[better]
+        i = int(np.count_nonzero(better[:i])) + 1
+    mask = np.zeros(n, dtype=bool)
+    mask[index] = True
+    return mask
+
+
+def size_device(
+    lookup: GmIdLookup,
+    gm: float = None,
+    ids: float = None,
+    vds: float = None,
+    vbs: float = None,
+    min_gm_gds: float = None,
+    min_ft: float = None,
+    limits: dict = None,
+    max_ng: int = DEFAULT_MAX_NG,
+    gm_id_values=None,
+    objectives: tuple = DEFAULT_OBJECTIVES
+) -> pd.DataFrame:
+    """
+    Finds the (W, L, ng) sizings that meet a gm or Id target at a bias point.
+
+    Every characterized length is combined with every gm/Id value in one
+    vectorized lookup; W follows from the target current and Id/W, ng from
+    the finger width limits. Candidates violating min_gm_gds, min_ft or the
+    device limits are dropped and the Pareto set over `objectives` is kept.
+
+    Args:
+        lookup: GmIdLookup of the device (lengths in meters).
+        gm / ids: Target transconductance [S] or drain current [A], one of them.
+        vds, vbs: Bias point [V], as magnitudes like the characterization.
+        limits: Device entry of the process config (min/max_width and
+            min/max_length in um per finger, max_vgs), e.g.
+            config['devices']['sg13_lv_nmos'].
+        gm_id_values: gm/Id values to try, default DEFAULT_GM_ID_POINTS
+            across the characterized range.
+        objectives: Columns to trade off; 'ft', 'gm_gds' and 'gm_id' are
+            maximized, everything else minimized.
+
+    Returns:
+        DataFrame with one row per Pareto-optimal sizing, sorted by Id:
+        width (total, m), length (m), ng, gm_id, id, gm, gm_gds, ft, vgs and
+        area (W * L, m^2). Empty if nothing meets the targets.
+    """
+    if (gm is None) == (ids is None):
+        raise ValueError("Give exactly one of gm and ids.")
+    limits = limits or {}
+
+    lengths = lookup.axes['length']
+    if 'min_length' in limits:
+        lengths = lengths[lengths >= limits['min_length'] * 1e-6 * (1 - 1e-9)]
+    if 'max_length' in limits:
+        lengths = lengths[lengths <= limits['max_length'] * 1e-6 * (1 + 1e-9)]
+    if gm_id_values is None:
+        axis = lookup.gm_id_axis
+        gm_id_values = np.linspace(axis[0], axis[-1], DEFAULT_GM_ID_POINTS)
+    gm_id_values = np.asarray(gm_id_values, dtype=np.float64)
+
+    # L along rows, gm/Id along columns
+    length = np.broadcast_to(lengths[:, None], (len(lengths), len(gm_id_values)))
+    gm_id = np.broadcast_to(gm_id_values[None, :], length.shape)
+    metrics = {
+        metric: lookup.lookup(metric, gm_id, length, vds, vbs)
+        for metric in ('id_w', 'gm_gds', 'ft', 'vgs') if metric in lookup.tables
+    }
+    if 'id_w' not in metrics:
+        raise ValueError("The lookup needs the 'id_w' metric.")
+
+    id_target = gm / gm_id if gm is not None else np.full(gm_id.shape, float(ids))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        width = id_target / metrics['id_w']
+
+    ok = np.isfinite(width) & (width > 0)
+    for values in metrics.values():
+        ok &= np.isfinite(values)
+    # Fewest fingers that keep the finger width below max_width
+    if 'max_width' in limits:
+        ng = np.ceil(np.where(ok, width, 0.0) / (limits['max_width'] * 1e-6) - 1e-9).clip(min=1)
+    else:
+        ng = np.ones(width.shape)
+    ok &= ng <= max_ng
+    if 'min_width' in limits:
+        ok &= width >= ng * limits['min_width'] * 1e-6 * (1 - 1e-9)
+    if min_gm_gds is not None and 'gm_gds' in metrics:
+        ok &= metrics['gm_gds'] >= min_gm_gds
+    if min_ft is not None and 'ft' in metrics:
+        ok &= metrics['ft'] >= min_ft
+    if 'max_vgs' in limits and 'vgs' in metrics:
+        ok &= metrics['vgs'] <= limits['max_vgs']
+
+    columns = {
+        'width': width[ok],
+        'length': length[ok],
+        'ng': ng[ok].astype(int),
+        'gm_id': gm_id[ok],
+        'id': id_target[ok],
+        'gm': id_target[ok] * gm_id[ok],
+    }
+    for metric in ('gm_gds', 'ft', 'vgs'):
+        if metric in metrics:
+            columns[metric] = metrics[metric][ok]
+    columns['area'] = columns['width'] * columns['length']
+    candidates = pd.DataFrame(columns)
+
+    if len(candidates):
+        costs = np.column_stack([
+            -candidates[name].to_numpy() if name in MAXIMIZED else candidates[name].to_numpy()
+            for name in objectives
+        ])
+        candidates = candidates[pareto_mask(costs)]
+    result = candidates.sort_values('id').reset_index(drop=True)
+    result.attrs['targets'] = {
+        'gm': gm, 'ids': ids, 'vds': vds, 'vbs': vbs, 'min_gm_gds': min_gm_gds, 'min_ft': min_ft,
+    }
+    return result
+
+
+def verify_sizing(
+    device_name: str,
+    sizing,
+    vds: float,
+    vgs_max: float,
+    vbs: float = 0.0,
+    vgs_step: float = 0.01,
+    sim_config: dict = None
+) -> dict | None:
+    """
+    Simulates one sizing (a row of size_device) with a single ngspice sweep
+    and reads it at the chosen gm/Id.
+
+    Returns:
+        Dict with the simulated id, gm, gm_gds, ft and vgs, plus their
+        relative deviation from the prediction ('<name>_error'), or None
+        if the sweep never reaches the gm/Id. Raises SimulationError if the
+        simulation failed.
+    """
+    frame = run_dc_sweep(
+        device_name=device_name,
+        width=float(sizing['width']),
+        length=float(sizing['length']),
+        vds=vds,
+        vgs_max=vgs_max,
+        vgs_step=vgs_step,
+        vbs=vbs,
+        ng=int(sizing['ng']),
+        sim_config=sim_config
+    )
+    if frame.empty:
+        return None
+
+    width = float(sizing['width'])
+    gm_id = float(sizing['gm_id'])
+    lookup = GmIdLookup.from_frame(frame, {'width': width}, metrics=('id_w', 'gm_gds', 'ft', 'vgs'))
+    ids = float(lookup.id_w(gm_id)) * width
+    if not np.isfinite(ids):
+        return None
+
+    simulated = {
+        'id': ids,
+        'gm': ids * gm_id,
+        'gm_gds': float(lookup.gm_gds(gm_id)),
+        'ft': float(lookup.ft(gm_id)),
+        'vgs': float(lookup.lookup('vgs', gm_id)),
+    }
+    for name, value in list(simulated.items()):
+        predicted = sizing.get(name) if hasattr(sizing, 'get') else None
+        if predicted is not None and predicted != 0:
+            simulated[f'{name}_error'] = value / float(predicted) - 1
+    return simulated
@@ -0,0 +1,209 @@
+import asyncio
+import threading
+
+from .async_runner import cached_dc_sweep, run_dc_sweep_async
+from .cache import cache_from_config
+from .limits import SimulationError
+
+# Widget increments of the app, in its units (um, V): the most likely next request
+NEIGHBOUR_STEPS = {'width': 1.0, 'length': 0.5, 'vds': 0.1, 'vbs': 0.1}
+
+# Sweeps pre-simulated per idle period
+DEFAULT_BUDGET = 8
+
+# Concurrent speculative ngspice processes
+DEFAULT_WORKERS = 1
+
+# Seconds the user has to stay idle before speculation starts
+DEFAULT_IDLE_DELAY = 0.5
+
+# Niceness of speculative ngspice processes
+DEFAULT_NICE = 15
+
+
+def neighbours(params: dict, steps: dict = NEIGHBOUR_STEPS, bounds: dict = None) -> list:
+    """
+    Parameter dicts one step away from `params` along each axis in `steps`
+    (+ before -), skipping values outside `bounds` (name -> (min, max)).
+    Values are rounded to 9 decimals, like repeated widget increments.
+    """
+    bounds = bounds or {}
+    result = []
+    for name, step in steps.items():
+        if name not in params:
+            continue
+        for direction in (1, -1):
+            value = round(params[name] + direction * step, 9)
+            low, high = bounds.get(name, (None, None))
+            if (low is not None and value < low) or (high is not None and value > high):
+                continue
+            result.append(dict(params, **{name: value}))
+    return result
+
+
+def sweep_args(params: dict) -> dict:
+    """run_dc_sweep arguments for the app's parameter dict (um -> m), as app.py passes them."""
+    return dict(
+        device_name=params['device_name'],
+        width=params['width'] * 1e-6,
+        length=params['length'] * 1e-6,
+        vds=params['vds'],
+        vgs_max=params['vgs_max'],
+        vgs_step=params.get('vgs_step', 0.01),
+        vbs=params['vbs'],
+        ng=int(params['ng']),
+        m=int(params['m']),
+    )
+
+
+class SpeculativeExecutor:
+    """
+    Pre-simulates the neighbours of the last request into the result cache
+    while the user is idle, so that the next widget step is a cache hit.
+
+    Runs go through run_dc_sweep_async on a private event loop, at most
+    `workers` at a time, `budget` per idle period and with a raised
+    niceness. A new speculation replaces the previous one of its channel;
+    cancel() (call it when a real request arrives) kills every speculative
+    ngspice process at once.
+    """
+
+    def __init__(
+        self,
+        sim_config: dict,
+        budget: int = DEFAULT_BUDGET,
+        workers: int = DEFAULT_WORKERS,
+        idle_delay: float = DEFAULT_IDLE_DELAY,
+        nice: int = DEFAULT_NICE,
+        steps: dict = NEIGHBOUR_STEPS
+    ):
+        self.cache = cache_from_config(sim_config)
+        if self.cache is None:
+            raise ValueError("Speculative runs need the result cache ('cache_dir').")
+        self.sim_config = dict(sim_config, nice=nice)
+        self.budget = budget
+        self.workers = workers
+        self.idle_delay = idle_delay
+        self.steps = steps
+        self.started = 0
+        self.completed = 0
+        self.cancelled = 0
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._current = {}
+
+    @classmethod
+    def from_config(cls, sim_config: dict | None):
+        """
+        Executor configured by 'speculate' (enable), 'speculate_budget',
+        'speculate_workers' and 'speculate_idle' in the config, or None when
+        disabled or no 'cache_dir' is set.
+        """
+        if not sim_config or not sim_config.get("speculate") or not sim_config.get("cache_dir"):
+            return None
+        return cls(
+            sim_config,
+            budget=int(sim_config.get("speculate_budget", DEFAULT_BUDGET)),
+            workers=int(sim_config.get("speculate_workers", DEFAULT_WORKERS)),
+            idle_delay=float(sim_config.get("speculate_idle", DEFAULT_IDLE_DELAY)),
+        )
+
+    def _ensure_loop(self):
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="speculative-runner", daemon=True)
+            self._thread.start()
+        return self._loop
+
+    async def _run_one(self, semaphore: asyncio.Semaphore, params: dict) -> bool:
+        async with semaphore:
+            with self._lock:
+                self.started += 1
+            try:
+                await run_dc_sweep_async(**sweep_args(params), sim_config=self.sim_config, cache=self.cache)
+            except SimulationError:
+                # A neighbour that does not simulate is not worth reporting
+                return False
+            with self._lock:
+                self.completed += 1
+            return True
+
+    async def _speculate(self, params: dict, bounds: dict) -> int:
+        await asyncio.sleep(self.idle_delay)
+        todo = []
+        for candidate in neighbours(params, self.steps, bounds):
+            if len(todo) >= self.budget:
+                break
+            cached = await asyncio.to_thread(cached_dc_sweep, **sweep_args(candidate), sim_config=self.sim_config, cache=self.cache)
+            if cached is None:
+                todo.append(candidate)
+        semaphore = asyncio.Semaphore(self.workers)
+        results = await asyncio.gather(*(self._run_one(semaphore, candidate) for candidate in todo))
+        return sum(results)
+
+    def speculate(self, channel, params: dict, bounds: dict = None):
+        """
+        Starts pre-simulating the neighbours of `params` (the app's parameter
+        dict) for `channel`, replacing its previous speculation.
+
+        Returns:
+            concurrent.futures.Future with the number of sweeps simulated.
+        """
+        with self._lock:
+            loop = self._ensure_loop()
+            previous = self._current.get(channel)
+            if previous is not None and previous.cancel():
+                self.cancelled += 1
+            future = asyncio.run_coroutine_threadsafe(self._speculate(dict(params), bounds), loop)
+            self._current[channel] = future
+            return future
+
+    def cancel(self, channel=None):
+        """Cancels the speculation of `channel`, or all of them (killing their ngspice processes)."""
+        with self._lock:
+            channels = list(self._current) if channel is None else [channel]
+            for key in channels:
+                future = self._current.pop(key, None)
+                if future is not None and future.cancel():
+                    self.cancelled += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'started': self.started, 'completed': self.completed, 'cancelled': self.cancelled}
+
+    def close(self):
+        self.cancel()
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is not None:
+            # Let the cancelled runs kill their processes before stopping
+            asyncio.run_coroutine_threadsafe(asyncio.sleep(0.05), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.run_until_complete(loop.shutdown_default_executor())
+            loop.close()
+
+
+_executor = None
+_executor_config = None
+_executor_lock = threading.Lock()
+
+
+def get_speculative_executor(sim_config: dict | None):
+    """
+    Process-wide SpeculativeExecutor shared by all app sessions (one channel
+    each), or None when speculation is not enabled in the config.
+
+    A reloaded config with other settings (speculation, cache, simulator)
+    closes the executor and builds a new one from it.
+    """
+    global _executor, _executor_config
+    with _executor_lock:
+        if sim_config is not _executor_config and sim_config != _executor_config:
+            if _executor is not None:
+                _executor.close()
+            _executor = SpeculativeExecutor.from_config(sim_config)
+        _executor_config = sim_config
+        return _executor
@@ -4,7 +4,7 @@
 
 NMOS_SWEEP_TEMPLATE = """
 * NMOS gm/Id Sweep
-.lib '{model_path}' mos_tt
+.lib '{model_path}' mos_{corner}
 
 * Supply
 Vds d 0 DC {vds}
@@ -18,20 +18,22 @@ Xn1 d g 0 b {model_name} w={width} l={length} ng={ng} m={m}
 .dc Vgate 0 {vgs_max} {vgs_step}
 
 .control
+{output_options}
 save all @n.xn1.n{model_name}[ids] @n.xn1.n{model_name}[gm] @n.xn1.n{model_name}[gds] @n.xn1.n{model_name}[cgg]
 run
 * Save variables
 * We save: Id, gm, gds, cgg
-* Note: wrdata stores [X Val1 X Val2 X Val3 ...]
+* Note: wrdata stores [X Val1 X Val2 X Val3 ...],
+* 'write' (binary rawfile) stores the scale once
 * Vectors: ids, gm, gds, cgg
-wrdata {output_file} @n.xn1.n{model_name}[ids] @n.xn1.n{model_name}[gm] @n.xn1.n{model_name}[gds] @n.xn1.n{model_name}[cgg]
+{write_command} {output_file} @n.xn1.n{model_name}[ids] @n.xn1.n{model_name}[gm] @n.xn1.n{model_name}[gds] @n.xn1.n{model_name}[cgg]
 .endc
 .end
 """
 
 PMOS_SWEEP_TEMPLATE = """
 * PMOS gm/Id Sweep
-.lib '{model_path}' mos_tt
+.lib '{model_path}' mos_{corner}
 
 * Supply
 Vds d 0 DC -{vds}
@@ -45,10 +47,216 @@ Xp1 d g 0 b {model_name} w={width} l={length} ng={ng} m={m}
 .dc Vgate 0 -{vgs_max} -{vgs_step}
 
 .control
+{output_options}
 save all @n.xp1.n{model_name}[ids] @n.xp1.n{model_name}[gm] @n.xp1.n{model_name}[gds] @n.xp1.n{model_name}[cgg]
 run
 * Save variables: Id, gm, gds, cgg
-wrdata {output_file} @n.xp1.n{model_name}[ids] @n.xp1.n{model_name}[gm] @n.xp1.n{model_name}[gds] @n.xp1.n{model_name}[cgg]
+{write_command} {output_file} @n.xp1.n{model_name}[ids] @n.xp1.n{model_name}[gm] @n.xp1.n{model_name}[gds] @n.xp1.n{model_name}[cgg]
 .endc
 .end
 """
+
+# Lookup-table characterization: one ngspice run sweeps the full
+# L x VDS x VBS x VGS grid from a control-block loop. Models are parsed once;
+# 'alterparam' + 'reset' re-elaborates the instance for each length and
+# 'alter' changes the bias sources in place.
+# The output command appends one block per (L, VDS, VBS) point (a wrdata
+# [X Val1 X Val2 ...] block, or a rawfile plot in binary mode), in loop order, so the output reshapes directly into (L, VDS, VBS, VGS).
+
+NMOS_LUT_TEMPLATE = """
+* NMOS gm/Id LUT characterization
+.lib '{model_path}' mos_{corner}
+.param lval={length}
+
+* Supply (values set from the control loop)
+Vds d 0 DC 0
+Vgate g 0 DC 0
+Vbs b 0 DC 0
+
+* Device under test
+Xn1 d g 0 b {model_name} w={width} l={{lval}} ng={ng} m={m}
+
+.control
+{output_options}
+set appendwrite
+foreach l_i {lengths}
+  alterparam lval = $l_i
+  reset
+  save all @n.xn1.n{model_name}[ids] @n.xn1.n{model_name}[gm] @n.xn1.n{model_name}[gds] @n.xn1.n{model_name}[cgg]
+  foreach vds_i {vds_values}
+    alter @vds[dc] = $vds_i
+    foreach vbs_i {vbs_values}
+      alter @vbs[dc] = $vbs_i
+      dc Vgate 0 {vgs_max} {vgs_step}
+      {write_command} {output_file} @n.xn1.n{model_name}[ids] @n.xn1.n{model_name}[gm] @n.xn1.n{model_name}[gds] @n.xn1.n{model_name}[cgg]
+      destroy all
+    end
+  end
+end
+.endc
+.end
+"""
+
+PMOS_LUT_TEMPLATE = """
+* PMOS gm/Id LUT characterization
+.lib '{model_path}' mos_{corner}
+.param lval={length}
+
+* Supply (values set from the control loop)
+Vds d 0 DC 0
+Vgate g 0 DC 0
+Vbs b 0 DC 0
+
+* Device
+Xp1 d g 0 b {model_name} w={width} l={{lval}} ng={ng} m={m}
+
+.control
+{output_options}
+set appendwrite
+foreach l_i {lengths}
+  alterparam lval = $l_i
+  reset
+  save all @n.xp1.n{model_name}[ids] @n.xp1.n{model_name}[gm] @n.xp1.n{model_name}[gds] @n.xp1.n{model_name}[cgg]
+  foreach vds_i {vds_values}
+    alter @vds[dc] = -$vds_i
+    foreach vbs_i {vbs_values}
+      alter @vbs[dc] = $vbs_i
+      dc Vgate 0 -{vgs_max} -{vgs_step}
+      {write_command} {output_file} @n.xp1.n{model_name}[ids] @n.xp1.n{model_name}[gm] @n.xp1.n{model_name}[gds] @n.xp1.n{model_name}[cgg]
+      destroy all
+    end
+  end
+end
+.endc
+.end
+"""
+
+# Several Vgs segments of one bias point in a single run (adaptive sweeps).
+# {segment_commands} holds one 'dc' + output command + 'destroy all' per
+# segment (see SEGMENT_COMMAND); outputs are appended in segment order.
+
+NMOS_SEGMENTS_TEMPLATE = """
+* NMOS gm/Id Sweep segments
+.lib '{model_path}' mos_{corner}
+
+* Supply
+Vds d 0 DC {vds}
+Vgate g 0 DC 0
+Vbs b 0 DC {vbs}
+
+* Device under test
+Xn1 d g 0 b {model_name} w={width} l={length} ng={ng} m={m}
+
+.control
+{output_options}
+set appendwrite
+save all @n.xn1.n{model_name}[ids] @n.xn1.n{model_name}[gm] @n.xn1.n{model_name}[gds] @n.xn1.n{model_name}[cgg]
+{segment_commands}
+.endc
+.end
+"""
+
+PMOS_SEGMENTS_TEMPLATE = """
+* PMOS gm/Id Sweep segments
+.lib '{model_path}' mos_{corner}
+
+* Supply
+Vds d 0 DC -{vds}
+Vgate g 0 DC 0
+Vbs b 0 DC {vbs}
+
+* Device
+Xp1 d g 0 b {model_name} w={width} l={length} ng={ng} m={m}
+
+.control
+{output_options}
+set appendwrite
+save all @n.xp1.n{model_name}[ids] @n.xp1.n{model_name}[gm] @n.xp1.n{model_name}[gds] @n.xp1.n{model_name}[cgg]
+{segment_commands}
+.endc
+.end
+"""
+
+# One segment; {sign} is '-' for PMOS. {instance} is xn1 / xp1.
+SEGMENT_COMMAND = """dc Vgate {sign}{start} {sign}{stop} {sign}{step}
+{write_command} {output_file} @n.{instance}.n{model_name}[ids] @n.{instance}.n{model_name}[gm] @n.{instance}.n{model_name}[gds] @n.{instance}.n{model_name}[cgg]
+destroy all"""
+
+# Corner / temperature decks: the device circuit alone (no analysis), loaded
+# once per process corner into the same ngspice session. The first corner
+# is the deck's own circuit; later ones replace it with 'remcirc' and
+# 'circbyline', which re-reads the model library with another section.
+# Each corner then sweeps Vgs once per temperature ('option temp').
+# Outputs are appended corner-major, temperature-minor.
+
+NMOS_CIRCUIT_TEMPLATE = """* NMOS gm/Id corner sweep
+.lib '{model_path}' mos_{corner}
+Vds d 0 DC {vds}
+Vgate g 0 DC 0
+Vbs b 0 DC {vbs}
+Xn1 d g 0 b {model_name} w={width} l={length} ng={ng} m={m}
+"""
+
+PMOS_CIRCUIT_TEMPLATE = """* PMOS gm/Id corner sweep
+.lib '{model_path}' mos_{corner}
+Vds d 0 DC -{vds}
+Vgate g 0 DC 0
+Vbs b 0 DC {vbs}
+Xp1 d g 0 b {model_name} w={width} l={length} ng={ng} m={m}
+"""
+
+CORNER_DECK_TEMPLATE = """{circuit}
+.control
+{output_options}
+set appendwrite
+{corner_commands}
+.endc
+.end
+"""
+
+# Temperature loop of one corner. {sign} is '-' for PMOS, {instance} is xn1 / xp1.
+TEMPERATURE_COMMANDS = """save all @n.{instance}.n{model_name}[ids] @n.{instance}.n{model_name}[gm] @n.{instance}.n{model_name}[gds] @n.{instance}.n{model_name}[cgg]
+foreach t_i {temperatures}
+  option temp = $t_i
+  dc Vgate 0 {sign}{vgs_max} {sign}{vgs_step}
+  {write_command} {output_file} @n.{instance}.n{model_name}[ids] @n.{instance}.n{model_name}[gm] @n.{instance}.n{model_name}[gds] @n.{instance}.n{model_name}[cgg]
+  destroy all
+end"""
+
+# Monte Carlo: the deck's circuit uses a statistical library section and
+# 'mc_source' reloads it before every run, drawing new mismatch parameters.
+MONTE_CARLO_DECK_TEMPLATE = """{circuit}
+.control
+{output_options}
+set appendwrite
+setseed {seed}
+repeat {runs}
+  mc_source
+  option temp = {temperature}
+  save all @n.{instance}.n{model_name}[ids] @n.{instance}.n{model_name}[gm] @n.{instance}.n{model_name}[gds] @n.{instance}.n{model_name}[cgg]
+  dc Vgate 0 {sign}{vgs_max} {sign}{vgs_step}
+  {write_command} {output_file} @n.{instance}.n{model_name}[ids] @n.{instance}.n{model_name}[gm] @n.{instance}.n{model_name}[gds] @n.{instance}.n{model_name}[cgg]
+  destroy all
+end
+.endc
+.end
+"""
+
+# Output commands substituted into the templates above.
+# 'ascii' is the wrdata text format; 'binary' is an ngspice rawfile holding
+# the sweep scale once followed by the requested vectors as float64.
+OUTPUT_FORMATS = {
+    'ascii': {'write_command': 'wrdata', 'output_options': ''},
+    'binary': {'write_command': 'write', 'output_options': 'set filetype=binary'},
+}
+
+OUTPUT_FILENAMES = {
+    'ascii': 'output.txt',
+    'binary': 'output.raw',
+}
+
+def output_placeholders(output_format: str = 'ascii') -> dict:
+    """Template fields selecting the output format."""
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}', expected one of {list(OUTPUT_FORMATS)}.")
+    return OUTPUT_FORMATS[output_format]
@@ -0,0 +1,15 @@
+import os
+
+import pytest
+
+FAKE_NGSPICE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_ngspice.py")
+
+@pytest.fixture
+def fake_config(tmp_path, monkeypatch):
+    """Simulation config that points at the analytic fake ngspice, run from a scratch cwd."""
+    monkeypatch.chdir(tmp_path)
+    return {
+        "ngspice_path": FAKE_NGSPICE,
+        "pdk_root": str(tmp_path / "pdk"),
+        "pdk_code": "ihp-sg13g2",
+    }
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Deterministic stand-in for the ngspice executable.
+
+Understands the subset of netlist and control language that the
+simulation templates emit, and replaces the PDK device with an analytic
+EKV-style MOS model so results are smooth and reproducible without a PDK.
+
+Usage (same as ngspice):
+    fake_ngspice.py -b input.cir
+
+FAKE_NGSPICE_FAULT in the environment makes batch runs misbehave:
+    hang         sleep (with a sleeping child process, pid in fake_ngspice_child.pid)
+    spin         burn CPU forever
+    oom          allocate 4 GiB, report "can't allocate" like ngspice on failure
+    nonconverge  fail like a DC sweep that does not converge, unless the
+                 netlist has an .options line (relaxed convergence options)
+"""
+import math
+import os
+import random
+import re
+import struct
+import subprocess
+import sys
+import time
+
+UT_300K = 0.025852
+PHI = 0.8
+GAMMA = 0.4
+SLOPE_N = 1.3
+VT0 = 0.35
+KP_N = 300e-6
+KP_P = 100e-6
+COX = 8e-3
+COV = 0.3e-9
+
+# Per-letter corner of 'mos_<n><p>' library sections: (VT shift, KP scale)
+CORNER_SHIFTS = {'t': (0.0, 1.0), 'f': (-0.03, 1.1), 's': (0.03, 0.9)}
+# Sigma of the VT mismatch drawn for '*mismatch' sections
+MISMATCH_SIGMA = 0.01
+
+
+def parse_value(text: str) -> float:
+    """Parses a SPICE number (engineering suffixes supported)."""
+    text = text.strip().lower()
+    suffixes = {'t': 1e12, 'g': 1e9, 'meg': 1e6, 'k': 1e3, 'm': 1e-3, 'u': 1e-6, 'n': 1e-9, 'p': 1e-12, 'f': 1e-15}
+    match = re.match(r'^([-+]?[0-9.]+(?:e[-+]?\d+)?)([a-z]*)', text)
+    if not match:
+        raise ValueError(f"bad number: {text}")
+    value = float(match.group(1))
+    for suffix in ('meg', 't', 'g', 'k', 'm', 'u', 'n', 'p', 'f'):
+        if match.group(2).startswith(suffix):
+            return value * suffixes[suffix]
+    return value
+
+
+def mos_point(vgs, vds, vbs, w, l, ng, m, pmos, temp, dvt=0.0, kp_scale=1.0):
+    """Analytic (ids, gm, gds, cgg) for magnitudes of the terminal voltages."""
+    ut = UT_300K * (temp + 273.15) / 300.15
+    vt = VT0 + dvt + GAMMA * (math.sqrt(max(PHI - vbs, 0.0)) - math.sqrt(PHI))
+    kp = (KP_P if pmos else KP_N) * kp_scale
+    w_tot = w * m
+    ispec = 2 * SLOPE_N * kp * ut ** 2 * w_tot / l
+    lam = 0.08e-6 / l
+
+    x_f = (vgs - vt) / (2 * SLOPE_N * ut)
+    x_r = (vgs - vt - SLOPE_N * vds) / (2 * SLOPE_N * ut)
+    f_f = math.log1p(math.exp(min(x_f, 200.0))) if x_f < 200 else x_f
+    f_r = math.log1p(math.exp(min(x_r, 200.0))) if x_r < 200 else x_r
+    # d/dx ln(1+e^x) = sigmoid(x)
+    s_f = 1.0 / (1.0 + math.exp(-x_f))
+    s_r = 1.0 / (1.0 + math.exp(-x_r))
+
+    clm = 1.0 + lam * vds
+    i0 = ispec * (f_f ** 2 - f_r ** 2)
+    ids = i0 * clm
+    gm = ispec * (2 * f_f * s_f - 2 * f_r * s_r) / (2 * SLOPE_N * ut) * clm
+    gds = ispec * (2 * f_r * s_r) / (2 * ut) * clm + i0 * lam
+
+    # Gate capacitance: depletion -> inversion transition plus overlap
+    c_ch = COX * w_tot * l
+    cgg = c_ch * (0.25 + 0.75 * (2.0 / 3.0) * s_f) + 2 * COV * w_tot + 0.0 * ng
+    return ids, gm, gds, cgg
+
+
+class Circuit:
+    def __init__(self, lines, rng=None):
+        self.lines = list(lines)
+        self.params = {}
+        self.sources = {}
+        self.instance = None
+        self.dc = None
+        self.control = []
+        self.lib = None
+        self.temp = 27.0
+        self.raw_instance = None
+        in_control = False
+        for raw in lines:
+            line = raw.strip()
+            if not line or line.startswith('*'):
+                continue
+            low = line.lower()
+            if low.startswith('.control'):
+                in_control = True
+                continue
+            if low.startswith('.endc'):
+                in_control = False
+                continue
+            if in_control:
+                self.control.append(line)
+                continue
+            if low.startswith('.param'):
+                for name, value in re.findall(r'(\w+)\s*=\s*(\S+)', line[6:]):
+                    self.params[name.lower()] = parse_value(value)
+            elif low.startswith('.lib'):
+                self.lib = line.split()[-1]
+            elif low.startswith('.temp'):
+                self.temp = parse_value(line.split()[1])
+            elif low.startswith('.dc'):
+                self.dc = line.split()[1:]
+            elif low[0] == 'v':
+                tokens = line.split()
+                self.sources[tokens[0].lower()] = parse_value(tokens[-1])
+            elif low[0] == 'x':
+                self.raw_instance = line
+        # Statistical sections draw a new VT offset per load (mc_source)
+        self.dvt = 0.0
+        if self.lib and self.lib.lower().endswith('mismatch'):
+            self.dvt = (rng or random.Random(0)).gauss(0.0, MISMATCH_SIGMA)
+        self.elaborate()
+
+    def corner(self, pmos):
+        """(VT shift, KP scale) of the loaded 'mos_<corner>' section."""
+        match = re.match(r'mos_([tfs])([tfs])', (self.lib or '').lower())
+        if not match:
+            return CORNER_SHIFTS['t']
+        return CORNER_SHIFTS[match.group(2) if pmos else match.group(1)]
+
+    def elaborate(self):
+        tokens = self.raw_instance.split()
+        inst = {'name': tokens[0].lower(), 'model': tokens[5]}
+        for key, value in re.findall(r'(\w+)=(\S+)', self.raw_instance):
+            value = value.strip('{}')
+            inst[key.lower()] = self.params[value.lower()] if value.lower() in self.params else parse_value(value)
+        self.instance = inst
+
+    def sweep(self, source, start, stop, step):
+        start, stop, step = parse_value(start), parse_value(stop), parse_value(step)
+        count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        inst = self.instance
+        pmos = 'pmos' in inst['model'].lower()
+        vds = abs(self.sources.get('vds', 0.0))
+        vbs = self.sources.get('vbs', 0.0)
+        vbs = -vbs if pmos else vbs
+        dvt, kp_scale = self.corner(pmos)
+        vectors = {'scale': [], 'ids': [], 'gm': [], 'gds': [], 'cgg': []}
+        for i in range(count):
+            vg = start + i * step
+            ids, gm, gds, cgg = mos_point(
+                abs(vg), vds, vbs, inst['w'], inst['l'], inst.get('ng', 1), inst.get('m', 1), pmos, self.temp,
+                dvt + self.dvt, kp_scale
+            )
+            vectors['scale'].append(vg)
+            vectors['ids'].append(ids)
+            vectors['gm'].append(gm)
+            vectors['gds'].append(gds)
+            vectors['cgg'].append(cgg)
+        return vectors
+
+
+def vector_key(name: str) -> str:
+    match = re.search(r'\[(\w+)\]', name)
+    return match.group(1).lower() if match else name.lower()
+
+
+class Session:
+    def __init__(self, circuit):
+        self.circuit = circuit
+        self.plot = None
+        self.variables = {}
+        self.rng = random.Random(0)
+        self.pending = []
+
+    def substitute(self, line):
+        return re.sub(r'\$(\w+)', lambda m: self.variables.get(m.group(1), m.group(0)), line)
+
+    def execute(self, lines):
+        i = 0
+        while i < len(lines):
+            line = lines[i]
+            low = line.lower()
+            if low.startswith(('foreach', 'repeat')):
+                # Collect the loop body up to the matching 'end'
+                depth, j = 1, i + 1
+                while depth:
+                    word = lines[j].split()[0].lower()
+                    if word in ('foreach', 'repeat', 'while'):
+                        depth += 1
+                    elif word == 'end':
+                        depth -= 1
+                    j += 1
+                tokens = self.substitute(line).split()
+                if tokens[0].lower() == 'repeat':
+                    for _ in range(int(tokens[1])):
+                        self.execute(lines[i + 1:j - 1])
+                else:
+                    for value in tokens[2:]:
+                        self.variables[tokens[1]] = value
+                        self.execute(lines[i + 1:j - 1])
+                i = j
+                continue
+            self.command(self.substitute(line))
+            i += 1
+
+    def command(self, line):
+        tokens = line.split()
+        word = tokens[0].lower()
+        c = self.circuit
+        if word == 'set':
+            expr = line[3:].strip()
+            if '=' in expr:
+                name, value = [s.strip() for s in expr.split('=', 1)]
+                self.variables[name] = value
+            else:
+                self.variables[expr] = ''
+        elif word == 'run':
+            source, start, stop, step = c.dc
+            self.plot = c.sweep(source, start, stop, step)
+        elif word == 'dc':
+            self.plot = c.sweep(*tokens[1:5])
+        elif word == 'alterparam':
+            name, value = [s.strip() for s in line[len('alterparam'):].split('=')]
+            c.params[name.lower()] = parse_value(value)
+        elif word == 'reset':
+            c.elaborate()
+        elif word == 'alter':
+            target, value = [s.strip() for s in line[len('alter'):].split('=')]
+            match = re.match(r'@(\w+)\[dc\]', target) or re.match(r'(\w+)(?:\s+dc)?$', target)
+            c.sources[match.group(1).lower()] = parse_value(value)
+        elif word == 'option':
+            for name, value in re.findall(r'(\w+)\s*=\s*(\S+)', line[len('option'):]):
+                if name.lower() == 'temp':
+                    c.temp = parse_value(value)
+        elif word == 'wrdata':
+            self.wrdata(tokens[1], tokens[2:])
+        elif word == 'write':
+            self.write(tokens[1], tokens[2:])
+        elif word == 'echo':
+            print(line[5:])
+        elif word == 'destroy':
+            self.plot = None
+        elif word == 'circbyline':
+            # Collect a circuit line by line; '.end' loads it
+            text = line.split(None, 1)[1] if len(tokens) > 1 else ''
+            if text.strip().lower() == '.end':
+                self.circuit = Circuit(self.pending, self.rng)
+                self.pending = []
+            else:
+                self.pending.append(text)
+        elif word == 'setseed':
+            self.rng = random.Random(int(tokens[1]))
+        elif word == 'mc_source':
+            self.circuit = Circuit(c.lines, self.rng)
+        # save, remcirc and anything else: accepted and ignored
+
+    def wrdata(self, path, names):
+        mode = 'a' if 'appendwrite' in self.variables else 'w'
+        scale = self.plot['scale']
+        columns = []
+        for name in names:
+            columns.append(scale)
+            columns.append(self.plot[vector_key(name)])
+        with open(path, mode) as f:
+            for row in zip(*columns):
+                f.write(''.join(f" {v: .9e}" for v in row) + '\n')
+
+
+    def write(self, path, names):
+        """Rawfile output; binary only when 'set filetype=binary' is active."""
+        mode = 'ab' if 'appendwrite' in self.variables else 'wb'
+        binary = self.variables.get('filetype') == 'binary'
+        columns = [self.plot['scale']] + [self.plot[vector_key(name)] for name in names]
+        header = [
+            "Title: fake ngspice",
+            "Date: Thu Jan  1 00:00:00  1970",
+            "Plotname: DC transfer characteristic",
+            "Flags: real",
+            f"No. Variables: {len(columns)}",
+            f"No. Points: {len(columns[0])}",
+            "Variables:",
+            "\t0\tv(v-sweep)\tvoltage",
+        ] + [f"\t{i + 1}\t{name}\tcurrent" for i, name in enumerate(names)]
+        with open(path, mode) as f:
+            if binary:
+                f.write(("\n".join(header) + "\nBinary:\n").encode())
+                for row in zip(*columns):
+                    f.write(struct.pack(f"<{len(row)}d", *row))
+            else:
+                f.write(("\n".join(header) + "\nValues:\n").encode())
+                for index, row in enumerate(zip(*columns)):
+                    f.write((f" {index}" + "".join(f"\t{v:.15e}\n" for v in row) + "\n").encode())
+
+
+class FakeSharedLibrary:
+    """
+    Stand-in for the libngspice ctypes handle (see simulation/shared.py).
+    Implements the exported functions in Python on top of Circuit/Session.
+    """
+
+    def __init__(self):
+        import ctypes
+        from simulation.shared import _VectorInfo
+        self._ctypes = ctypes
+        self._info_type = _VectorInfo
+        self.session = None
+        self.commands = []
+        self.circuits_loaded = 0
+        self.init_calls = 0
+        self._keep = []
+
+    def ngSpice_Init(self, *callbacks):
+        self.init_calls += 1
+        return 0
+
+    def ngSpice_Circ(self, array):
+        lines = []
+        i = 0
+        while array[i] is not None:
+            lines.append(array[i].decode())
+            i += 1
+        self.session = Session(Circuit(lines))
+        self.circuits_loaded += 1
+        return 0
+
+    def ngSpice_Command(self, cmd):
+        cmd = cmd.decode()
+        self.commands.append(cmd)
+        word = cmd.split()[0].lower()
+        if word == 'remcirc':
+            self.session = None
+        elif self.session is not None:
+            self.session.execute([cmd])
+        return 0
+
+    def ngGet_Vec_Info(self, name):
+        ctypes = self._ctypes
+        if self.session is None or self.session.plot is None:
+            return ctypes.POINTER(self._info_type)()
+        key = name.decode()
+        values = self.session.plot['scale'] if key == 'v-sweep' else self.session.plot.get(vector_key(key))
+        if values is None:
+            return ctypes.POINTER(self._info_type)()
+        data = (ctypes.c_double * len(values))(*values)
+        info = self._info_type(name, 1, 0, ctypes.cast(data, ctypes.POINTER(ctypes.c_double)), None, len(values))
+        self._keep = [data, info]
+        return ctypes.pointer(info)
+
+    def ngSpice_CurPlot(self):
+        return b"dc1"
+
+
+def pipe_mode(stream):
+    """'ngspice -p': commands from stdin, one per line."""
+    session = None
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        word = line.split()[0].lower()
+        if word == 'quit':
+            break
+        elif word == 'source':
+            with open(line.split(None, 1)[1]) as f:
+                circuit = Circuit(f.read().splitlines())
+            session = Session(circuit)
+            session.execute(circuit.control)
+        elif word == 'remcirc':
+            session = None
+        elif word == 'echo':
+            print(line[5:])
+        elif session is not None:
+            session.execute([line])
+        sys.stdout.flush()
+    return 0
+
+
+def inject_fault(fault, lines):
+    """Misbehaves as FAKE_NGSPICE_FAULT asks; returns an exit code, or None to run normally."""
+    if fault == 'hang':
+        child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(600)'])
+        with open('fake_ngspice_child.pid', 'w') as f:
+            f.write(str(child.pid))
+        time.sleep(600)
+    elif fault == 'spin':
+        while True:
+            pass
+    elif fault == 'oom':
+        try:
+            block = bytearray(4 << 30)
+        except MemoryError:
+            print("Error: malloc: Internal Error: can't allocate 4294967296 bytes.")
+            return 1
+        del block
+    elif fault == 'nonconverge' and not any(line.lower().startswith('.option') for line in lines):
+        print("Warning: Dynamic gmin stepping failed")
+        print("Warning: source stepping failed")
+        print("doAnalyses: iteration limit reached")
+        print("run simulation(s) aborted")
+        return 1
+    return None
+
+
+def main(argv):
+    if '-v' in argv:
+        print("******\n** ngspice-fake : Circuit level simulation program\n******")
+        return 0
+    if '-p' in argv:
+        return pipe_mode(sys.stdin)
+    args = [a for a in argv[1:] if not a.startswith('-')]
+    if args:
+        with open(args[0]) as f:
+            lines = f.read().splitlines()
+    else:
+        lines = sys.stdin.read().splitlines()
+    fault = inject_fault(os.environ.get('FAKE_NGSPICE_FAULT'), lines)
+    if fault is not None:
+        return fault
+    start = time.process_time()
+    circuit = Circuit(lines)
+    print("Circuit: fake ngspice")
+    Session(circuit).execute(circuit.control)
+    # Batch-mode accounting summary (ngspice prints it with 'option acct')
+    print(f"Total analysis time (seconds) = {time.process_time() - start:.3f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,55 @@
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from simulation.adaptive import interpolation_error, merge_sweeps, run_adaptive_sweep
+from simulation.runner import render_segments_netlist, run_dc_sweep, run_vgs_segments
+
+def test_interpolation_error():
+    x = np.array([0.0, 1.0, 3.0, 4.0])
+    np.testing.assert_allclose(interpolation_error(x, 2 * x), 0.0, atol=1e-15)
+    error = interpolation_error(x, x ** 2)
+    assert error[0] == 0 and error[-1] == 0
+    assert np.isclose(error[1], 2.0)  # 1 vs line from (0,0) to (3,9)
+
+def test_merge_sweeps_sorts_and_dedups():
+    a = pd.DataFrame({'vgs': [-0.0, -0.2, -0.4], 'id': [1.0, 2.0, 3.0]})
+    b = pd.DataFrame({'vgs': [-0.1, -0.2000000000001, -0.3], 'id': [1.5, 2.0, 2.5]})
+    merged = merge_sweeps([a, b])
+    np.testing.assert_allclose(merged['vgs'], [0, -0.1, -0.2, -0.3, -0.4])
+
+def test_segments_netlist():
+    netlist = render_segments_netlist("sg13_lv_pmos", 1e-6, 1e-6, 0.9, [(0.1, 0.2, 0.01), (0.5, 0.6, 0.02)], 0.0, 1, 1, "out.txt")
+    assert "dc Vgate -0.1 -0.2 -0.01" in netlist
+    assert "dc Vgate -0.5 -0.6 -0.02" in netlist
+    assert netlist.count("wrdata out.txt @n.xp1.nsg13_lv_pmos[ids]") == 2
+
+@pytest.mark.parametrize("output_format", ["ascii", "binary"])
+def test_run_vgs_segments(fake_config, output_format):
+    fake_config["output_format"] = output_format
+    data = run_vgs_segments("sg13_lv_nmos", 10e-6, 1e-6, 0.9, [(0.0, 0.1, 0.05), (0.5, 0.6, 0.05)], sim_config=fake_config)
+    np.testing.assert_allclose(data['vgs'], [0.0, 0.05, 0.1, 0.5, 0.55, 0.6])
+
+@pytest.mark.parametrize("device", ["sg13_lv_nmos", "sg13_lv_pmos"])
+def test_adaptive_matches_fine_sweep_with_fewer_points(fake_config, device):
+    tolerance = 0.01
+    adaptive = run_adaptive_sweep(device, 10e-6, 1e-6, 0.9, 1.2, tolerance=tolerance, sim_config=fake_config)
+    fixed = run_dc_sweep(device, 10e-6, 1e-6, 0.9, 1.2, vgs_step=0.01, sim_config=fake_config)
+    fine = run_dc_sweep(device, 10e-6, 1e-6, 0.9, 1.2, vgs_step=0.001, sim_config=fake_config)
+
+    vgs = np.abs(adaptive['vgs'].to_numpy())
+    assert np.all(np.diff(vgs) > 0)
+    assert vgs[0] == 0 and np.isclose(vgs[-1], 1.2)
+    assert adaptive.attrs['adaptive']['passes'] >= 1
+    assert len(adaptive) < 0.7 * len(fixed)
+
+    x = np.abs(fine['vgs'].to_numpy())
+    gm_id = np.interp(x, vgs, adaptive['gm_id'])
+    assert np.max(np.abs(gm_id - fine['gm_id'])) / fine['gm_id'].max() < tolerance
+    log_id = np.interp(x, vgs, np.log(adaptive['id']))
+    assert np.max(np.abs(log_id - np.log(fine['id']))) < tolerance
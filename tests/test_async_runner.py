@@ -0,0 +1,90 @@
+import sys
+import os
+import asyncio
+import signal
+import time
+from concurrent.futures import CancelledError
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import simulation.async_runner as async_runner
+from simulation.async_runner import LatestOnlyRunner, run_dc_sweep_async
+from simulation.runner import run_dc_sweep
+
+SWEEP = dict(device_name="sg13_lv_nmos", width=10e-6, length=1e-6, vds=0.9, vgs_max=1.0)
+# Takes the fake ngspice several seconds
+SLOW_STEP = 2e-6
+
+def sim_dirs():
+    return os.listdir(".sim_buffer") if os.path.isdir(".sim_buffer") else []
+
+def test_async_matches_sync(fake_config):
+    data = asyncio.run(run_dc_sweep_async(**SWEEP, sim_config=fake_config))
+    pd.testing.assert_frame_equal(data, run_dc_sweep(**SWEEP, sim_config=fake_config))
+    assert sim_dirs() == []
+
+def test_cancel_kills_ngspice_and_cleans_up(fake_config, monkeypatch):
+    procs = []
+    original = asyncio.create_subprocess_exec
+
+    async def capture(*args, **kwargs):
+        proc = await original(*args, **kwargs)
+        procs.append(proc)
+        return proc
+
+    monkeypatch.setattr(async_runner.asyncio, "create_subprocess_exec", capture)
+
+    async def main():
+        task = asyncio.create_task(run_dc_sweep_async(**SWEEP, vgs_step=SLOW_STEP, sim_config=fake_config))
+        while not procs:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    start = time.monotonic()
+    asyncio.run(main())
+    assert time.monotonic() - start < 3
+    assert procs[0].returncode == -signal.SIGKILL
+    assert sim_dirs() == []
+
+def test_latest_only_runner(fake_config):
+    runner = LatestOnlyRunner(debounce=0.2)
+    try:
+        first = runner.submit("session", **SWEEP, sim_config=fake_config)
+        second = runner.submit("session", **dict(SWEEP, length=2e-6), sim_config=fake_config)
+        # Same request while in flight: same future
+        assert runner.submit("session", **dict(SWEEP, length=2e-6), sim_config=fake_config) is second
+        # ... unless the config changed in between
+        assert LatestOnlyRunner.request_key(dict(SWEEP, sim_config=fake_config)) != \
+            LatestOnlyRunner.request_key(dict(SWEEP, sim_config=dict(fake_config, corner="ss")))
+
+        with pytest.raises(CancelledError):
+            first.result(timeout=5)
+        data = second.result(timeout=10)
+        pd.testing.assert_frame_equal(data, run_dc_sweep(**dict(SWEEP, length=2e-6), sim_config=fake_config))
+        # The first request was dropped in its debounce window
+        assert runner.started == 1 and runner.cancelled == 1
+
+        # A running request is superseded as well
+        slow = runner.submit("session", debounce=0.0, **SWEEP, vgs_step=SLOW_STEP, sim_config=fake_config)
+        time.sleep(0.3)
+        latest = runner.submit("session", debounce=0.0, **SWEEP, sim_config=fake_config)
+        assert latest.result(timeout=10) is not None
+        assert slow.cancelled()
+        # Other channels are independent
+        other = runner.submit("other", debounce=0.0, **SWEEP, sim_config=fake_config)
+        assert other.result(timeout=10) is not None
+        # Finished requests are forgotten (sessions come and go)
+        deadline = time.monotonic() + 2
+        while runner._current and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert runner._current == {}
+    finally:
+        runner.close()
+    time.sleep(0.2)
+    assert sim_dirs() == []
@@ -0,0 +1,33 @@
+import sys
+import os
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from simulation.runner import run_dc_sweep, run_dc_sweep_batch
+
+SPECS = [
+    dict(device_name="sg13_lv_nmos", width=w * 1e-6, length=1e-6, vds=0.9, vgs_max=1.2)
+    for w in (1.0, 2.0, 5.0, 10.0, 20.0)
+]
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_batch_ordered_matches_serial(fake_config, executor):
+    results = list(run_dc_sweep_batch(SPECS, max_workers=3, executor=executor, sim_config=fake_config))
+
+    assert [index for index, _ in results] == list(range(len(SPECS)))
+    for index, df in results:
+        expected = run_dc_sweep(**SPECS[index], sim_config=fake_config)
+        pd.testing.assert_frame_equal(df, expected)
+    assert os.listdir(".sim_buffer") == []
+
+def test_batch_unordered_covers_all(fake_config):
+    results = dict(run_dc_sweep_batch(SPECS, max_workers=4, ordered=False, sim_config=fake_config))
+    assert sorted(results) == list(range(len(SPECS)))
+    assert all(df is not None and not df.empty for df in results.values())
+
+def test_batch_rejects_unknown_executor(fake_config):
+    with pytest.raises(ValueError):
+        list(run_dc_sweep_batch(SPECS, executor="cluster", sim_config=fake_config))
@@ -0,0 +1,96 @@
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from simulation.cache import ResultCache, pdk_fingerprint, spiceinit_dependencies
+from simulation.runner import run_dc_sweep
+
+def frame(n, offset=0.0):
+    return pd.DataFrame({'vgs': np.linspace(0, 1, n) + offset, 'id': np.full(n, 1e-6)})
+
+def test_roundtrip_and_stats(tmp_path):
+    cache = ResultCache(tmp_path / "cache")
+    key = ResultCache.make_key("netlist", "v1", [])
+
+    assert cache.get(key) is None
+    cache.put(key, frame(10))
+    pd.testing.assert_frame_equal(cache.get(key), frame(10))
+
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['entries'] == 1
+
+    # Persistent: a new instance sees the entry
+    assert ResultCache(tmp_path / "cache").get(key) is not None
+
+def test_key_depends_on_all_inputs():
+    base = ResultCache.make_key("netlist", "v1", [("a", 1, 2)])
+    assert base != ResultCache.make_key("netlist2", "v1", [("a", 1, 2)])
+    assert base != ResultCache.make_key("netlist", "v2", [("a", 1, 2)])
+    assert base != ResultCache.make_key("netlist", "v1", [("a", 1, 3)])
+
+def test_lru_eviction(tmp_path):
+    cache = ResultCache(tmp_path / "cache")
+    cache.put("a", frame(1000))
+    size = cache.stats()['bytes']
+    cache.max_bytes = int(size * 2.5)
+
+    cache.put("b", frame(1000, 1.0))
+    os.utime(cache.cache_dir / "a.npz", ns=(1, 1))
+    os.utime(cache.cache_dir / "b.npz", ns=(2, 2))
+    cache.get("a")  # 'a' becomes most recent
+    cache.put("c", frame(1000, 2.0))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()['evictions'] == 1
+
+def test_spiceinit_dependencies(tmp_path):
+    models = tmp_path / "pdk" / "ihp" / "libs.tech" / "ngspice" / "models"
+    models.mkdir(parents=True)
+    (models / "cornerMOSlv.lib").write_text("* lib")
+    (models / "sg13g2_moslv_mod.lib").write_text("* mod")
+    spiceinit = tmp_path / ".spiceinit"
+    spiceinit.write_text(
+        "setcs sourcepath = ( $sourcepath $PDK_ROOT/$PDK/libs.tech/ngspice/models )\n"
+        "osdi '$PDK_ROOT/$PDK/libs.tech/ngspice/osdi/psp103_nqs.osdi'\n"
+    )
+    env = {"PDK_ROOT": str(tmp_path / "pdk"), "PDK": "ihp"}
+
+    deps = spiceinit_dependencies("cornerMOSlv.lib", env, str(spiceinit))
+    paths = [d[0] for d in deps]
+
+    assert str(models / "sg13g2_moslv_mod.lib") in paths
+    assert any(p.endswith("psp103_nqs.osdi") for p in paths)
+    # Missing OSDI recorded without stat data
+    assert [d for d in deps if d[0].endswith(".osdi")][0][1] is None
+
+def test_pdk_fingerprint_follows_contents(tmp_path):
+    models = tmp_path / "pdk" / "ihp" / "libs.tech" / "ngspice" / "models"
+    models.mkdir(parents=True)
+    (models / "cornerMOSlv.lib").write_text("* lib")
+    spiceinit = tmp_path / ".spiceinit"
+    spiceinit.write_text("setcs sourcepath = ( $sourcepath $PDK_ROOT/$PDK/libs.tech/ngspice/models )\n")
+    env = {"PDK_ROOT": str(tmp_path / "pdk"), "PDK": "ihp"}
+
+    before = pdk_fingerprint("cornerMOSlv.lib", env, str(spiceinit))
+    os.utime(models / "cornerMOSlv.lib", (0, 0))
+    assert pdk_fingerprint("cornerMOSlv.lib", env, str(spiceinit)) == before
+    (models / "cornerMOSlv.lib").write_text("* lib, next release")
+    assert pdk_fingerprint("cornerMOSlv.lib", env, str(spiceinit)) != before
+
+def test_run_dc_sweep_uses_cache(fake_config, tmp_path):
+    fake_config["cache_dir"] = str(tmp_path / "cache")
+    cache = ResultCache(tmp_path / "cache")
+
+    first = run_dc_sweep("sg13_lv_nmos", 10e-6, 1e-6, vds=0.9, vgs_max=1.0, sim_config=fake_config, cache=cache)
+    second = run_dc_sweep("sg13_lv_nmos", 10e-6, 1e-6, vds=0.9, vgs_max=1.0, sim_config=fake_config, cache=cache)
+    other = run_dc_sweep("sg13_lv_nmos", 10e-6, 2e-6, vds=0.9, vgs_max=1.0, sim_config=fake_config, cache=cache)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert not other.equals(first)
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 2
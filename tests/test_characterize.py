@@ -0,0 +1,85 @@
+import sys
+import os
+import json
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import characterize
+from characterize import characterize as run_characterization, expand_range, load_characterization
+from simulation.limits import SimulationError
+from simulation.runner import run_lut_sweep
+
+with open(os.path.join(os.path.dirname(__file__), '..', 'config', 'sg13g2.json')) as f:
+    DEVICES = json.load(f)['devices']
+
+SPEC = {
+    "devices": ["sg13_lv_nmos", "sg13_hv_pmos"],
+    "width": 5.0,
+    "lengths": [0.13, 0.5, 1.0, 2.0, 4.0],
+    "vds": {"start": 0.3, "stop": 0.9, "step": 0.3},
+    "vbs": [0.0],
+    "vgs_max": 1.0,
+    "vgs_step": 0.1,
+}
+
+@pytest.fixture
+def process_config(fake_config):
+    return dict(fake_config, devices=DEVICES)
+
+def test_characterize_writes_stores(process_config, tmp_path):
+    output = str(tmp_path / "luts")
+    assert run_characterization(SPEC, output, jobs=3, chunk_lengths=2, process_config=process_config) == 0
+
+    results = load_characterization(output)
+    assert sorted(results) == ["sg13_hv_pmos", "sg13_lv_nmos"]
+    nmos = results["sg13_lv_nmos"]
+    assert nmos.dims == ('length', 'vds', 'vbs', 'vgs')
+    assert nmos.shape == (5, 3, 1, 11)
+    # 0.13 um is below the HV minimum length
+    np.testing.assert_allclose(results["sg13_hv_pmos"].axes['length'], [0.5e-6, 1e-6, 2e-6, 4e-6])
+
+    single = run_lut_sweep("sg13_lv_nmos", 5e-6, [2e-6], [0.3, 0.6, 0.9], [0.0], vgs_max=1.0, vgs_step=0.1,
+                           sim_config=process_config)
+    np.testing.assert_allclose(nmos['gm_id'][3], single['gm_id'][0], rtol=1e-6)
+    assert nmos.meta["device"] == "sg13_lv_nmos"
+    assert nmos.meta["pdk"] == "ihp-sg13g2"
+    assert len(nmos.meta["pdk_fingerprint"]) == 64
+    assert [len(m["netlist_hash"]) for m in nmos.meta["chunk_meta"]] == [64, 64, 64]
+
+def test_resume_skips_completed_chunks(process_config, tmp_path, monkeypatch):
+    output = str(tmp_path / "luts")
+    calls = []
+    original = characterize.run_lut_sweep
+
+    def flaky(**kwargs):
+        calls.append(kwargs['lengths'])
+        if kwargs['lengths'] == [4e-6]:
+            raise SimulationError("nonconvergence")
+        return original(**kwargs)
+
+    monkeypatch.setattr(characterize, "run_lut_sweep", flaky)
+    assert run_characterization(SPEC, output, jobs=2, process_config=process_config) == 2
+    assert load_characterization(output) == {}
+    assert len(calls) == 9
+
+    calls.clear()
+    monkeypatch.setattr(characterize, "run_lut_sweep", lambda **kwargs: calls.append(kwargs['lengths']) or original(**kwargs))
+    assert run_characterization(SPEC, output, jobs=2, process_config=process_config) == 0
+    # Only the two failed chunks are simulated again
+    assert calls == [[4e-6], [4e-6]]
+    assert load_characterization(output)["sg13_lv_nmos"].shape == (5, 3, 1, 11)
+
+def test_work_dir_of_other_job_is_rejected(process_config, tmp_path):
+    output = str(tmp_path / "luts")
+    run_characterization(SPEC, output, process_config=process_config)
+    with pytest.raises(ValueError):
+        run_characterization(dict(SPEC, vgs_step=0.05), output, process_config=process_config)
+    assert run_characterization(dict(SPEC, vgs_step=0.05), output, restart=True, process_config=process_config) == 0
+
+def test_expand_range():
+    assert expand_range(0.9) == [0.9]
+    assert expand_range({"start": 0.0, "stop": 0.3, "step": 0.1}) == [0.0, 0.1, 0.2, 0.3]
+    np.testing.assert_allclose(expand_range({"start": 0.1, "stop": 10, "num": 3, "scale": "log"}), [0.1, 1.0, 10.0])
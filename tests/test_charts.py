@@ -0,0 +1,55 @@
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from plotting.charts import create_plots, decimate_minmax
+from simulation.parser import derive_metrics
+
+def sweep(n, scale=1.0):
+    vgs = np.linspace(0, 1.2, n)
+    ids = scale * 1e-6 * np.exp(4 * vgs) / (1 + np.exp(8 * (vgs - 0.6)))
+    return derive_metrics(vgs, ids, np.gradient(ids, vgs), ids / 40, np.full(n, 1e-14))
+
+PARAMS = {'width': 10.0, 'length': 1.0, 'm': 1}
+
+def test_decimate_keeps_extremes_and_ends():
+    x = np.logspace(-12, -3, 100_001)
+    y = np.sin(np.linspace(0, 20, len(x)))
+    y[12345] = 5.0  # isolated spike
+    dx, dy = decimate_minmax(x, y, 1000)
+
+    assert len(dx) <= 1000
+    assert dx[0] == x[0] and dx[-1] == x[-1]
+    assert dy.max() == 5.0 and dy.min() == y.min()
+    assert np.all(np.diff(dx) > 0)
+
+def test_decimate_short_curve_untouched():
+    x = np.arange(10.0)
+    dx, dy = decimate_minmax(x, x, 1000)
+    assert dx is x and dy is x
+
+def test_point_budget_and_webgl():
+    history = [{'data': sweep(20_000, 1 + 0.01 * i), 'params': PARAMS} for i in range(9)]
+    figs = create_plots({'data': sweep(20_000), 'params': PARAMS}, history, max_points=500)
+
+    assert all(len(fig.data) == 10 for fig in figs)
+    assert all(len(trace.x) <= 500 for fig in figs for trace in fig.data)
+    # 10 x 500 points stays below the WebGL threshold
+    assert figs[0].data[0].type == 'scatter'
+
+    figs = create_plots({'data': sweep(20_000), 'params': PARAMS}, history, max_points=None)
+    assert figs[0].data[0].type == 'scattergl'
+    assert len(figs[0].data[-1].x) == 20_000
+
+def test_layout_and_styles():
+    figs = create_plots({'data': sweep(200), 'params': PARAMS}, [{'data': sweep(200), 'params': PARAMS}], webgl=True)
+    assert figs[0].layout.xaxis.type == 'log'
+    assert figs[3].layout.yaxis.type == 'log'
+    assert figs[1].layout.xaxis.autorange == 'reversed'
+    assert figs[0].layout.template.layout.paper_bgcolor == 'white'
+    assert figs[0].data[0].line.dash == 'dash' and figs[0].data[0].name == 'gm/Id (prev #1)'
+    assert figs[0].data[1].line.color == 'red'
+    assert figs[2].data[0].type == 'scattergl'
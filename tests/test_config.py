@@ -55,3 +55,22 @@ def test_ngspice_exists():
         # Any other error means the runner crashed likely due to bad output or parsing, 
         # but at least it tried to run.
         pass
+
+def test_load_process_config_cached(tmp_path, monkeypatch):
+    """Cached config is reused until one of the files changes."""
+    (tmp_path / "config").mkdir()
+    global_file = tmp_path / "config" / "global.json"
+    process_file = tmp_path / "config" / "proc.json"
+    global_file.write_text('{"processes": {"proc": "config/proc.json"}, "ngspice_path": "ngspice"}')
+    process_file.write_text('{"pdk_code": "a"}')
+    monkeypatch.chdir(tmp_path)
+
+    first, error = config_utils.load_process_config_cached()
+    assert error is None and first["pdk_code"] == "a"
+    assert config_utils.load_process_config_cached()[0] is first
+
+    process_file.write_text('{"pdk_code": "bb"}')
+    os.utime(process_file, ns=(1, 1))
+    second, _ = config_utils.load_process_config_cached()
+    assert second is not first
+    assert second["pdk_code"] == "bb"
@@ -0,0 +1,92 @@
+import sys
+import os
+import gc
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from simulation import derived as derived_module
+from simulation.derived import DERIVED_METRICS, DerivedMetrics, dependencies, derived, register_metric
+from simulation.history import HistoryRecord
+from simulation.lut import LutResult
+from simulation.parser import derive_metrics
+from simulation.query import GmIdLookup
+
+def square_law(vt=0.4, k=1e-3, n=121):
+    """Saturated square-law device: Id = k/2 (Vgs - Vt)^2 above Vt, tiny leakage below."""
+    vgs = np.linspace(0, 1.2, n)
+    vov = np.maximum(vgs - vt, 0)
+    ids = k / 2 * vov**2 + 1e-12
+    gm = k * vov + 1e-11
+    return derive_metrics(vgs, ids, gm, gm / 50, np.full(n, 1e-14))
+
+def test_metrics_are_lazy_and_memoized():
+    frame = square_law()
+    d = derived(frame, width=2e-6, length=0.5e-6)
+
+    id_norm = d['id_norm']
+    np.testing.assert_allclose(id_norm, frame['id'] / 4)
+    # Only what id_norm depends on was computed
+    assert set(d.cache) == {'id', 'id_abs', 'id_norm'}
+    assert dependencies('id_norm') == ['id_abs']
+
+    again = derived(frame, width=2e-6, length=0.5e-6)
+    assert again['id_norm'] is id_norm
+    # Other geometry, other cache
+    assert derived(frame, width=1e-6, length=0.5e-6)['id_norm'] is not id_norm
+
+def test_columns_of_the_data_take_precedence():
+    frame = square_law()
+    d = derived(frame)
+    np.testing.assert_array_equal(d['gm_id'], frame['gm_id'])
+    assert 'gm_id' in d.cache and 'id_abs' not in d.cache
+    assert 'id_w' not in d
+    with pytest.raises(KeyError):
+        d['id_w']
+
+def test_threshold_and_saturation_estimates():
+    d = derived(square_law(vt=0.4))
+    # Max-gm tangent of a square law crosses zero at (Vgs_max + Vt) / 2
+    np.testing.assert_allclose(d['vt'], (1.2 + 0.4) / 2, rtol=1e-6)
+    assert np.all(d['vov'] == d['vgs_abs'] - d['vt'])
+    # gm/Id = 2 / Vov above threshold
+    strong = d['vgs_abs'] > 0.6
+    np.testing.assert_allclose(d['vdsat'][strong], d['vgs_abs'][strong] - 0.4, rtol=1e-3)
+    half = d['vgs_gmid_half']
+    assert np.all(half == half[0]) and 0.4 < half[0] < 0.5
+    np.testing.assert_allclose(d['gm_id_ft'], d['gm_id'] * d['ft'])
+
+def test_lut_metrics_per_curve():
+    curves = [square_law(vt=vt) for vt in (0.3, 0.4, 0.5)]
+    lut = LutResult(
+        {'length': [1e-6, 2e-6, 3e-6], 'vgs': curves[0]['vgs']},
+        {metric: np.stack([c[metric].to_numpy() for c in curves]) for metric in ('id', 'gm', 'gds', 'cgg', 'gm_id')},
+    )
+    d = DerivedMetrics(lut, width=1e-6)
+    assert d['vt'].shape == lut.shape
+    np.testing.assert_allclose(d['vt'][:, 0], [(1.2 + vt) / 2 for vt in (0.3, 0.4, 0.5)], rtol=1e-6)
+    np.testing.assert_allclose(d['cgg_w'], 1e-8)
+
+def test_registered_metric_in_lookup(monkeypatch):
+    monkeypatch.setitem(DERIVED_METRICS, 'gds_id', None)
+    register_metric('gds_id', ('gds', 'id_abs'), "1/V")(lambda gds, id_abs: gds / id_abs)
+    with pytest.raises(ValueError):
+        register_metric('loop', ('undefined',))
+
+    frame = square_law()
+    lookup = GmIdLookup.from_frame(frame, {'width': 1e-6}, metrics=('vdsat', 'gds_id', 'vgs'))
+    np.testing.assert_allclose(lookup.lookup('vdsat', 10.0), 0.2, rtol=1e-2)
+    np.testing.assert_allclose(lookup.lookup('gds_id', 10.0), 0.2, rtol=1e-2)
+    with pytest.raises(ValueError):
+        GmIdLookup.from_frame(frame, {'width': 1e-6}, metrics=('no_such_metric',))
+
+def test_memo_is_released_with_the_data():
+    record = HistoryRecord(square_law(), {'width': 1.0})
+    derived(record, width=1e-6, length=1e-6)['id_norm']
+    key = id(record)
+    assert key in derived_module._memo
+    del record
+    gc.collect()
+    assert key not in derived_module._memo
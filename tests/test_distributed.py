@@ -0,0 +1,137 @@
+import sys
+import os
+import json
+import subprocess
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from characterize import characterize as run_characterization, load_characterization
+from simulation.distributed import WorkQueue, load_result, run_jobs, run_worker, save_result
+from simulation.runner import run_dc_sweep, run_lut_sweep
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+with open(os.path.join(ROOT, 'config', 'sg13g2.json')) as f:
+    DEVICES = json.load(f)['devices']
+
+DC = dict(device_name="sg13_lv_nmos", width=5e-6, length=1e-6, vds=0.9, vgs_max=1.2, vgs_step=0.05)
+
+def start_workers(queue_dir, config, count, cwd):
+    config_file = cwd / "worker-config.json"
+    config_file.write_text(json.dumps(config))
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    return [
+        subprocess.Popen(
+            [sys.executable, "-m", "simulation.distributed", str(queue_dir), "--config", str(config_file),
+             "--poll", "0.05", "--idle-exit", "1.5"],
+            cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        for _ in range(count)
+    ]
+
+def test_claims_leases_and_dedup(fake_config, tmp_path):
+    queue = WorkQueue(tmp_path / "queue", lease_timeout=0.2)
+    assert queue.submit("a", "dc_sweep", DC)
+    assert not queue.submit("a", "dc_sweep", DC)
+
+    job = queue.claim("w1")
+    assert job["id"] == "a" and queue.claim("w2") is None
+    # A dead worker: no heartbeat, the lease runs out and the job is requeued
+    time.sleep(0.3)
+    assert queue.requeue_expired() == ["a"]
+    assert not queue.renew("a")
+
+    again = queue.claim("w2")
+    frame = run_dc_sweep(**DC, sim_config=fake_config)
+    assert queue.complete(again["id"], frame)
+    # The first worker finishing late is a duplicate
+    assert not queue.complete(job["id"], frame)
+    assert queue.status() == {"pending": 0, "claimed": 0, "results": 1, "failed": 0}
+    np.testing.assert_allclose(queue.result("a")['gm_id'], frame['gm_id'])
+
+def test_failed_jobs_are_retried_then_given_up(fake_config, tmp_path):
+    queue = WorkQueue(tmp_path / "queue", max_attempts=2)
+    queue.submit("bad", "dc_sweep", DC)
+    run_worker(str(tmp_path / "queue"), dict(fake_config, ngspice_path="/nonexistent/ngspice"),
+               poll=0.01, idle_exit=0.1)
+    failure = queue.failure("bad")
+    assert failure["attempts"] == 2 and failure["error"]
+    assert run_jobs(queue, {}, poll=0.01) == []
+
+def test_sweep_results_keep_attrs(fake_config, tmp_path):
+    frame = run_dc_sweep(**DC, sim_config=fake_config)
+    frame.attrs['relaxed'] = 1
+    assert save_result(tmp_path / "a.npz", frame)
+    loaded = load_result(tmp_path / "a.npz")
+    assert loaded.attrs == {'relaxed': 1}
+    np.testing.assert_array_equal(loaded['gm_id'], frame['gm_id'])
+
+def test_expired_leases_count_as_attempts(tmp_path):
+    queue = WorkQueue(tmp_path / "queue", lease_timeout=0.05, max_attempts=2)
+    queue.submit("crash", "dc_sweep", DC)
+    for expected in (["crash"], []):
+        assert queue.claim("w")["id"] == "crash"
+        time.sleep(0.1)
+        assert queue.requeue_expired() == expected
+    failure = queue.failure("crash")
+    assert failure["attempts"] == 2 and "lease expired" in failure["error"]
+    assert queue.status() == {"pending": 0, "claimed": 0, "results": 0, "failed": 1}
+
+def test_jobs_cannot_override_host_paths(fake_config, tmp_path):
+    queue = WorkQueue(tmp_path / "queue", max_attempts=1)
+    queue.submit("a", "dc_sweep", DC, sim_config={"ngspice_path": "/nonexistent/ngspice"})
+    run_worker(str(tmp_path / "queue"), fake_config, poll=0.01, idle_exit=0.1)
+    assert queue.has_result("a")
+
+def test_worker_processes_on_localhost(fake_config, tmp_path):
+    queue_dir = tmp_path / "queue"
+    queue = WorkQueue(queue_dir, lease_timeout=1.0)
+    lengths = [1e-6, 2e-6, 3e-6, 4e-6, 5e-6, 6e-6]
+    jobs = {
+        f"len-{i}": {"kind": "lut_sweep", "kwargs": dict(
+            device_name="sg13_lv_pmos", width=5e-6, lengths=[length], vds_values=[0.3, 0.9],
+            vbs_values=[0.0], vgs_max=1.0, vgs_step=0.1)}
+        for i, length in enumerate(lengths)
+    }
+    # A claim by a worker that died before doing anything
+    queue.submit("len-0", **jobs["len-0"])
+    assert queue.claim("dead")["id"] == "len-0"
+
+    workers = start_workers(queue_dir, fake_config, 3, tmp_path)
+    results = {}
+    try:
+        failed = run_jobs(queue, jobs, lambda job_id, lut: results.setdefault(job_id, []).append(lut),
+                          poll=0.05, timeout=60)
+    finally:
+        for worker in workers:
+            worker.wait(timeout=30)
+
+    assert failed == []
+    assert sorted(results) == sorted(jobs) and all(len(r) == 1 for r in results.values())
+    single = run_lut_sweep(**jobs["len-3"]["kwargs"], sim_config=fake_config)
+    np.testing.assert_allclose(results["len-3"][0]['gm_id'], single['gm_id'], rtol=1e-6)
+
+def test_characterize_through_queue(fake_config, tmp_path):
+    spec = {
+        "devices": ["sg13_lv_nmos"],
+        "width": 5.0,
+        "lengths": [0.5, 1.0, 2.0],
+        "vds": [0.9],
+        "vgs_max": 1.0,
+        "vgs_step": 0.1,
+    }
+    process_config = dict(fake_config, devices=DEVICES)
+    workers = start_workers(tmp_path / "queue", fake_config, 2, tmp_path)
+    try:
+        failed = run_characterization(spec, str(tmp_path / "luts"), process_config=process_config,
+                                      queue_dir=str(tmp_path / "queue"))
+    finally:
+        for worker in workers:
+            worker.wait(timeout=30)
+
+    assert failed == 0
+    store = load_characterization(str(tmp_path / "luts"))["sg13_lv_nmos"]
+    assert store.shape == (3, 1, 1, 11)
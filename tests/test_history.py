@@ -0,0 +1,73 @@
+import sys
+import os
+import gc
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from simulation.history import HistoryBudget, HistoryRecord, HistoryStore
+from simulation.parser import derive_metrics
+from plotting.charts import create_plots
+
+def sweep(n=100, scale=1.0):
+    vgs = np.linspace(0, 1.2, n)
+    ids = scale * 1e-6 * np.exp(4 * vgs)
+    return derive_metrics(vgs, ids, 4 * ids, ids / 40, np.full(n, 1e-14))
+
+def params(length):
+    return {'device_name': 'sg13_lv_nmos', 'width': 10.0, 'length': length, 'ng': 1, 'm': 1}
+
+def test_record_layout():
+    record = HistoryRecord(sweep(100), params(1.0))
+    assert record.block.dtype == np.float32
+    assert record.block.flags['C_CONTIGUOUS']
+    assert record.nbytes == 8 * 100 * 4
+    np.testing.assert_allclose(record['gm_id'], sweep(100)['gm_id'], rtol=1e-6)
+    assert not hasattr(record, '__dict__')
+
+def test_dedup_and_order():
+    store = HistoryStore()
+    store.add(sweep(), params(1.0))
+    store.add(sweep(), params(2.0))
+    store.add(sweep(), params(1.0))
+
+    assert len(store) == 2
+    assert [r.params['length'] for r in store.records()] == [2.0, 1.0]
+    assert [r.params['length'] for r in store.records(1)] == [1.0]
+    assert [r.params['length'] for r in store.records(exclude=params(1.0))] == [2.0]
+
+def test_session_budget():
+    size = HistoryRecord(sweep(), params(1.0)).nbytes
+    store = HistoryStore(max_bytes=int(2.5 * size))
+    for length in (1.0, 2.0, 3.0):
+        store.add(sweep(), params(length))
+    assert [r.params['length'] for r in store.records()] == [2.0, 3.0]
+    assert store.nbytes == 2 * size
+
+def test_global_budget_across_sessions():
+    size = HistoryRecord(sweep(), params(1.0)).nbytes
+    budget = HistoryBudget(max_bytes=int(2.5 * size))
+    a = HistoryStore(budget=budget)
+    b = HistoryStore(budget=budget)
+    a.add(sweep(), params(1.0))
+    b.add(sweep(), params(2.0))
+    b.add(sweep(), params(3.0))
+
+    assert len(a) == 0 and len(b) == 2
+    assert budget.bytes == 2 * size and budget.evictions == 1
+
+    # A closed session gives its bytes back
+    del b
+    gc.collect()
+    assert budget.bytes == 0
+
+def test_create_plots_accepts_records():
+    store = HistoryStore()
+    store.add(sweep(scale=2.0), params(2.0))
+    current = {'data': sweep(), 'params': params(1.0)}
+    figs = create_plots(current=current, history=store.records())
+
+    assert len(figs[0].data) == 2
+    np.testing.assert_allclose(figs[1].data[0].y, sweep(scale=2.0)['gm_gds'], rtol=1e-6)
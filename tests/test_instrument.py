@@ -0,0 +1,98 @@
+import sys
+import os
+import asyncio
+import json
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from plotting.charts import create_plots
+from simulation.cache import ResultCache
+from simulation.limits import SimulationError
+from simulation.instrument import (
+    Instrument, MemorySink, configure_instrument, get_instrument, memory_sink, parse_solve_time
+)
+from simulation.async_runner import run_dc_sweep_async
+from simulation.runner import run_dc_sweep
+
+SWEEP = dict(device_name="sg13_lv_nmos", width=10e-6, length=1e-6, vds=0.9, vgs_max=1.2, vgs_step=0.05)
+
+@pytest.fixture
+def metrics_config(fake_config, tmp_path):
+    config = dict(
+        fake_config,
+        metrics_log=str(tmp_path / "metrics.jsonl"),
+        metrics_prometheus=str(tmp_path / "zchar.prom"),
+        diagnostics=True,
+    )
+    instrument = configure_instrument(config)
+    instrument.reset()
+    yield config
+    configure_instrument(None)
+
+def test_sweep_event(metrics_config, tmp_path):
+    data = run_dc_sweep(**SWEEP, sim_config=metrics_config)
+    create_plots(current={'data': data, 'params': {'width': 10.0, 'length': 1.0}})
+
+    events = list(memory_sink().events)
+    assert [e['op'] for e in events] == ['dc_sweep', 'create_plots']
+    sweep = events[0]
+    assert sweep['ok']
+    assert {'render', 'write', 'spawn', 'ngspice', 'solve', 'parse', 'total'} <= set(sweep['stages'])
+    assert sweep['counts'] == {'runs': 1, 'points': len(data)}
+    assert sweep['peak_rss_bytes'] > 0
+    assert 'figures' in events[1]['stages']
+
+    logged = [json.loads(line) for line in open(tmp_path / "metrics.jsonl")]
+    assert [e['op'] for e in logged] == ['dc_sweep', 'create_plots']
+
+    prom = (tmp_path / "zchar.prom").read_text()
+    assert 'zchar_runs_total 1' in prom
+    assert 'zchar_stage_seconds_count{stage="parse"} 1' in prom
+
+def test_async_sweep_event(metrics_config):
+    asyncio.run(run_dc_sweep_async(**SWEEP, sim_config=metrics_config))
+    sweep, = memory_sink().events
+    assert {'render', 'write', 'spawn', 'ngspice', 'parse'} <= set(sweep['stages'])
+    assert sweep['peak_rss_bytes'] > 0
+    assert get_instrument().snapshot()['peak_rss_bytes'] > 0
+
+def test_counters(metrics_config, tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    run_dc_sweep(**SWEEP, sim_config=metrics_config, cache=cache)
+    run_dc_sweep(**SWEEP, sim_config=metrics_config, cache=cache)
+    with pytest.raises(SimulationError):
+        run_dc_sweep(**dict(SWEEP, device_name="no_such_device"), sim_config=dict(metrics_config, ngspice_path="/bin/false"))
+
+    counters = get_instrument().snapshot()['counters']
+    assert counters['runs'] == 2
+    assert counters['cache_hits'] == 1
+    assert counters['failures'] == 1
+    assert counters['failed_error'] == 1
+    assert counters['points'] == 25
+    assert [e['ok'] for e in memory_sink().events] == [True, True, False]
+
+def test_disabled_is_inert():
+    instrument = Instrument()
+    assert not instrument.enabled
+    # One shared no-op context, nothing recorded
+    assert instrument.timer("a") is instrument.timer("b")
+    with instrument.operation("op"), instrument.timer("stage"):
+        instrument.count("runs")
+    assert instrument.snapshot() == {'timers': {}, 'counters': dict.fromkeys(('runs', 'failures', 'cache_hits', 'points'), 0), 'peak_rss_bytes': 0}
+
+def test_instrument_with_sink():
+    sink = MemorySink()
+    instrument = Instrument([sink])
+    with instrument.operation("op", device="x"):
+        with instrument.timer("stage"):
+            pass
+        instrument.count("points", 3)
+    event, = sink.events
+    assert event['device'] == "x" and event['counts'] == {'points': 3}
+    assert instrument.snapshot()['timers']['stage']['count'] == 1
+
+def test_parse_solve_time():
+    assert parse_solve_time("Total analysis time (seconds) = 0.25\nTotal analysis time (seconds) = 0.5") == 0.75
+    assert parse_solve_time("nothing here") is None
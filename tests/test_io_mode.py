@@ -0,0 +1,73 @@
+import sys
+import os
+import asyncio
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import simulation.runner as runner
+from simulation.async_runner import run_dc_sweep_async
+from simulation.limits import SimulationError
+from simulation.parser import parse_output
+from simulation.runner import resolve_io_mode, run_dc_sweep, run_lut_sweep, run_vgs_segments
+
+SWEEP = dict(device_name="sg13_lv_nmos", width=10e-6, length=1e-6, vds=0.9, vgs_max=1.2, vgs_step=0.05)
+
+@pytest.fixture
+def ram_dir(tmp_path, monkeypatch):
+    """Stands in for /dev/shm so the test can see what is left behind."""
+    root = tmp_path / "ram"
+    monkeypatch.setattr(runner, "tmpfs_root", lambda: root)
+    return root
+
+@pytest.mark.parametrize("io_mode", ["pipe", "tmpfs"])
+@pytest.mark.parametrize("output_format", ["ascii", "binary"])
+def test_io_modes_match_files(fake_config, ram_dir, io_mode, output_format):
+    base = dict(fake_config, output_format=output_format)
+    expected = run_dc_sweep(**SWEEP, sim_config=base)
+    os.rmdir(".sim_buffer")
+
+    data = run_dc_sweep(**SWEEP, sim_config=dict(base, io_mode=io_mode))
+    pd.testing.assert_frame_equal(data, expected)
+    # Nothing written to the working directory, the RAM dir is cleaned up
+    assert not os.path.exists(".sim_buffer")
+    assert os.listdir(ram_dir) == []
+
+def test_pipe_collects_appended_segments(fake_config, ram_dir):
+    """Several writes to the FIFO in one run (appendwrite) are all kept."""
+    segments = [(0.0, 0.5, 0.1), (0.6, 1.2, 0.1)]
+    expected = run_vgs_segments("sg13_lv_pmos", 5e-6, 1e-6, 0.9, segments, sim_config=fake_config)
+    data = run_vgs_segments("sg13_lv_pmos", 5e-6, 1e-6, 0.9, segments, sim_config=dict(fake_config, io_mode="pipe"))
+    pd.testing.assert_frame_equal(data, expected)
+
+def test_pipe_lut_sweep(fake_config, ram_dir):
+    args = dict(device_name="sg13_lv_nmos", width=5e-6, lengths=[0.5e-6, 1e-6], vds_values=[0.9],
+                vbs_values=[0.0, 0.2], vgs_max=1.0, vgs_step=0.1)
+    expected = run_lut_sweep(**args, sim_config=fake_config)
+    lut = run_lut_sweep(**args, sim_config=dict(fake_config, io_mode="pipe", output_format="binary"))
+    assert lut.shape == expected.shape
+    pd.testing.assert_frame_equal(lut.curve(length=1, vds=0, vbs=1), expected.curve(length=1, vds=0, vbs=1), rtol=1e-6)
+
+def test_pipe_without_output_fails_cleanly(fake_config, ram_dir, monkeypatch):
+    """A run that never opens the FIFO raises instead of hanging."""
+    monkeypatch.setattr(runner, "render_sweep_netlist", lambda **kwargs: "* empty\n.end\n")
+    with pytest.raises(SimulationError):
+        run_dc_sweep(**SWEEP, sim_config=dict(fake_config, io_mode="pipe"))
+    assert os.listdir(ram_dir) == []
+
+def test_async_tmpfs(fake_config, ram_dir):
+    data = asyncio.run(run_dc_sweep_async(**SWEEP, sim_config=dict(fake_config, io_mode="pipe")))
+    pd.testing.assert_frame_equal(data, run_dc_sweep(**SWEEP, sim_config=fake_config))
+    assert os.listdir(ram_dir) == []
+
+def test_resolve_io_mode():
+    assert resolve_io_mode(None) == "files"
+    assert resolve_io_mode({"io_mode": "pipe"}, engine="pool") == "tmpfs"
+    with pytest.raises(ValueError):
+        resolve_io_mode({"io_mode": "nfs"})
+
+def test_parse_output_accepts_bytes():
+    assert parse_output(b"", "sg13_lv_nmos").empty
+    assert parse_output(b"", "sg13_lv_nmos", "binary").empty
@@ -0,0 +1,119 @@
+import sys
+import os
+import asyncio
+import pickle
+import signal
+import time
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from simulation.async_runner import cached_dc_sweep, run_dc_sweep_async
+from simulation.limits import RELAXED_OPTIONS, SimulationError, failure_kind, relax_netlist, resolve_limits
+from simulation.runner import render_sweep_netlist, run_dc_sweep, run_dc_sweep_batch, run_lut_sweep
+
+SWEEP = dict(device_name="sg13_lv_nmos", width=5e-6, length=1e-6, vds=0.9, vgs_max=1.2, vgs_step=0.05)
+
+needs_prlimit = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="rlimits are set with Linux prlimit"
+)
+
+def alive(pid: int) -> bool:
+    """True while `pid` runs (zombies count as dead: nothing may reap them here)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] not in ("Z", "X")
+    except FileNotFoundError:
+        return False
+
+def test_failure_kind():
+    assert failure_kind(0, "", timed_out=True) == "timeout"
+    assert failure_kind(-signal.SIGXCPU, "") == "timeout"
+    assert failure_kind(1, "Error: malloc: Internal Error: can't allocate 100 bytes.") == "oom"
+    assert failure_kind(-signal.SIGKILL, "") == "oom"
+    assert failure_kind(1, "Warning: source stepping failed\nrun simulation(s) aborted") == "nonconvergence"
+    assert failure_kind(1, "Error: unknown subckt") == "error"
+    assert failure_kind(0, "Circuit: x") == "missing_output"
+
+def test_relax_netlist():
+    netlist = render_sweep_netlist(**SWEEP, vbs=0.0, ng=1, m=1, output_file="out.txt")
+    relaxed = relax_netlist(netlist, 1)
+    lines = relaxed.splitlines()
+    assert lines[lines.index(".control") - 1] == RELAXED_OPTIONS[0]
+    assert RELAXED_OPTIONS[-1] in relax_netlist(netlist, 5)
+    assert relaxed.replace(RELAXED_OPTIONS[0] + "\n", "") == netlist
+
+def test_resolve_limits():
+    limits = resolve_limits({"sim_timeout": 10, "sim_memory_mb": 0})
+    assert limits.timeout == 10 and limits.memory_mb is None and limits.retries == 1
+    with pytest.raises(ValueError):
+        resolve_limits({"sim_cpu_time": -1})
+
+def test_timeout_kills_process_group(fake_config, monkeypatch):
+    monkeypatch.setenv("FAKE_NGSPICE_FAULT", "hang")
+    config = dict(fake_config, sim_timeout=1.0, sim_retries=0)
+    start = time.monotonic()
+    with pytest.raises(SimulationError) as error:
+        run_dc_sweep(**SWEEP, sim_config=config)
+    assert error.value.kind == "timeout" and error.value.attempts == 1
+    assert time.monotonic() - start < 10
+    # The child of ngspice went down with it, the run directory is gone
+    with open("fake_ngspice_child.pid") as f:
+        child = int(f.read())
+    deadline = time.monotonic() + 5
+    while alive(child) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not alive(child)
+    assert os.listdir(".sim_buffer") == []
+
+def test_async_timeout(fake_config, monkeypatch):
+    monkeypatch.setenv("FAKE_NGSPICE_FAULT", "hang")
+    with pytest.raises(SimulationError) as error:
+        asyncio.run(run_dc_sweep_async(**SWEEP, sim_config=dict(fake_config, sim_timeout=1.0, sim_retries=0)))
+    assert error.value.kind == "timeout"
+    assert os.listdir(".sim_buffer") == []
+
+def test_nonconvergence_is_retried_with_relaxed_options(fake_config, monkeypatch):
+    expected = run_dc_sweep(**SWEEP, sim_config=fake_config)
+    monkeypatch.setenv("FAKE_NGSPICE_FAULT", "nonconverge")
+    with pytest.raises(SimulationError) as error:
+        run_dc_sweep(**SWEEP, sim_config=dict(fake_config, sim_retries=0))
+    assert error.value.kind == "nonconvergence"
+
+    pd.testing.assert_frame_equal(run_dc_sweep(**SWEEP, sim_config=fake_config), expected)
+    data = asyncio.run(run_dc_sweep_async(**SWEEP, sim_config=fake_config))
+    pd.testing.assert_frame_equal(data, expected)
+
+def test_relaxed_results_are_marked_not_cached(fake_config, monkeypatch, tmp_path):
+    monkeypatch.setenv("FAKE_NGSPICE_FAULT", "nonconverge")
+    config = dict(fake_config, cache_dir=str(tmp_path / "cache"))
+    assert run_dc_sweep(**SWEEP, sim_config=config).attrs['relaxed'] == 1
+    assert asyncio.run(run_dc_sweep_async(**SWEEP, sim_config=config)).attrs['relaxed'] == 1
+    assert cached_dc_sweep(**SWEEP, sim_config=config) is None
+    lut = run_lut_sweep(device_name="sg13_lv_nmos", width=5e-6, lengths=[1e-6], vds_values=[0.9],
+                        vbs_values=[0.0], vgs_max=1.2, vgs_step=0.1, sim_config=config)
+    assert lut.params['relaxed'] == 1
+
+@needs_prlimit
+def test_memory_limit(fake_config, monkeypatch):
+    monkeypatch.setenv("FAKE_NGSPICE_FAULT", "oom")
+    with pytest.raises(SimulationError) as error:
+        run_dc_sweep(**SWEEP, sim_config=dict(fake_config, sim_memory_mb=1024))
+    # Not transient: no retry
+    assert error.value.kind == "oom" and error.value.attempts == 1
+
+@needs_prlimit
+def test_cpu_limit(fake_config, monkeypatch):
+    monkeypatch.setenv("FAKE_NGSPICE_FAULT", "spin")
+    with pytest.raises(SimulationError) as error:
+        run_dc_sweep(**SWEEP, sim_config=dict(fake_config, sim_cpu_time=1, sim_retries=0))
+    assert error.value.kind == "timeout"
+
+def test_batch_reports_failures(fake_config):
+    specs = [SWEEP, dict(SWEEP, sim_config=dict(fake_config, ngspice_path="/bin/false"))]
+    results = dict(run_dc_sweep_batch(specs, max_workers=2, executor="process", sim_config=fake_config))
+    assert isinstance(results[0], pd.DataFrame)
+    assert isinstance(results[1], SimulationError) and results[1].kind == "error"
+    assert pickle.loads(pickle.dumps(results[1])).kind == "error"
@@ -0,0 +1,62 @@
+import sys
+import os
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from simulation.runner import run_dc_sweep, run_lut_sweep
+from simulation.lut import LutResult
+
+def test_lut_sweep_shape(fake_config):
+    """One run returns a dense (L, VDS, VBS, VGS) grid."""
+    lut = run_lut_sweep(
+        device_name="sg13_lv_nmos",
+        width=10e-6,
+        lengths=[0.13e-6, 0.5e-6, 1e-6],
+        vds_values=[0.3, 0.9],
+        vbs_values=[0.0, -0.3],
+        vgs_max=1.2,
+        vgs_step=0.05,
+        sim_config=fake_config
+    )
+
+    assert isinstance(lut, LutResult)
+    assert lut.dims == ('length', 'vds', 'vbs', 'vgs')
+    assert lut.shape == (3, 2, 2, 25)
+    assert lut['gm_id'].shape == lut.shape
+    np.testing.assert_allclose(lut.axes['vgs'][[0, -1]], [0.0, 1.2])
+    # No leftover work dirs
+    assert os.listdir(".sim_buffer") == []
+
+@pytest.mark.parametrize("device_name", ["sg13_lv_nmos", "sg13_lv_pmos"])
+def test_lut_matches_single_sweeps(fake_config, device_name):
+    """Each LUT curve equals the corresponding standalone run_dc_sweep."""
+    lengths = [0.13e-6, 1e-6]
+    lut = run_lut_sweep(device_name, 5e-6, lengths, [0.9], [0.0, 0.2], vgs_max=1.0, vgs_step=0.1, sim_config=fake_config)
+
+    for li, length in enumerate(lengths):
+        df = run_dc_sweep(device_name, 5e-6, length, vds=0.9, vgs_max=1.0, vgs_step=0.1, vbs=0.2, sim_config=fake_config)
+        curve = lut.curve(length=li, vds=0, vbs=1)
+        np.testing.assert_allclose(curve['id'], df['id'], rtol=1e-6)
+        np.testing.assert_allclose(curve['gm_id'], df['gm_id'], rtol=1e-6)
+
+def test_from_frame_rejects_ragged():
+    import pandas as pd
+    frame = pd.DataFrame({'vgs': [0.0, 0.1, 0.2], 'id': [1.0, 2.0, 3.0]})
+    with pytest.raises(ValueError):
+        LutResult.from_frame(frame, axes={'length': [1.0, 2.0]})
+
+def test_binary_output_matches_ascii(fake_config):
+    args = dict(device_name="sg13_lv_pmos", width=5e-6, lengths=[0.5e-6, 1e-6], vds_values=[0.3, 0.9],
+                vbs_values=[0.0], vgs_max=1.0, vgs_step=0.05)
+    ascii_lut = run_lut_sweep(**args, sim_config=fake_config)
+    binary_lut = run_lut_sweep(**args, sim_config=dict(fake_config, output_format="binary"))
+
+    assert binary_lut.shape == ascii_lut.shape
+    for metric in ascii_lut.data:
+        np.testing.assert_allclose(binary_lut[metric], ascii_lut[metric], rtol=1e-6)
+
+    df = run_dc_sweep("sg13_lv_nmos", 5e-6, 1e-6, vds=0.9, vgs_max=1.0, sim_config=dict(fake_config, output_format="binary"))
+    assert len(df) == 101
@@ -0,0 +1,102 @@
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from plotting.charts import create_plots
+from simulation.lut import LutResult
+from simulation.lutstore import LutStore, LutWriter, open_lut, write_frame, write_lut
+from simulation.runner import run_dc_sweep, run_lut_sweep
+
+def make_lut():
+    axes = {'length': [1e-6, 2e-6, 3e-6, 4e-6, 5e-6], 'vds': [0.3, 0.6, 0.9], 'vgs': np.linspace(0, 1, 11)}
+    shape = (5, 3, 11)
+    data = {
+        'id': np.arange(np.prod(shape), dtype=float).reshape(shape),
+        'gm': np.ones(shape),
+    }
+    return LutResult(axes, data, {'device_name': 'sg13_lv_nmos', 'width': 5e-6})
+
+def test_round_trip(tmp_path):
+    lut = make_lut()
+    store = write_lut(str(tmp_path / "nmos.lut"), lut, chunk_size=2, meta={"device": "sg13_lv_nmos"})
+
+    assert store.dims == lut.dims
+    assert store.shape == (5, 3, 11)
+    assert store.chunks == [(0, 2), (2, 4), (4, 5)]
+    assert store.meta["device"] == "sg13_lv_nmos"
+    np.testing.assert_array_equal(np.asarray(store['id']), lut['id'])
+
+    selection = store.select(length=3, vds=[0, 2])
+    assert selection.dims == ('vds', 'vgs')
+    assert selection.params['length'] == 4e-6
+    np.testing.assert_array_equal(selection['id'], lut['id'][3, [0, 2]])
+
+    frame = store.curve(length=4, vds=1)
+    pd.testing.assert_frame_equal(frame, lut.curve(length=4, vds=1))
+
+def test_writer_checks_simulated_axes(tmp_path):
+    lut = make_lut()
+    axes = dict(lut.axes, length=lut.axes['length'][:2])
+    writer = LutWriter(tmp_path / "nmos.lut", dict(lut.axes), [(0, 2), (2, 5)], metrics=('id', 'gm'))
+    chunk = LutResult(axes, {k: v[:2] for k, v in lut.data.items()})
+    # The same grid from a PMOS sweep (negative Vgs) is fine
+    writer.write_lut(0, LutResult(dict(axes, vgs=-lut.axes['vgs']), chunk.data))
+    # ngspice swept other Vgs values than the store declares
+    with pytest.raises(ValueError, match="vgs"):
+        writer.write_lut(0, LutResult(dict(axes, vgs=lut.axes['vgs'] * 1.1), chunk.data))
+    with pytest.raises(ValueError, match="length"):
+        writer.write_lut(1, LutResult(dict(axes, length=lut.axes['length'][:3]), {k: v[2:] for k, v in lut.data.items()}))
+
+def test_reads_only_touched_chunks(tmp_path):
+    lut = make_lut()
+    store = write_lut(str(tmp_path / "nmos.lut"), lut, chunk_size=2)
+
+    np.testing.assert_array_equal(store['id'][4, 1], lut['id'][4, 1])
+    assert set(store._maps) == {('id', 2)}
+    # Index lists across chunks come back in the requested order
+    np.testing.assert_array_equal(store['id'][[4, 0, 3], :, -1], lut['id'][[4, 0, 3], :, -1])
+    np.testing.assert_array_equal(store['id'][1:4, ..., 2], lut['id'][1:4, ..., 2])
+    np.testing.assert_array_equal(store['gm'][::-2], lut['gm'][::-2])
+
+def test_incomplete_store(tmp_path):
+    lut = make_lut()
+    path = tmp_path / "nmos.lut"
+    writer = LutWriter(path, lut.axes, [(0, 3), (3, 5)], metrics=('id',))
+    writer.write_chunk(1, {'id': lut['id'][3:]})
+
+    assert writer.missing() == [0]
+    with pytest.raises(ValueError):
+        writer.finish()
+    with pytest.raises(FileNotFoundError):
+        LutStore(path)
+    with pytest.raises(ValueError):
+        writer.write_chunk(0, {'id': lut['id'][:2]})
+
+    writer.write_chunk(0, {'id': lut['id'][:3]})
+    np.testing.assert_array_equal(np.asarray(writer.finish()['id']), lut['id'])
+
+def test_lut_sweep_store(fake_config, tmp_path):
+    lut = run_lut_sweep("sg13_lv_pmos", 5e-6, [1e-6, 2e-6], [0.3, 0.9], [0.0], vgs_max=1.0, vgs_step=0.1,
+                        sim_config=fake_config)
+    store = write_lut(str(tmp_path / "pmos.lut"), lut)
+    assert len(store.params['netlist_hash']) == 64
+
+    result = store.plot_result(length=1, vds=0, vbs=0)
+    assert result['params']['length'] == pytest.approx(2.0)
+    assert result['params']['width'] == pytest.approx(5.0)
+    np.testing.assert_allclose(result['data']['gm_id'], lut['gm_id'][1, 0, 0])
+
+def test_frame_store_plots(fake_config, tmp_path):
+    params = {'device_name': 'sg13_lv_nmos', 'width': 5.0, 'length': 1.0, 'vds': 0.9}
+    frame = run_dc_sweep("sg13_lv_nmos", 5e-6, 1e-6, 0.9, 1.2, 0.05, sim_config=fake_config)
+    write_frame(str(tmp_path / "sweep.lut"), frame, params)
+
+    result = open_lut(str(tmp_path / "sweep.lut")).plot_result()
+    assert result['params'] == params
+    pd.testing.assert_frame_equal(result['data'], frame[result['data'].columns])
+    assert len(create_plots(result)) == 4
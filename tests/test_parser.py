@@ -0,0 +1,90 @@
+import sys
+import os
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from simulation.parser import parse_ngspice_data, masked_divide, transit_frequency
+
+EXPECTED_COLUMNS = ['vgs', 'id', 'gm', 'gds', 'cgg', 'gm_id', 'gm_gds', 'ft']
+
+def write_wrdata(path, rows):
+    """Write rows of (vgs, ids, gm, gds, cgg) in wrdata [X Y X Y ...] layout."""
+    with open(path, "w") as f:
+        for vgs, ids, gm, gds, cgg in rows:
+            f.write(f" {vgs:e} {ids:e} {vgs:e} {gm:e} {vgs:e} {gds:e} {vgs:e} {cgg:e}\n")
+
+def test_parse_derived_columns(tmp_path):
+    """Derived metrics match the row-wise definitions, including zero guards."""
+    out = tmp_path / "output.txt"
+    write_wrdata(out, [
+        (0.0, -1e-6, 2e-5, 1e-7, 1e-14),
+        (0.5, 0.0, 1e-9, 0.0, 0.0),
+        (1.0, 1e-4, 1e-3, 1e-5, -2e-14),
+    ])
+
+    df = parse_ngspice_data(str(out), "sg13_lv_nmos")
+
+    assert list(df.columns) == EXPECTED_COLUMNS
+    # |Id| with a floor
+    assert df['id'].tolist() == pytest.approx([1e-6, 1e-15, 1e-4])
+    assert df['gm_id'].tolist() == pytest.approx([20.0, 1e6, 10.0])
+    # gds == 0 -> gain reported as 0
+    assert df['gm_gds'].tolist() == pytest.approx([200.0, 0.0, 100.0])
+    # cgg == 0 -> ft reported as 0, sign of cgg ignored
+    assert df['ft'].tolist() == pytest.approx([2e-5 / (2 * np.pi * 1e-14), 0.0, 1e-3 / (2 * np.pi * 2e-14)])
+
+def test_parse_missing_file(tmp_path):
+    df = parse_ngspice_data(str(tmp_path / "missing.txt"), "sg13_lv_nmos")
+    assert df.empty
+
+def test_ft_masks_cgg_before_scaling():
+    # |Cgg| between DIVISION_EPS / (2 pi) and DIVISION_EPS counts as zero
+    res = transit_frequency(np.array([1e-5, 1e-5]), np.array([5e-19, -1e-14]))
+    assert res.tolist() == pytest.approx([0.0, 1e-5 / (2 * np.pi * 1e-14)])
+
+def test_masked_divide_nan_denominator():
+    res = masked_divide(np.array([1.0, 1.0]), np.array([np.nan, 2.0]))
+    assert res.tolist() == [0.0, 0.5]
+
+def write_rawfile(path, plots):
+    """Write a binary rawfile; plots is a list of (names, rows) with the scale first."""
+    import struct
+    with open(path, "wb") as f:
+        for names, rows in plots:
+            header = ["Title: test", "Plotname: DC transfer characteristic", "Flags: real",
+                      f"No. Variables: {len(names)}", f"No. Points: {len(rows)}", "Variables:"]
+            header += [f"\t{i}\t{name}\tcurrent" for i, name in enumerate(names)]
+            f.write(("\n".join(header) + "\nBinary:\n").encode())
+            for row in rows:
+                f.write(struct.pack(f"<{len(row)}d", *row))
+
+RAW_NAMES = ["v(v-sweep)", "@n.xn1.nm[ids]", "@n.xn1.nm[gm]", "@n.xn1.nm[gds]", "@n.xn1.nm[cgg]"]
+
+def test_raw_matches_ascii(tmp_path):
+    rows = [(0.0, 1e-9, 2e-8, 1e-10, 1e-14), (0.5, 1e-6, 2e-5, 0.0, 2e-14), (1.0, 1e-4, 1e-3, 1e-5, 0.0)]
+    write_wrdata(tmp_path / "output.txt", rows)
+    write_rawfile(tmp_path / "output.raw", [(RAW_NAMES, rows)])
+
+    from simulation.parser import parse_ngspice_raw, read_ngspice_raw
+    plots = read_ngspice_raw(str(tmp_path / "output.raw"))
+    assert isinstance(plots[0]['data'], np.memmap)
+
+    ascii_df = parse_ngspice_data(str(tmp_path / "output.txt"), "nm")
+    raw_df = parse_ngspice_raw(str(tmp_path / "output.raw"), "nm")
+    np.testing.assert_allclose(raw_df.to_numpy(), ascii_df.to_numpy(), rtol=1e-6)
+
+def test_raw_multiple_plots_and_vector_order(tmp_path):
+    from simulation.parser import parse_ngspice_raw
+    # Second plot lists the vectors in a different order
+    names_b = [RAW_NAMES[0], RAW_NAMES[4], RAW_NAMES[1], RAW_NAMES[3], RAW_NAMES[2]]
+    write_rawfile(tmp_path / "output.raw", [
+        (RAW_NAMES, [(0.0, 1e-6, 1e-5, 1e-7, 1e-14)]),
+        (names_b, [(0.1, 1e-14, 2e-6, 2e-7, 2e-5)]),
+    ])
+    df = parse_ngspice_raw(str(tmp_path / "output.raw"), "nm")
+    assert df['vgs'].tolist() == [0.0, 0.1]
+    assert df['gm_id'].tolist() == pytest.approx([10.0, 10.0])
+    assert df['cgg'].tolist() == pytest.approx([1e-14, 1e-14])
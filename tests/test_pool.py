@@ -0,0 +1,102 @@
+import sys
+import os
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from conftest import FAKE_NGSPICE
+from simulation.pool import NgspicePool, WorkerError, get_worker_pool, shutdown_pools
+from simulation.runner import run_dc_sweep, run_lut_sweep, render_sweep_netlist
+
+@pytest.fixture(autouse=True)
+def stop_pools():
+    yield
+    shutdown_pools()
+
+def write_netlist(tmp_path, name, length=1e-6):
+    output = tmp_path / f"{name}.txt"
+    netlist = tmp_path / f"{name}.cir"
+    netlist.write_text(render_sweep_netlist("sg13_lv_nmos", 5e-6, length, 0.9, 1.2, 0.1, 0.0, 1, 1, str(output)))
+    return netlist, output
+
+def test_pool_engine_matches_subprocess(fake_config):
+    args = dict(device_name="sg13_lv_pmos", width=5e-6, length=0.5e-6, vds=0.9, vgs_max=1.2)
+    expected = run_dc_sweep(**args, sim_config=fake_config)
+    config = dict(fake_config, engine="pool", pool_size=2)
+
+    for _ in range(3):
+        pd.testing.assert_frame_equal(run_dc_sweep(**args, sim_config=config), expected)
+
+    lut = run_lut_sweep("sg13_lv_nmos", 5e-6, [0.5e-6, 1e-6], [0.9], [0.0], vgs_max=1.2, sim_config=config)
+    assert lut.shape == (2, 1, 1, 121)
+
+def test_worker_recycled_after_max_circuits(tmp_path):
+    pool = NgspicePool(FAKE_NGSPICE, dict(os.environ), size=1, max_circuits=2, cwd=str(tmp_path))
+    try:
+        for i in range(5):
+            netlist, output = write_netlist(tmp_path, f"run{i}")
+            pool.run_file(str(netlist))
+            assert output.exists()
+        # Recycled before runs 3 and 5
+        assert pool.restarts == 2
+    finally:
+        pool.close()
+
+def test_worker_restarted_after_crash(tmp_path):
+    pool = NgspicePool(FAKE_NGSPICE, dict(os.environ), size=1, cwd=str(tmp_path))
+    try:
+        netlist, output = write_netlist(tmp_path, "ok")
+        pool.run_file(str(netlist))
+
+        # Kill the worker behind the pool's back
+        worker = pool._idle.queue[0]
+        worker.proc.kill()
+        worker.proc.wait()
+
+        netlist, output = write_netlist(tmp_path, "after_crash", length=2e-6)
+        pool.run_file(str(netlist))
+        assert output.exists()
+        assert pool.restarts == 1
+    finally:
+        pool.close()
+
+def test_failed_circuit_raises_worker_error(tmp_path):
+    pool = NgspicePool(FAKE_NGSPICE, dict(os.environ), size=1, cwd=str(tmp_path))
+    try:
+        with pytest.raises(WorkerError):
+            # The fake exits on a missing file, like a crashed ngspice
+            pool.run_file(str(tmp_path / "missing.cir"))
+        netlist, output = write_netlist(tmp_path, "next")
+        pool.run_file(str(netlist))
+        assert output.exists()
+    finally:
+        pool.close()
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="rlimits are set with Linux prlimit")
+def test_workers_get_memory_limit_and_own_session(fake_config, tmp_path):
+    import resource
+    config = dict(fake_config, sim_memory_mb=2048, sim_cpu_time=5)
+    with pytest.warns(RuntimeWarning, match="sim_cpu_time"):
+        pool = get_worker_pool(config, FAKE_NGSPICE, dict(os.environ))
+    netlist, _ = write_netlist(tmp_path, "a")
+    pool.run_file(str(netlist))
+    worker = pool._idle.queue[0]
+    assert os.getsid(worker.proc.pid) == worker.proc.pid
+    assert resource.prlimit(worker.proc.pid, resource.RLIMIT_AS)[0] == 2048 * 2 ** 20
+    assert resource.prlimit(worker.proc.pid, resource.RLIMIT_CPU)[0] == resource.RLIM_INFINITY
+
+def test_reloaded_settings_replace_the_pool(fake_config, tmp_path):
+    env = dict(os.environ)
+    pool = get_worker_pool(dict(fake_config, pool_size=1), FAKE_NGSPICE, env)
+    assert get_worker_pool(dict(fake_config, pool_size=1), FAKE_NGSPICE, env) is pool
+    netlist, _ = write_netlist(tmp_path, "a")
+    pool.run_file(str(netlist))
+    worker = pool._idle.queue[0]
+
+    other = get_worker_pool(dict(fake_config, pool_size=1, sim_timeout=30), FAKE_NGSPICE, env)
+    assert other is not pool and other.run_timeout == 30
+    # The old workers are stopped
+    assert not worker.alive()
+    assert get_worker_pool(dict(fake_config, pool_size=2, sim_timeout=30), FAKE_NGSPICE, env).size == 2
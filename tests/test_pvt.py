@@ -0,0 +1,62 @@
+import sys
+import os
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from simulation.pvt import render_corner_netlist, run_corner_sweep, run_monte_carlo
+from simulation.runner import run_dc_sweep
+
+GEOMETRY = dict(width=5e-6, length=1e-6, vds=0.9, vgs_max=1.2, vgs_step=0.05)
+
+@pytest.mark.parametrize("device_name", ["sg13_lv_nmos", "sg13_lv_pmos"])
+def test_corner_sweep_matches_single_runs(fake_config, device_name):
+    """Every (corner, temp) curve of the one-session run equals a standalone sweep."""
+    corners = ["tt", "ff", "ss", "fs", "sf"]
+    temperatures = [-40.0, 27.0, 125.0]
+    result = run_corner_sweep(device_name, **GEOMETRY, corners=corners, temperatures=temperatures, sim_config=fake_config)
+
+    assert result.dims == ('corner', 'temp', 'vgs')
+    assert result.shape == (5, 3, 25)
+    assert list(result.axes['corner']) == corners
+
+    for ci, corner in enumerate(corners):
+        single = run_dc_sweep(device_name, **GEOMETRY, sim_config=dict(fake_config, corner=corner))
+        np.testing.assert_allclose(result.curve(corner=ci, temp=1)['id'], single['id'], rtol=1e-6)
+
+    # Fast corners conduct more, higher temperature lowers gm/Id in weak inversion
+    id_ff, id_ss = result['id'][1, 1, -1], result['id'][2, 1, -1]
+    assert abs(id_ff) > abs(result['id'][0, 1, -1]) > abs(id_ss)
+    assert result['gm_id'][0, 0, 3] > result['gm_id'][0, 2, 3]
+
+def test_corner_deck_runs_once(fake_config):
+    netlist = render_corner_netlist(
+        "sg13_lv_nmos", 5e-6, 1e-6, 0.9, 1.2, 0.05, 0.0, 1, 1, ["tt", "ss"], [27.0], "out.txt"
+    )
+    assert netlist.count("remcirc") == 1
+    assert "circbyline .lib 'cornerMOSlv.lib' mos_ss" in netlist
+
+def test_corner_sweep_binary(fake_config):
+    args = dict(device_name="sg13_lv_pmos", **GEOMETRY, corners=["ff", "ss"], temperatures=[0.0, 85.0])
+    ascii_result = run_corner_sweep(**args, sim_config=fake_config)
+    binary_result = run_corner_sweep(**args, sim_config=dict(fake_config, output_format="binary"))
+    np.testing.assert_allclose(binary_result['gm_id'], ascii_result['gm_id'], rtol=1e-6)
+
+def test_corner_sweep_rejects_unknown_corner(fake_config):
+    with pytest.raises(ValueError):
+        run_corner_sweep("sg13_lv_nmos", **GEOMETRY, corners=["xx"], sim_config=fake_config)
+
+def test_monte_carlo(fake_config):
+    result = run_monte_carlo("sg13_lv_nmos", **GEOMETRY, runs=20, seed=7, sim_config=fake_config)
+
+    assert result.dims == ('mc', 'vgs')
+    assert result.shape == (20, 25)
+    assert result.params['seed'] == 7
+    # Every run draws a different mismatch
+    assert len(np.unique(result['id'][:, 10])) == 20
+    # Same seed, same draws
+    again = run_monte_carlo("sg13_lv_nmos", **GEOMETRY, runs=20, seed=7, sim_config=fake_config)
+    np.testing.assert_array_equal(again['id'], result['id'])
+    assert os.listdir(".sim_buffer") == []
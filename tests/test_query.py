@@ -0,0 +1,79 @@
+import sys
+import os
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from simulation.query import GmIdLookup, monotone_branch, pchip_eval, pchip_slopes
+from simulation.runner import run_dc_sweep, run_lut_sweep
+
+LENGTHS = [0.13e-6, 0.5e-6, 1e-6, 2e-6]
+
+@pytest.fixture
+def lut(fake_config):
+    return run_lut_sweep("sg13_lv_nmos", 10e-6, LENGTHS, [0.3, 0.9], [0.0, -0.3],
+                         vgs_max=1.5, vgs_step=0.005, sim_config=fake_config)
+
+def reference(curve, metric_values, gm_id):
+    """Linear interpolation on the raw monotone branch."""
+    branch = monotone_branch(curve['gm_id'].to_numpy())
+    x = curve['gm_id'].to_numpy()[branch][::-1]
+    return np.interp(gm_id, x, metric_values[branch][::-1])
+
+def test_lookup_on_grid_points(lut):
+    q = GmIdLookup(lut)
+    gm_id = np.array([5.0, 10.0, 15.0, 20.0])
+    for li, length in enumerate(LENGTHS):
+        curve = lut.curve(length=li, vds=1, vbs=0)
+        expected_id_w = reference(curve, curve['id'].to_numpy() / 10e-6, gm_id)
+        expected_gain = reference(curve, curve['gm_gds'].to_numpy(), gm_id)
+
+        np.testing.assert_allclose(q.id_w(gm_id, length, 0.9, 0.0), expected_id_w, rtol=2e-2)
+        np.testing.assert_allclose(q.gm_gds(gm_id, length, 0.9, 0.0), expected_gain, rtol=2e-2)
+
+def test_lookup_interpolates_between_axes(lut):
+    q = GmIdLookup(lut)
+    at_03 = q.ft(12.0, 1e-6, 0.3, 0.0)
+    at_09 = q.ft(12.0, 1e-6, 0.9, 0.0)
+    mid = q.ft(12.0, 1e-6, 0.6, 0.0)
+    assert min(at_03, at_09) <= mid <= max(at_03, at_09)
+
+def test_batched_broadcast_and_out_of_range(lut):
+    q = GmIdLookup(lut)
+    gm_id = np.linspace(4, 20, 1000)[:, None]
+    lengths = np.array(LENGTHS)[None, :]
+    result = q.id_w(gm_id, lengths, 0.9, -0.3)
+    assert result.shape == (1000, 4)
+    assert np.isfinite(result).all()
+    # Current density falls with rising gm/Id and with longer L
+    assert (np.diff(result, axis=0) < 0).all()
+    assert (np.diff(result, axis=1) < 0).all()
+
+    assert np.isnan(q.id_w(10.0, 5e-6, 0.9, 0.0))
+    assert np.isnan(q.id_w(100.0, 1e-6, 0.9, 0.0))
+
+def test_from_single_frame(fake_config):
+    df = run_dc_sweep("sg13_lv_pmos", 5e-6, 1e-6, vds=0.9, vgs_max=1.5, vgs_step=0.005, sim_config=fake_config)
+    q = GmIdLookup.from_frame(df, {'width': 5e-6, 'length': 1e-6, 'vds': 0.9, 'vbs': 0.0})
+    expected = reference(df, df['vgs'].abs().to_numpy(), 10.0)
+    np.testing.assert_allclose(q.lookup('vgs', 10.0, 1e-6), expected, rtol=1e-2)
+    with pytest.raises(ValueError):
+        GmIdLookup.from_frame(df, {'width': 5e-6}, metrics=('nope',))
+
+def test_pchip_is_monotone():
+    x = np.array([0.0, 1.0, 2.0, 3.0, 4.0])
+    y = np.array([0.0, 0.1, 0.2, 5.0, 5.1])
+    xq = np.linspace(0, 4, 401)
+    values = pchip_eval(x, y, pchip_slopes(x, y), xq)
+    assert (np.diff(values) >= -1e-12).all()
+    np.testing.assert_allclose(pchip_eval(x, y, pchip_slopes(x, y), x), y)
+
+def test_scalar_and_array_bias_agree(lut):
+    q = GmIdLookup(lut)
+    gm_id = np.linspace(6, 18, 50)
+    scalar = q.gm_gds(gm_id, 0.8e-6, 0.6, -0.1)
+    array = q.gm_gds(gm_id, np.full(50, 0.8e-6), np.full(50, 0.6), np.full(50, -0.1))
+    np.testing.assert_allclose(scalar, array, rtol=1e-12)
+    assert np.ndim(q.ft(10.0, 1e-6, 0.9, 0.0)) == 0
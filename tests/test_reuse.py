@@ -0,0 +1,102 @@
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from simulation.reuse import ScalingReuse, scale_result, spot_check
+from simulation.runner import run_dc_sweep
+
+SWEEP = dict(device_name="sg13_lv_nmos", length=1e-6, vds=0.9, vgs_max=1.0)
+
+class CountingRunner:
+    def __init__(self):
+        self.calls = 0
+        self.steps = []
+
+    def __call__(self, **kwargs):
+        self.calls += 1
+        self.steps.append(kwargs['vgs_step'])
+        return run_dc_sweep(**kwargs)
+
+def test_multiplier_is_derived_exactly(fake_config):
+    runner = CountingRunner()
+    reuse = ScalingReuse(runner=runner)
+
+    reuse.run_dc_sweep(width=10e-6, m=1, sim_config=fake_config, **SWEEP)
+    derived = reuse.run_dc_sweep(width=10e-6, m=4, sim_config=fake_config, **SWEEP)
+    simulated = run_dc_sweep(width=10e-6, m=4, sim_config=fake_config, **SWEEP)
+
+    assert runner.calls == 1
+    assert derived.attrs['derived']['scale'] == 4
+    assert derived.attrs['derived']['exact']
+    for col in ('id', 'gm', 'gds', 'cgg', 'gm_id', 'ft'):
+        np.testing.assert_allclose(derived[col], simulated[col], rtol=1e-5)
+    assert reuse.stats() == {'derived': 1, 'simulated': 1, 'verify_failures': 0}
+
+def test_width_tolerance(fake_config):
+    runner = CountingRunner()
+    reuse = ScalingReuse(width_tolerance=0.05, runner=runner)
+
+    reuse.run_dc_sweep(width=10e-6, sim_config=fake_config, **SWEEP)
+    near = reuse.run_dc_sweep(width=10.4e-6, sim_config=fake_config, **SWEEP)
+    far = reuse.run_dc_sweep(width=12e-6, sim_config=fake_config, **SWEEP)
+
+    assert not near.attrs['derived']['exact']
+    assert np.isclose(near.attrs['derived']['scale'], 1.04)
+    assert 'derived' not in far.attrs
+    assert runner.calls == 2
+
+def test_exact_repeat_and_other_bias_not_shared(fake_config):
+    runner = CountingRunner()
+    reuse = ScalingReuse(runner=runner)
+
+    first = reuse.run_dc_sweep(width=10e-6, sim_config=fake_config, **SWEEP)
+    again = reuse.run_dc_sweep(width=10e-6, sim_config=fake_config, **SWEEP)
+    reuse.run_dc_sweep(width=10e-6, m=2, sim_config=fake_config, **dict(SWEEP, vds=0.5))
+
+    # A copy: changing it does not change later results
+    assert again is not first
+    pd.testing.assert_frame_equal(again, first)
+    again['id'] *= 2
+    pd.testing.assert_frame_equal(reuse.run_dc_sweep(width=10e-6, sim_config=fake_config, **SWEEP), first)
+    assert runner.calls == 2
+
+def test_other_corner_not_shared(fake_config):
+    runner = CountingRunner()
+    reuse = ScalingReuse(runner=runner)
+
+    reuse.run_dc_sweep(width=10e-6, sim_config=fake_config, **SWEEP)
+    slow = reuse.run_dc_sweep(width=10e-6, m=2, sim_config=dict(fake_config, corner="ss"), **SWEEP)
+
+    assert runner.calls == 2
+    assert 'derived' not in slow.attrs
+
+def test_verify_mode(fake_config):
+    runner = CountingRunner()
+    reuse = ScalingReuse(verify=True, runner=runner)
+    reuse.run_dc_sweep(width=10e-6, sim_config=fake_config, **SWEEP)
+    derived = reuse.run_dc_sweep(width=10e-6, m=2, sim_config=fake_config, **SWEEP)
+
+    assert derived.attrs['verification']['ok']
+    assert derived.attrs['verification']['max_rel_error'] < 1e-4
+    # The spot-check simulates a coarser sweep, not the full one
+    assert runner.steps == [0.01, pytest.approx(0.07)]
+
+def test_width_tolerance_is_validated():
+    for tolerance in (-0.1, 1.0):
+        with pytest.raises(ValueError):
+            ScalingReuse.from_config({"reuse_width_tolerance": tolerance})
+
+def test_spot_check_detects_mismatch():
+    vgs = np.linspace(0, 1, 101)
+    ids = 1e-6 * np.exp(5 * vgs)
+    base = pd.DataFrame({'vgs': vgs, 'id': ids, 'gm': 5 * ids, 'gds': ids / 50, 'cgg': np.full(101, 1e-15)})
+    wrong = scale_result(base, 1.1)
+
+    assert spot_check(scale_result(base, 1.0), base)['ok']
+    check = spot_check(wrong, base, rtol=0.02)
+    assert not check['ok'] and np.isclose(check['max_rel_error'], 0.1)
@@ -0,0 +1,82 @@
+import sys
+import os
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fake_ngspice import FakeSharedLibrary
+from simulation import shared
+from simulation.limits import SimulationError
+from simulation.runner import run_dc_sweep, render_sweep_netlist
+from simulation.shared import SharedNgspice, split_netlist
+
+@pytest.fixture
+def fake_engine(monkeypatch):
+    lib = FakeSharedLibrary()
+    # The engine exports PDK_ROOT/PDK into the process environment
+    monkeypatch.delenv("PDK_ROOT", raising=False)
+    monkeypatch.delenv("PDK", raising=False)
+    monkeypatch.setattr(shared, "load_library", lambda path: lib)
+    monkeypatch.setattr(shared, "_engine", None)
+    monkeypatch.setattr(shared, "_engine_key", None)
+    return lib
+
+def test_split_netlist_drops_output_commands():
+    netlist = render_sweep_netlist("sg13_lv_nmos", 1e-6, 1e-6, 0.9, 1.2, 0.01, 0.0, 1, 1, "out.raw", "binary")
+    circuit, control = split_netlist(netlist)
+
+    assert any(line.startswith(".dc") for line in circuit)
+    assert control[0].startswith("save")
+    assert control[1] == "run"
+    assert len(control) == 2
+
+@pytest.mark.parametrize("device_name", ["sg13_lv_nmos", "sg13_hv_pmos"])
+def test_shared_engine_matches_subprocess(fake_config, fake_engine, device_name):
+    args = dict(device_name=device_name, width=5e-6, length=0.5e-6, vds=0.9, vgs_max=1.2, vbs=0.1)
+    expected = run_dc_sweep(**args, sim_config=fake_config)
+    df = run_dc_sweep(**args, sim_config=dict(fake_config, engine="shared"))
+
+    pd.testing.assert_frame_equal(df, expected, rtol=1e-6)
+    # No work dir for the in-process engine
+    assert not os.path.exists(".sim_buffer") or os.listdir(".sim_buffer") == []
+
+def test_shared_engine_initializes_once(fake_config, fake_engine):
+    config = dict(fake_config, engine="shared")
+    for length in (0.5e-6, 1e-6, 2e-6):
+        run_dc_sweep("sg13_lv_nmos", 5e-6, length, vds=0.9, vgs_max=1.2, sim_config=config)
+
+    assert fake_engine.init_calls == 1
+    assert fake_engine.circuits_loaded == 3
+    assert fake_engine.commands.count("remcirc") == 3
+
+def test_shared_engine_rejects_pdk_switch(fake_config, fake_engine):
+    run_dc_sweep("sg13_lv_nmos", 5e-6, 1e-6, vds=0.9, vgs_max=1.2, sim_config=dict(fake_config, engine="shared"))
+    with pytest.raises(RuntimeError):
+        run_dc_sweep("sg13_lv_nmos", 5e-6, 1e-6, vds=0.9, vgs_max=1.2,
+                     sim_config=dict(fake_config, engine="shared", pdk_root="/elsewhere"))
+
+def test_shared_engine_checks_return_codes(fake_config, fake_engine, monkeypatch):
+    command = fake_engine.ngSpice_Command
+
+    def failing_run(cmd):
+        if cmd == b"run":
+            return 1
+        return command(cmd)
+
+    monkeypatch.setattr(fake_engine, "ngSpice_Command", failing_run)
+    with pytest.raises(SimulationError) as error:
+        run_dc_sweep("sg13_lv_nmos", 5e-6, 1e-6, vds=0.9, vgs_max=1.2, sim_config=dict(fake_config, engine="shared"))
+    assert error.value.kind == "error" and error.value.returncode == 1
+    # The circuit is freed all the same
+    assert fake_engine.commands[-1] == "remcirc"
+
+def test_shared_engine_warns_about_limits(fake_config, fake_engine):
+    with pytest.warns(RuntimeWarning, match="sim_timeout"):
+        run_dc_sweep("sg13_lv_nmos", 5e-6, 1e-6, vds=0.9, vgs_max=1.2,
+                     sim_config=dict(fake_config, engine="shared", sim_timeout=10))
+
+def test_unknown_engine(fake_config):
+    with pytest.raises(ValueError):
+        run_dc_sweep("sg13_lv_nmos", 5e-6, 1e-6, vds=0.9, vgs_max=1.2, sim_config=dict(fake_config, engine="spice3"))
@@ -0,0 +1,76 @@
+import sys
+import os
+import json
+import time
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from simulation.query import GmIdLookup
+from simulation.runner import run_lut_sweep
+from simulation.sizing import pareto_mask, size_device, verify_sizing
+
+with open(os.path.join(os.path.dirname(__file__), '..', 'config', 'sg13g2.json')) as f:
+    LIMITS = json.load(f)['devices']['sg13_lv_nmos']
+
+@pytest.fixture
+def lookup(fake_config):
+    lengths = list(np.geomspace(0.13e-6, 10e-6, 12))
+    lut = run_lut_sweep("sg13_lv_nmos", 10e-6, lengths, [0.3, 0.9], [0.0], vgs_max=1.5, vgs_step=0.01,
+                        sim_config=fake_config)
+    return GmIdLookup(lut)
+
+def test_pareto_mask_matches_brute_force():
+    rng = np.random.default_rng(3)
+    costs = rng.random((300, 3))
+    costs[10] = costs[11]
+    dominated = [
+        any(np.all(other <= point) and np.any(other < point) for other in costs)
+        for point in costs
+    ]
+    np.testing.assert_array_equal(pareto_mask(costs), ~np.array(dominated))
+
+def test_size_device_meets_targets(lookup):
+    result = size_device(lookup, gm=1e-3, vds=0.9, vbs=0.0, min_gm_gds=20, min_ft=1e9, limits=LIMITS)
+
+    assert len(result) > 0
+    np.testing.assert_allclose(result['gm'], 1e-3)
+    assert np.all(result['gm_gds'] >= 20) and np.all(result['ft'] >= 1e9)
+    finger = result['width'] / result['ng']
+    assert np.all(finger <= LIMITS['max_width'] * 1e-6 * (1 + 1e-9))
+    assert np.all(finger >= LIMITS['min_width'] * 1e-6 * (1 - 1e-9))
+    assert np.all(np.diff(result['id']) >= 0)
+    # Nothing in the set dominates another point
+    costs = np.column_stack([result['id'], result['area'], -result['ft']])
+    assert pareto_mask(costs).all()
+
+    # Larger gain demands longer devices
+    strict = size_device(lookup, gm=1e-3, vds=0.9, vbs=0.0, min_gm_gds=60, limits=LIMITS)
+    assert np.all(strict['gm_gds'] >= 60)
+    assert strict['length'].max() > result['length'].max()
+
+def test_size_device_current_target_and_infeasible(lookup):
+    result = size_device(lookup, ids=50e-6, vds=0.9, vbs=0.0, limits=LIMITS)
+    np.testing.assert_allclose(result['id'], 50e-6)
+    assert np.all(result['ng'] >= 1)
+
+    assert size_device(lookup, gm=1e-3, vds=0.9, vbs=0.0, min_gm_gds=1e6, limits=LIMITS).empty
+    # Bias outside the characterized VDS range
+    assert size_device(lookup, gm=1e-3, vds=1.2, vbs=0.0, limits=LIMITS).empty
+    with pytest.raises(ValueError):
+        size_device(lookup, gm=1e-3, ids=1e-4, vds=0.9, vbs=0.0)
+
+def test_sizing_many_devices_is_fast(lookup):
+    start = time.perf_counter()
+    for gm in np.geomspace(1e-4, 1e-2, 10):
+        size_device(lookup, gm=gm, vds=0.9, vbs=0.0, min_gm_gds=20, limits=LIMITS)
+    assert time.perf_counter() - start < 1.0
+
+def test_verify_sizing(lookup, fake_config):
+    result = size_device(lookup, gm=1e-3, vds=0.9, vbs=0.0, min_gm_gds=30, limits=LIMITS)
+    check = verify_sizing("sg13_lv_nmos", result.iloc[len(result) // 2], vds=0.9, vgs_max=1.5,
+                          sim_config=fake_config)
+    assert abs(check['gm_error']) < 0.02
+    assert abs(check['gm_gds_error']) < 0.02
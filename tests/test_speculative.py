@@ -0,0 +1,101 @@
+import sys
+import os
+import asyncio
+import shutil
+import time
+from concurrent.futures import CancelledError
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import simulation.async_runner as async_runner
+from simulation.async_runner import LatestOnlyRunner, cached_dc_sweep
+from simulation.runner import run_dc_sweep
+from simulation.speculative import SpeculativeExecutor, get_speculative_executor, neighbours, sweep_args
+
+PARAMS = {'device_name': 'sg13_lv_nmos', 'width': 10.0, 'length': 1.0, 'ng': 1, 'm': 1,
+          'vgs_max': 1.0, 'vds': 0.3, 'vbs': 0.0}
+
+@pytest.fixture
+def cached_config(fake_config, tmp_path):
+    return dict(fake_config, cache_dir=str(tmp_path / "cache"))
+
+def test_neighbours():
+    points = neighbours(PARAMS, bounds={'length': (0.13, 1.2)})
+    assert [(p['width'], p['length'], p['vds'], p['vbs']) for p in points] == [
+        (11.0, 1.0, 0.3, 0.0), (9.0, 1.0, 0.3, 0.0),
+        (10.0, 0.5, 0.3, 0.0),
+        (10.0, 1.0, 0.4, 0.0), (10.0, 1.0, 0.2, 0.0),
+        (10.0, 1.0, 0.3, 0.1), (10.0, 1.0, 0.3, -0.1),
+    ]
+    assert neighbours(PARAMS, steps={'vds': 0.1}) == [dict(PARAMS, vds=0.4), dict(PARAMS, vds=0.2)]
+
+def test_neighbours_become_cache_hits(cached_config):
+    executor = SpeculativeExecutor(cached_config, budget=3, workers=2, idle_delay=0.0)
+    try:
+        assert executor.speculate("session", PARAMS).result(timeout=30) == 3
+    finally:
+        executor.close()
+    assert executor.stats() == {'started': 3, 'completed': 3, 'cancelled': 0}
+
+    first, second, third, fourth = neighbours(PARAMS)[:4]
+    for params in (first, second, third):
+        cached = cached_dc_sweep(**sweep_args(params), sim_config=cached_config)
+        pd.testing.assert_frame_equal(cached, run_dc_sweep(**sweep_args(params), sim_config=dict(cached_config, cache_dir=None)))
+    assert cached_dc_sweep(**sweep_args(fourth), sim_config=cached_config) is None
+
+    # The next click is answered from the cache without waiting for the debounce
+    runner = LatestOnlyRunner(debounce=5.0)
+    try:
+        start = time.monotonic()
+        assert runner.submit("session", **sweep_args(first), sim_config=cached_config).result(timeout=10) is not None
+        assert time.monotonic() - start < 1.0
+    finally:
+        runner.close()
+
+def test_cancel_kills_speculative_runs(cached_config, monkeypatch):
+    commands = []
+    original = asyncio.create_subprocess_exec
+
+    async def capture(*args, **kwargs):
+        commands.append(args)
+        return await original(*args, **kwargs)
+
+    monkeypatch.setattr(async_runner.asyncio, "create_subprocess_exec", capture)
+    executor = SpeculativeExecutor(cached_config, idle_delay=0.0)
+    try:
+        # A step this fine takes the fake ngspice several seconds
+        future = executor.speculate("session", dict(PARAMS, vgs_step=2e-6))
+        while not commands:
+            time.sleep(0.01)
+        start = time.monotonic()
+        executor.cancel()
+        with pytest.raises(CancelledError):
+            future.result(timeout=5)
+        assert time.monotonic() - start < 2
+        assert executor.stats()['cancelled'] == 1
+    finally:
+        executor.close()
+    # Low priority processes
+    if shutil.which("nice"):
+        assert commands[0][:3] == ("nice", "-n", "15")
+
+def test_from_config(cached_config, fake_config):
+    assert SpeculativeExecutor.from_config(cached_config) is None
+    assert SpeculativeExecutor.from_config(dict(fake_config, speculate=True)) is None
+    executor = SpeculativeExecutor.from_config(dict(cached_config, speculate=True, speculate_budget=2))
+    assert executor.budget == 2 and executor.sim_config['nice'] == 15
+
+def test_executor_follows_config(cached_config, tmp_path):
+    config = dict(cached_config, speculate=True)
+    executor = get_speculative_executor(config)
+    assert get_speculative_executor(dict(config)) is executor
+    try:
+        # Another cache directory after a reload: a new executor
+        other = get_speculative_executor(dict(config, cache_dir=str(tmp_path / "other")))
+        assert other is not executor and other.sim_config['cache_dir'] == str(tmp_path / "other")
+        assert get_speculative_executor(dict(config, speculate=False)) is None
+    finally:
+        get_speculative_executor(None)